@@ -1,11 +1,27 @@
 #!/./.venv/bin/python
 
 import requests
-from bs4 import BeautifulSoup
+import asyncio
 import os
 import time
 from urllib.parse import urljoin
-import random
+
+from blob_store import BlobStore
+from docket_boundary import find_last_case
+from docket_parser import parse_docket
+from http_cache import DocketCache
+from pdf_download import stream_download
+from scrape_engine import MAX_IN_FLIGHT, REQUESTS_PER_SECOND, call_with_retries, configure_session, retry_delay, scrape_cases_async
+from scrape_state import DOWNLOADED, FAILED, NO_DOCUMENT, PENDING, ScrapeStateStore
+
+# Court key used for this scraper's rows in the scrape state store
+COURT = "CCA"
+
+# Last PD-xxxx-24 case number, used if the end of the docket cannot be probed
+DEFAULT_LAST_CASE = 1081
+
+# Texas courts search site; point this at replay_server.py to scrape offline
+BASE_URL = os.getenv("TXCOURTS_BASE_URL", "https://search.txcourts.gov")
 
 # Create a session with browser-like headers
 session = requests.Session()
@@ -22,18 +38,24 @@ session.headers.update({
     'Cache-Control': 'max-age=0'
 })
 
+# Cache docket pages; a case with a PDR disposition is treated as closed
+docket_cache = DocketCache(is_closed=lambda body: b'PDR DISP' in body)
+
+# Store each downloaded PDF once by content hash; the filenames are links to the blobs
+blob_store = BlobStore()
+
 def download_file(url, filename):
-    """Download a file from URL and save it locally"""
+    """Stream a file from URL to disk, resuming interrupted transfers"""
     try:
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        
         # Create downloads directory if it doesn't exist
         os.makedirs('downloads', exist_ok=True)
         
         filepath = os.path.join('downloads', filename)
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        if os.path.exists(filepath):
+            print(f"Already downloaded: {filename}")
+            return True
+        
+        stream_download(session, url, filepath, blob_store=blob_store)
         
         print(f"Downloaded: {filename}")
         return True
@@ -41,154 +63,117 @@ def download_file(url, filename):
         print(f"Error downloading {filename}: {e}")
         return False
 
-def get_pdr_disposition(soup):
-    """Check for PDR disposition status in Case Events table"""
-    # Find the Case Events section - look for div containing "Case Events" text
-    case_events_div = soup.find('div', class_=['panel-heading', 'panel-heading-content'], string=lambda text: text and 'Case Events' in text.strip())
-    if not case_events_div:
-        return None
-    
-    # Find the table with case events
-    panel = case_events_div.parent
-    table = panel.find('table', class_='rgMasterTable')
-    if not table:
-        return None
-    
-    # Look through table rows for PDR DISP
-    rows = table.find('tbody').find_all('tr') if table.find('tbody') else []
-    
-    for row in rows:
-        cells = row.find_all('td')
-        if len(cells) >= 3:
-            event_type = cells[1].get_text().strip()
-            disposition = cells[2].get_text().strip()
-            
-            if 'PDR DISP' in event_type:
-                if 'Granted' in disposition:
-                    return 'granted'
-                elif 'Refused' in disposition:
-                    return 'refused'
+def get_pdr_disposition(docket):
+    """Return the PDR disposition status from the parsed Case Events table"""
+    return docket['disposition']
+
+def find_petition_document(docket):
+    """Find PETITION document in the parsed Case Events table"""
+    for event in docket['events']:
+        for document in event['documents']:
+            if 'PETITION' in document['doc_type'].upper():
+                return document['href']
     
     return None
 
-def find_petition_document(soup):
-    """Find PETITION document in Case Events table"""
-    # Find the Case Events section - look for div containing "Case Events" text
-    case_events_div = soup.find('div', class_=['panel-heading', 'panel-heading-content'], string=lambda text: text and 'Case Events' in text.strip())
-    if not case_events_div:
-        return None
-    
-    # Find the table with case events
-    panel = case_events_div.parent
-    table = panel.find('table', class_='rgMasterTable')
-    if not table:
-        return None
-    
-    # Look through table rows
-    rows = table.find('tbody').find_all('tr') if table.find('tbody') else []
-    
-    for row in rows:
-        cells = row.find_all('td')
-        if len(cells) >= 4:
-            # Check the document cell (4th column)
-            doc_cell = cells[3]
-            
-            # Look for nested document table
-            doc_table = doc_cell.find('table', class_='docGrid')
-            if doc_table:
-                doc_rows = doc_table.find_all('tr')
-                for doc_row in doc_rows:
-                    doc_cells = doc_row.find_all('td')
-                    if len(doc_cells) >= 2:
-                        # Check if this row contains PETITION
-                        doc_type = doc_cells[1].get_text().strip()
-                        if 'PETITION' in doc_type.upper():
-                            # Get the link from the first cell
-                            link = doc_cells[0].find('a')
-                            if link and link.get('href'):
-                                return link['href']
+def find_appellant_brief(docket):
+    """Find Appellant brief in the parsed Appellate Briefs table"""
+    for brief in docket['briefs']:
+        # Look for "BRIEF FILED" by "Appellant"
+        if brief['event_type'] == "BRIEF FILED" and brief['description'] == "Appellant":
+            for document in brief['documents']:
+                # Check if this row contains Brief (not Notice)
+                doc_type = document['doc_type'].upper()
+                if 'BRIEF' in doc_type and 'NOTICE' not in doc_type:
+                    return document['href']
     
     return None
 
-def find_appellant_brief(soup):
-    """Find Appellant brief in Appellate Briefs table"""
-    # Find the Appellate Briefs section - look for div containing "Appellate Briefs" text
-    briefs_div = soup.find('div', class_=['panel-heading', 'panel-heading-content'], string=lambda text: text and 'Appellate Briefs' in text.strip())
-    if not briefs_div:
-        return None
-    
-    # Find the table with briefs
-    panel = briefs_div.parent
-    table = panel.find('table', class_='rgMasterTable')
-    if not table:
-        return None
-    
-    # Look through table rows
-    rows = table.find('tbody').find_all('tr') if table.find('tbody') else []
-    
-    for row in rows:
-        cells = row.find_all('td')
-        if len(cells) >= 4:
-            # Check columns: Date, Event Type, Description, Document
-            event_type = cells[1].get_text().strip()
-            description = cells[2].get_text().strip()
-            
-            # Look for "BRIEF FILED" by "Appellant"
-            if event_type == "BRIEF FILED" and description == "Appellant":
-                # Check the document cell (4th column)
-                doc_cell = cells[3]
-                
-                # Look for nested document table
-                doc_table = doc_cell.find('table', class_='docGrid')
-                if doc_table:
-                    doc_rows = doc_table.find_all('tr')
-                    for doc_row in doc_rows:
-                        doc_cells = doc_row.find_all('td')
-                        if len(doc_cells) >= 2:
-                            # Check if this row contains Brief (not Notice)
-                            doc_type = doc_cells[1].get_text().strip()
-                            if 'BRIEF' in doc_type.upper() and 'NOTICE' not in doc_type.upper():
-                                # Get the link from the first cell
-                                link = doc_cells[0].find('a')
-                                if link and link.get('href'):
-                                    return link['href']
+def case_exists(case_number):
+    """Check whether the Court of Criminal Appeals has a docket for PD-{case_number}-24"""
+    base_url = BASE_URL
+    case_url = f"{base_url}/Case.aspx?cn=PD-{case_number:04d}-24&coa=coscca"
     
-    return None
+    # Goes through the docket cache, so probed pages are not fetched again by the sweep;
+    # throttling and transient errors are retried so one 503 does not abort the probe
+    content = call_with_retries(lambda: docket_cache.fetch(session, case_url, timeout=30))
+    return parse_docket(content)['case_events_section']
+
+def find_docket_end():
+    """Find the highest existing PD-xxxx-24 case, falling back to DEFAULT_LAST_CASE"""
+    try:
+        # PD numbers have four digits
+        last_case = find_last_case(case_exists, max_case=9999)
+    except requests.exceptions.RequestException as e:
+        print(f"Could not probe the end of the docket ({e}); using PD-{DEFAULT_LAST_CASE:04d}-24")
+        return DEFAULT_LAST_CASE
+    if last_case < 1:
+        # PD-0001-24 always exists, so a miss there means the page could not be read (a markup change, say)
+        print(f"No case found at PD-0001-24; using PD-{DEFAULT_LAST_CASE:04d}-24")
+        return DEFAULT_LAST_CASE
+    print(f"Last case on the docket: PD-{last_case:04d}-24")
+    return last_case
+
+def scrape_case_with_backoff(case_number, max_retries=3, state=None):
+    """Scrape a single case, retrying throttling and transient errors, recording the outcome in state
 
-def scrape_case_with_backoff(case_number, max_retries=3):
-    """Scrape a single case with exponential backoff on errors"""
+    Waits between attempts honour Retry-After and otherwise back off
+    exponentially with jitter (see scrape_engine.retry_delay); client errors
+    such as 404 are not retried.
+    """
+    case_id = f"PD-{case_number:04d}-24"
     for attempt in range(max_retries):
         try:
-            return scrape_case(case_number)
+            status = scrape_case(case_number)
+            if status == FAILED:
+                if state:
+                    state.record(case_id, COURT, FAILED, "download failed")
+                return False
+            if state:
+                state.record(case_id, COURT, status)
+            return status
         except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                backoff_time = (2 ** attempt) + random.uniform(0, 1)
+            backoff_time = retry_delay(e, attempt)
+            if backoff_time is not None and attempt < max_retries - 1:
                 print(f"Request failed for case PD-{case_number:04d}-24 (attempt {attempt + 1}), backing off for {backoff_time:.1f} seconds: {e}")
                 time.sleep(backoff_time)
             else:
                 print(f"Max retries exceeded for case PD-{case_number:04d}-24: {e}")
+                if state:
+                    state.record(case_id, COURT, FAILED, f"max retries exceeded: {e}")
                 return False
         except Exception as e:
             print(f"Unexpected error for case PD-{case_number:04d}-24: {e}")
+            if state:
+                state.record(case_id, COURT, FAILED, f"unexpected error: {e}")
             return False
     
     return False
 
 def scrape_case(case_number):
-    """Scrape a single case page for PDR and brief documents"""
-    base_url = "https://search.txcourts.gov"
+    """Scrape a single case page for PDR and brief documents
+
+    Returns DOWNLOADED if at least one document was saved, PENDING if the
+    petition was saved before the PDR has a disposition (so the case is
+    fetched again later for the disposition filename), NO_DOCUMENT if the
+    case has neither a petition nor an appellant brief, and FAILED if a
+    download did not complete.
+    """
+    base_url = BASE_URL
     case_url = f"{base_url}/Case.aspx?cn=PD-{case_number:04d}-24&coa=coscca"
     
-    response = session.get(case_url, timeout=30)
-    response.raise_for_status()
+    content = docket_cache.fetch(session, case_url, timeout=30)
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Parse the page once; the lookups below read the structured record
+    docket = parse_docket(content)
+    
+    downloads = []
     
     # Check for PDR disposition status
-    pdr_disposition = get_pdr_disposition(soup)
+    pdr_disposition = get_pdr_disposition(docket)
     
     # Look for PETITION document
-    petition_link = find_petition_document(soup)
+    petition_link = find_petition_document(docket)
     if petition_link:
         pdf_url = urljoin(base_url, petition_link)
         
@@ -198,45 +183,85 @@ def scrape_case(case_number):
         else:
             filename = f"PD-{case_number:04d}-24 PDR.pdf"
         
-        download_file(pdf_url, filename)
+        downloads.append(download_file(pdf_url, filename))
     
     # Look for Appellant brief
-    brief_link = find_appellant_brief(soup)
+    brief_link = find_appellant_brief(docket)
     if brief_link:
         pdf_url = urljoin(base_url, brief_link)
         filename = f"PD-{case_number:04d}-24 Brief.pdf"
-        download_file(pdf_url, filename)
+        downloads.append(download_file(pdf_url, filename))
     
     print(f"Processed case PD-{case_number:04d}-24")
-    return True
+    if not downloads:
+        return NO_DOCUMENT
+    if not all(downloads):
+        return FAILED
+    return PENDING if petition_link and not pdr_disposition else DOWNLOADED
+
+def main(max_in_flight=MAX_IN_FLIGHT, requests_per_second=REQUESTS_PER_SECOND, last_case=None):
+    """Main function to scrape all cases from 0001 to the end of the docket
 
-def main():
-    """Main function to scrape all cases from 0001 to 1081"""
+    If last_case is not given, the end of the docket is found with a galloping
+    search over case numbers.
+    """
     print("Starting PDR document scraper...")
-    print("This will process cases PD-0001-24 through PD-1081-24")
+    
+    # The adaptive rate controller paces every request, so there are no fixed sleeps between cases
+    print(f"Pacing requests adaptively up to {max_in_flight} in flight and {requests_per_second} requests/second")
+    controller = configure_session(session, max_in_flight, requests_per_second)
+    
+    if last_case is None:
+        last_case = find_docket_end()
+    print(f"This will process cases PD-0001-24 through PD-{last_case:04d}-24")
+    
+    state = ScrapeStateStore()
+    
+    # Skip cases whose outcome is already recorded; failed and stale cases are fetched again
+    case_numbers = [n for n in range(1, last_case + 1) if not state.cached_status(f"PD-{n:04d}-24")]
+    if len(case_numbers) < last_case:
+        print(f"Skipping {last_case - len(case_numbers)} cases already recorded in {state.path}")
     
     failed_cases = []
+    processed = 0
     
-    for case_num in range(1, 1082):  # 1 to 1081 inclusive
-        success = scrape_case_with_backoff(case_num)
+    def record_result(case_num, success):
+        nonlocal processed
+        processed += 1
         if not success:
             failed_cases.append(case_num)
         
-        # Add a small delay to be respectful to the server
-        base_delay = 1.0
-        jitter = random.uniform(0, 0.5)
-        time.sleep(base_delay + jitter)
-        
         # Progress indicator
-        if case_num % 50 == 0:
-            print(f"Progress: {case_num}/1081 cases processed")
+        if processed % 50 == 0:
+            print(f"Progress: {processed}/{len(case_numbers)} cases processed ({controller.describe()})")
+    
+    scrape_fn = lambda case_num: scrape_case_with_backoff(case_num, state=state)
+    
+    if max_in_flight > 1:
+        asyncio.run(scrape_cases_async(scrape_fn, case_numbers, max_in_flight, record_result))
+    else:
+        for case_num in case_numbers:
+            record_result(case_num, scrape_fn(case_num))
+    
+    # Re-queue failed cases once before reporting them
+    if failed_cases:
+        retry_cases = failed_cases[:]
+        failed_cases.clear()
+        print(f"\nRetrying {len(retry_cases)} failed cases...")
+        for case_num in retry_cases:
+            if not scrape_fn(case_num):
+                failed_cases.append(case_num)
     
     print("Scraping completed!")
+    print(docket_cache.summary())
     
     if failed_cases:
-        print(f"\nFailed to process {len(failed_cases)} cases:")
+        print(f"\nFailed to process {len(failed_cases)} cases (they will be retried on the next run):")
         for case_num in failed_cases:
-            print(f"  PD-{case_num:04d}-24")
+            row = state.get(f"PD-{case_num:04d}-24")
+            print(f"  PD-{case_num:04d}-24: {row[1] if row else 'unknown error'}")
+    
+    state.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,91 +1,432 @@
 #!/./.venv/bin/python
 
+import asyncio
 import os
 import sys
 import json
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
 import anthropic
 from dotenv import load_dotenv
-import PyPDF2
+
+from blob_store import BlobStore
+from analysis_schema import ANALYSIS_TOOL, ANALYSIS_TOOL_NAME, extract_analysis, repair_prompt, validate_analysis
+from brief_sections import BRIEF_SECTIONS, parse_section_names, select_sections
+from chunking import CHUNK_TOKENS, CHUNK_WORKERS, chunk_label, chunk_text, merge_results
+from cost_planner import (ANALYSIS_BUDGET_ACTION, ANALYSIS_BUDGET_DOLLARS, ANALYSIS_BUDGET_INPUT_TOKENS, CostBudget,
+                          project, usage_counts)
+from pdf_extract import EXTRACT_TIMEOUT, EXTRACT_WORKERS, Extraction, extract_texts
+from pipeline import PIPELINE_QUEUE_DEPTH, run_pipeline
+from rate_budget import HEADROOM, INPUT_TOKENS_PER_MINUTE, REQUESTS_PER_MINUTE, RateBudget
+from result_cache import ResultCache, text_sha256
+from scrape_engine import parse_retry_after
+from stylometry import PRESCREEN_AUDIT_RATE, PRESCREEN_THRESHOLD, estimated_recall, score_documents
+from text_cache import TextCache
+from text_normalize import CHARS_PER_TOKEN, describe, estimate_tokens, normalize_text
 
 # Load environment variables
 load_dotenv()
 
+MODEL = "claude-3-5-sonnet-20241022"
+MAX_TOKENS = 1000
+
+# Part of the result cache key; bump it whenever DETECTION_INSTRUCTIONS or build_request changes
+PROMPT_VERSION = "3"
+
+# Fixed part of every analysis request, sent as a cached system prompt ahead of the document
+DETECTION_INSTRUCTIONS = """Please analyze the legal document in the next message for AI-generated content.
+
+Please answer these specific questions:
+1. How much of this document was written by an LLM? (Give a percentage estimate)
+2. How confident are you of that assessment? (Give a percentage confidence level)
+3. What are the specific tells or indicators that suggest AI generation?
+
+Record your answers with the record_analysis tool: percentage_ai_generated and confidence_percentage as numbers from 0 to 100, and tells as a list with one indicator per item.
+
+Focus on legal writing patterns, repetitive phrasing, unusual word choices, overly formal language, and other indicators common in AI-generated legal documents."""
+
+# Documents analyzed at once; 1 keeps the synchronous client, more switches to AsyncAnthropic
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "1"))
+
+# Times a rate-limited request is retried after the budget pause
+RATE_LIMIT_RETRIES = 3
+
+# Batch mode splits the corpus into message batches of at most this many requests and bytes,
+# under the API's 100,000-request and 256 MB limits
+BATCH_MAX_REQUESTS = int(os.getenv("ANALYSIS_BATCH_MAX_REQUESTS", "10000"))
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+
+# Seconds between status checks of submitted batches
+BATCH_POLL_SECONDS = float(os.getenv("ANALYSIS_BATCH_POLL_SECONDS", "60"))
+
 class PDRAIDetector:
-    def __init__(self):
+    def __init__(self, extract_workers: int = EXTRACT_WORKERS, extract_timeout: float = EXTRACT_TIMEOUT,
+                 sections: str = BRIEF_SECTIONS, queue_depth: int = PIPELINE_QUEUE_DEPTH,
+                 analysis_concurrency: int = ANALYSIS_CONCURRENCY, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 input_tokens_per_minute: float = INPUT_TOKENS_PER_MINUTE, chunk_tokens: int = CHUNK_TOKENS,
+                 chunk_workers: int = CHUNK_WORKERS, prescreen_threshold: Optional[float] = PRESCREEN_THRESHOLD,
+                 prescreen_audit_rate: float = PRESCREEN_AUDIT_RATE,
+                 budget_dollars: Optional[float] = ANALYSIS_BUDGET_DOLLARS,
+                 budget_input_tokens: Optional[int] = ANALYSIS_BUDGET_INPUT_TOKENS,
+                 budget_action: str = ANALYSIS_BUDGET_ACTION):
         self.client = anthropic.Anthropic(
             api_key=os.getenv("ANTHROPIC_API_KEY")
         )
+        # analyze_text_async retries 429s itself after pausing the shared rate budget; SDK retries
+        # on top of that would multiply the attempts and ignore the pause
+        self.async_client = anthropic.AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            max_retries=0
+        )
         self.downloads_dir = Path("downloads")
+        self.blob_store = BlobStore()
+        self.text_cache = TextCache(digest_for=self.blob_store.digest_for)
+        self.result_cache = ResultCache(PROMPT_VERSION, MODEL, MAX_TOKENS)
+        self.extract_workers = extract_workers
+        self.extract_timeout = extract_timeout
+        parse_section_names(sections)
+        self.sections = sections
+        self.queue_depth = queue_depth
+        self.analysis_concurrency = analysis_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.input_tokens_per_minute = input_tokens_per_minute
+        self.chunk_tokens = chunk_tokens
+        self.chunk_workers = chunk_workers
+        self.prescreen_threshold = prescreen_threshold
+        self.prescreen_audit_rate = prescreen_audit_rate
+        self.budget_dollars = budget_dollars
+        self.budget_input_tokens = budget_input_tokens
+        self.budget_action = budget_action
+        self.cost_budget = self.new_cost_budget()
         self.results = []
+        self.usage = {'calls': 0, 'input_tokens': 0, 'cache_read_input_tokens': 0,
+                      'cache_creation_input_tokens': 0, 'output_tokens': 0}
+        self._usage_lock = threading.Lock()
+        self.parse_stats = {'responses': 0, 'invalid': 0, 'repaired': 0, 'failed': 0}
+        self._parse_lock = threading.Lock()
         
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extract text content from PDF file"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            return self.text_cache.extract(pdf_path)
         except Exception as e:
             print(f"Error reading {pdf_path}: {e}")
             return ""
     
+    def build_request(self, text: str, filename: str) -> Dict:
+        """Return the messages.create arguments for analyzing one document
+        
+        The fixed instructions go first, in a system block marked for prompt
+        caching, and the document comes last, so every request shares the
+        same cacheable prefix. The model must answer by calling the
+        record_analysis tool, whose schema fixes the shape of the analysis.
+        """
+        return {
+            'model': MODEL,
+            'max_tokens': MAX_TOKENS,
+            'tools': [ANALYSIS_TOOL],
+            'tool_choice': {"type": "tool", "name": ANALYSIS_TOOL_NAME},
+            'system': [
+                {"type": "text", "text": DETECTION_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}
+            ],
+            'messages': [
+                {"role": "user", "content": f"Document: {filename}\n\nText:\n{text}"}
+            ],
+        }
+    
+    def parse_response(self, response, filename: str) -> Tuple[Optional[Dict], List[str]]:
+        """Validate the analysis a response recorded; return (result dict or None, problems found)"""
+        usage = self.record_usage(response.usage)
+        analysis, problems = validate_analysis(extract_analysis(response.content))
+        if problems:
+            return None, problems
+        return dict(analysis, filename=filename, usage=usage), []
+    
+    def repair_request(self, request: Dict, response, problems: List[str]) -> Dict:
+        """The request again, followed by the invalid answer and what was wrong with it
+        
+        When the answer was a tool call, the problems go back as its
+        tool_result marked as an error, which is what the model expects after
+        a failed tool call.
+        """
+        messages = list(request['messages'])
+        if response.content:
+            messages.append({"role": "assistant", "content": [block.to_dict() for block in response.content]})
+        tool_calls = [block for block in response.content if block.type == 'tool_use']
+        if tool_calls:
+            content = [{"type": "tool_result", "tool_use_id": tool_calls[0].id, "is_error": True,
+                        "content": repair_prompt(problems)}]
+        else:
+            content = repair_prompt(problems)
+        messages.append({"role": "user", "content": content})
+        return dict(request, messages=messages)
+    
+    def admit_repair(self, request: Dict, filename: str) -> int:
+        """Reserve a repair retry in the cost budget; return the reserved input tokens, or 0 if it does not fit
+        
+        Repairs are sent as ordinary requests even in batch mode, so they are
+        priced without the batch discount.
+        """
+        tokens = self.estimate_request_tokens(request)
+        if self.cost_budget.admit(tokens, truncate=False, batch=False):
+            return tokens
+        print(f"  Budget: no repair retry for {filename}")
+        return 0
+    
+    def count_parse(self, filename: str, first: List[str], last: Optional[List[str]]):
+        """Record how a response's validation went; last is None when no repair retry was sent"""
+        with self._parse_lock:
+            self.parse_stats['responses'] += 1
+            if first:
+                self.parse_stats['invalid'] += 1
+                self.parse_stats['repaired' if last == [] else 'failed'] += 1
+        if last:
+            print(f"Invalid analysis for {filename} after a repair retry: {'; '.join(last)}")
+        elif first and last is None:
+            print(f"Invalid analysis for {filename}: {'; '.join(first)}")
+    
+    def parse_summary(self) -> str:
+        stats = self.parse_stats
+        rate = stats['invalid'] / stats['responses'] if stats['responses'] else 0.0
+        return (f"Structured output: {stats['responses']} responses, {stats['invalid']} failed validation "
+                f"({rate:.1%}), {stats['repaired']} fixed by a repair retry, {stats['failed']} lost")
+    
+    def _completion(self, request: Dict, response, filename: str):
+        """Generator behind complete_response and complete_response_async
+        
+        When a repair retry is due it yields (repair request, reserved input
+        tokens) and expects the repaired response to be sent back, or the
+        error from sending it to be thrown in. It returns what
+        complete_response returns, so the two differ only in how they send.
+        """
+        usage = usage_counts(response.usage)
+        result, problems = self.parse_response(response, filename)
+        retried, total = None, usage
+        if problems:
+            repair = self.repair_request(request, response, problems)
+            reserved = self.admit_repair(repair, filename)
+            if reserved:
+                print(f"Invalid analysis for {filename} ({'; '.join(problems)}), sending a repair retry")
+                repair_usage = None
+                try:
+                    repaired = yield repair, reserved
+                    repair_usage = usage_counts(repaired.usage)
+                    total = {name: tokens + repair_usage[name] for name, tokens in usage.items()}
+                    result, retried = self.parse_response(repaired, filename)
+                except Exception as e:
+                    print(f"Error repairing {filename}: {e}")
+                    retried = problems
+                finally:
+                    self.cost_budget.settle(reserved, repair_usage, batch=False)
+        self.count_parse(filename, problems, retried)
+        if result:
+            result['usage'] = total
+        return result, usage
+    
+    def complete_response(self, request: Dict, response, filename: str) -> Tuple[Optional[Dict], Dict]:
+        """Validate a response, with one repair retry if it fails; return (result or None, usage of the response)
+        
+        The repair retry is charged to the cost budget here. The result's
+        'usage' covers both calls, but the usage returned is the response's
+        own, for the caller to settle against the response's reservation.
+        """
+        steps = self._completion(request, response, filename)
+        try:
+            repair, _ = next(steps)
+            try:
+                repaired = self.client.messages.create(**repair)
+            except Exception as e:
+                steps.throw(e)
+            steps.send(repaired)
+        except StopIteration as done:
+            return done.value
+    
+    async def complete_response_async(self, request: Dict, response, filename: str,
+                                      budget: RateBudget) -> Tuple[Optional[Dict], Dict]:
+        """Async complete_response, pacing the repair retry through the rate budget"""
+        steps = self._completion(request, response, filename)
+        try:
+            repair, reserved = next(steps)
+            try:
+                await budget.acquire(reserved)
+                repaired = await self.async_client.messages.create(**repair)
+            except Exception as e:
+                steps.throw(e)
+            steps.send(repaired)
+        except StopIteration as done:
+            return done.value
+    
+    def record_usage(self, usage) -> Dict:
+        """Add one response's token usage to the run totals and return it as a dict
+        
+        input_tokens counts only the uncached part of the prompt; the cached
+        prefix shows up as cache_read_input_tokens on a hit and as
+        cache_creation_input_tokens when it is written.
+        """
+        call = usage_counts(usage)
+        with self._usage_lock:
+            self.usage['calls'] += 1
+            for name, tokens in call.items():
+                self.usage[name] += tokens
+        return call
+    
+    def usage_summary(self) -> str:
+        usage = self.usage
+        prompt_tokens = usage['input_tokens'] + usage['cache_read_input_tokens'] + usage['cache_creation_input_tokens']
+        return (f"Token usage: {usage['calls']} calls, {prompt_tokens:,} prompt tokens "
+                f"({usage['cache_read_input_tokens']:,} read from the prompt cache, "
+                f"{usage['cache_creation_input_tokens']:,} written to it), {usage['output_tokens']:,} output tokens")
+    
+    def new_cost_budget(self, batch: bool = False) -> CostBudget:
+        """A fresh CostBudget with this detector's limits, priced for interactive or batch requests"""
+        return CostBudget(MODEL, MAX_TOKENS, self.budget_dollars, self.budget_input_tokens, self.budget_action, batch)
+    
+    def estimate_request_tokens(self, request: Dict) -> int:
+        return estimate_tokens(json.dumps([request['tools'], request['system'], request['messages']]))
+    
+    def admit_request(self, text: str, filename: str) -> Tuple[Optional[Dict], int, str]:
+        """Build the request for text and reserve it in the cost budget
+        
+        Returns (request, reserved input tokens, text sent). The text is cut
+        short if the budget truncates the request; the request is None if the
+        budget skips it or has stopped the run.
+        """
+        request = self.build_request(text, filename)
+        tokens = self.estimate_request_tokens(request)
+        stopped = self.cost_budget.stopped
+        allowed = self.cost_budget.admit(tokens)
+        if not allowed:
+            if not stopped:
+                print(f"  Budget: {'run stopped' if self.cost_budget.stopped else 'skipping'}, {filename} not analyzed")
+            return None, 0, text
+        if allowed < tokens:
+            text = text[:max(0, len(text) - (tokens - allowed) * CHARS_PER_TOKEN)]
+            request = self.build_request(text, filename)
+            print(f"  Budget: {filename} truncated to ~{allowed:,} input tokens")
+        return request, allowed, text
+    
+    def cached_result(self, text: str, filename: str) -> Optional[Dict]:
+        """Return the stored analysis of this exact text under the current prompt and model, or None"""
+        cached = self.result_cache.get(text)
+        return dict(cached, filename=filename) if cached else None
+    
+    def store_result(self, text: str, result: Optional[Dict], sent: Optional[str] = None) -> Optional[Dict]:
+        """Cache result under the text it analyzes, unless the budget cut the text sent short
+        
+        A truncated analysis is not an analysis of text, and the cache is
+        looked up with the full text, so it is returned without being stored.
+        """
+        if result and (sent is None or sent == text):
+            self.result_cache.put(text, result)
+        return result
+    
     def analyze_document(self, text: str, filename: str) -> Optional[Dict]:
-        """Send document to Claude for AI detection analysis"""
+        """Send document to Claude for AI detection analysis
+        
+        A document longer than chunk_tokens is split into chunks that are
+        analyzed in parallel and merged into one result (see chunking.py).
+        """
         if not text.strip():
             return None
-            
-        prompt = f"""Please analyze this legal document for AI-generated content.
-
-Document: {filename}
-
-Text:
-{text}
-
-Please answer these specific questions:
-1. How much of this document was written by an LLM? (Give a percentage estimate)
-2. How confident are you of that assessment? (Give a percentage confidence level)
-3. What are the specific tells or indicators that suggest AI generation?
-
-Please format your response as JSON with the following structure:
-{{
-    "percentage_ai_generated": <number>,
-    "confidence_percentage": <number>,
-    "tells": ["tell1", "tell2", "tell3"]
-}}
-
-Focus on legal writing patterns, repetitive phrasing, unusual word choices, overly formal language, and other indicators common in AI-generated legal documents."""
-
+        
+        chunks = chunk_text(text, self.chunk_tokens)
+        if len(chunks) == 1:
+            return self.analyze_text(text, filename)
+        
+        labels = [chunk_label(filename, i, len(chunks)) for i in range(len(chunks))]
+        with ThreadPoolExecutor(max_workers=self.chunk_workers) as pool:
+            results = list(pool.map(self.analyze_text, chunks, labels))
+        return merge_results(results, chunks, filename)
+    
+    def analyze_text(self, text: str, filename: str) -> Optional[Dict]:
+        """Analyze one document or chunk in a single request, unless the result cache already has it"""
+        cached = self.cached_result(text, filename)
+        if cached:
+            return cached
+        
+        request, reserved, sent = self.admit_request(text, filename)
+        if request is None:
+            return None
+        
+        usage = None
         try:
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            response_text = response.content[0].text
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                result['filename'] = filename
-                return result
-            else:
-                print(f"Could not parse JSON response for {filename}")
-                return None
-                
+            response = self.client.messages.create(**request)
+            usage = usage_counts(response.usage)
+            result, usage = self.complete_response(request, response, filename)
+            return self.store_result(text, result, sent)
         except Exception as e:
             print(f"Error analyzing {filename}: {e}")
             return None
+        finally:
+            self.cost_budget.settle(reserved, usage)
+    
+    async def analyze_document_async(self, text: str, filename: str, budget: RateBudget,
+                                     requests: asyncio.Semaphore) -> Optional[Dict]:
+        """Async analyze_document that waits for room in the rate budget before each request
+        
+        requests is shared by every document, so at most analysis_concurrency
+        requests are in flight in all; up to chunk_workers chunks of one
+        document compete for them at a time.
+        """
+        if not text.strip():
+            return None
+        
+        chunks = chunk_text(text, self.chunk_tokens)
+        if len(chunks) == 1:
+            return await self.analyze_text_async(text, filename, budget, requests)
+        
+        workers = asyncio.Semaphore(self.chunk_workers)
+        
+        async def analyze_chunk(i, chunk):
+            async with workers:
+                return await self.analyze_text_async(chunk, chunk_label(filename, i, len(chunks)), budget, requests)
+        
+        results = await asyncio.gather(*(analyze_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+        return merge_results(results, chunks, filename)
+    
+    async def analyze_text_async(self, text: str, filename: str, budget: RateBudget,
+                                 requests: asyncio.Semaphore) -> Optional[Dict]:
+        """Async analyze_text, holding one of the shared request slots while it talks to the API
+        
+        A 429 pauses the whole budget for its Retry-After (or a minute) and the
+        request is tried again, up to RATE_LIMIT_RETRIES times. The async
+        client makes no retries of its own.
+        """
+        cached = self.cached_result(text, filename)
+        if cached:
+            return cached
+        
+        request, reserved, sent = self.admit_request(text, filename)
+        if request is None:
+            return None
+        
+        usage = None
+        try:
+            async with requests:
+                for attempt in range(RATE_LIMIT_RETRIES + 1):
+                    await budget.acquire(reserved)
+                    try:
+                        response = await self.async_client.messages.create(**request)
+                        usage = usage_counts(response.usage)
+                        result, usage = await self.complete_response_async(request, response, filename, budget)
+                        return self.store_result(text, result, sent)
+                    except anthropic.RateLimitError as e:
+                        retry_after = parse_retry_after(e.response.headers.get('retry-after')) or 60.0
+                        print(f"Rate limited analyzing {filename}, pausing {retry_after:.0f} s")
+                        budget.pause(retry_after)
+                        if attempt == RATE_LIMIT_RETRIES:
+                            print(f"Error analyzing {filename}: {e}")
+                            return None
+                    except Exception as e:
+                        print(f"Error analyzing {filename}: {e}")
+                        return None
+        finally:
+            self.cost_budget.settle(reserved, usage)
     
     def should_include_in_report(self, result: Dict) -> bool:
         """Check if document meets criteria for inclusion in HTML report"""
@@ -149,45 +490,134 @@ Focus on legal writing patterns, repetitive phrasing, unusual word choices, over
         
         return html
     
-    def run_analysis(self):
-        """Main function to run AI detection on all PDR files"""
-        if not self.downloads_dir.exists():
-            print(f"Downloads directory {self.downloads_dir} not found")
-            return
+    def prepare_document(self, extraction: Extraction) -> Dict:
+        """Pipeline stage: normalize an extracted document and select the sections to send"""
+        document = {'path': extraction.path, 'text': "", 'notes': [], 'result': None}
+        if extraction.error:
+            document['notes'].append(f"  Error reading {extraction.path.name}: {extraction.error}")
+        if not extraction.text.strip():
+            return document
         
-        # Get all PDF files
-        pdf_files = list(self.downloads_dir.glob("*.pdf"))
-        total_files = len(pdf_files)
+        # Drop running headers, page numbers and line numbers, and collapse whitespace
+        text, cleanup = normalize_text(extraction.text)
+        document['notes'].append(f"  Normalized: {describe(cleanup)}")
         
-        print(f"Found {total_files} PDF files to analyze")
+        # Send only the substantive sections (facts, argument, prayer by default)
+        selected, found = select_sections(text, self.sections)
+        if found:
+            document['notes'].append(f"  Sending {', '.join(found)}: {len(selected):,} of {len(text):,} characters")
+        document['text'] = selected
+        return document
+    
+    def should_analyze(self, document: Dict) -> bool:
+        """Whether a prepared document goes to Claude: it has text and was not held back by the pre-screen"""
+        return bool(document['text'].strip()) and document.get('escalate', True)
+    
+    def prescreen(self, documents: List[Dict]) -> List[Dict]:
+        """Score prepared documents together (see stylometry.py) and hold back those below prescreen_threshold
         
-        flagged_documents = []
+        Each document gets a 'prescreen' score and an 'escalate' flag. A
+        prescreen_audit_rate share of the held-back documents, picked by text
+        hash so reruns pick the same ones, is escalated anyway as an 'audit'
+        sample for estimating recall.
+        """
+        scored = [document for document in documents if document['text'].strip()]
+        if not scored:
+            return documents
+        scores, _ = score_documents([document['text'] for document in scored])
+        for document, score in zip(scored, scores):
+            document['prescreen'] = float(score)
+            document['audit'] = (score < self.prescreen_threshold and
+                                 int(text_sha256(document['text'])[:8], 16) < self.prescreen_audit_rate * 0x100000000)
+            document['escalate'] = score >= self.prescreen_threshold or document['audit']
+        escalated = sum(document['escalate'] and not document['audit'] for document in scored)
+        audited = sum(document['audit'] for document in scored)
+        print(f"Pre-screen: {escalated} of {len(scored)} documents score {self.prescreen_threshold:+.2f} or more "
+              f"and go to Claude, plus {audited} held-back documents as an audit sample")
+        return documents
+    
+    def prescreen_summary(self, documents: List[Dict]) -> str:
+        """Flags found above the threshold and in the audit sample, with the recall they imply"""
+        scored = [document for document in documents if 'prescreen' in document]
+        flagged = [document for document in scored
+                   if document['result'] and self.should_include_in_report(document['result'])]
+        flagged_escalated = sum(not document['audit'] for document in flagged)
+        flagged_audited = sum(document['audit'] for document in flagged)
+        audited = sum(document['audit'] for document in scored)
+        held_back = sum(not document['escalate'] or document['audit'] for document in scored)
+        recall = estimated_recall(flagged_escalated, flagged_audited, audited, held_back)
+        recall = f"{recall:.0%}" if recall is not None else "unknown (no audit sample)"
+        return (f"Pre-screen: {flagged_escalated} flagged above the threshold, {flagged_audited} of {audited} audited "
+                f"documents flagged below it; estimated recall {recall}")
+    
+    def analyze_prepared(self, document: Dict) -> Dict:
+        """Pipeline stage: analyze a prepared document with Claude"""
+        if self.should_analyze(document):
+            document['result'] = self.analyze_document(document['text'], document['path'].name)
+        return document
+    
+    async def analyze_documents_async(self, documents, on_result):
+        """Analyze prepared documents with up to analysis_concurrency requests in flight
         
-        for i, pdf_file in enumerate(pdf_files, 1):
-            print(f"Processing {i}/{total_files}: {pdf_file.name}")
-            
-            # Extract text
-            text = self.extract_text_from_pdf(pdf_file)
-            if not text.strip():
-                print(f"  No text extracted from {pdf_file.name}")
-                continue
-            
-            # Analyze with Claude
-            result = self.analyze_document(text, pdf_file.name)
-            if result:
-                print(f"  AI: {result['percentage_ai_generated']}%, Confidence: {result['confidence_percentage']}%")
-                
-                # Check if should be included in report
-                if self.should_include_in_report(result):
-                    flagged_documents.append(result)
-                    print(f"  FLAGGED for report")
-            else:
-                print(f"  Analysis failed")
+        documents is an iterator of prepared documents (it is read from a worker
+        thread so extraction keeps running); on_result(document) is called as
+        each analysis finishes, in completion order. Requests are paced by a
+        RateBudget built from the requests- and input-tokens-per-minute limits.
+        """
+        budget = RateBudget(self.requests_per_minute, self.input_tokens_per_minute)
+        # slots bound the documents taken from the pipeline, requests the API calls (chunks included)
+        slots = asyncio.Semaphore(self.analysis_concurrency)
+        requests = asyncio.Semaphore(self.analysis_concurrency)
+        tasks = []
         
-        # Generate HTML report
+        async def analyze(document):
+            try:
+                if self.should_analyze(document):
+                    document['result'] = await self.analyze_document_async(document['text'], document['path'].name,
+                                                                           budget, requests)
+                on_result(document)
+            finally:
+                slots.release()
+        
+        while True:
+            # Only pull the next document once a request slot is free, so memory stays bounded
+            await slots.acquire()
+            if self.cost_budget.stopped:
+                break
+            document = await asyncio.to_thread(next, documents, None)
+            if document is None:
+                break
+            tasks.append(asyncio.create_task(analyze(document)))
+        await asyncio.gather(*tasks)
+        print(budget.summary())
+    
+    def record_result(self, result: Optional[Dict], duplicates: List[Path], flagged_documents: List[Dict]):
+        """Print one document's analysis and add it (and identical copies) to the report if flagged"""
+        if not result:
+            print(f"  Analysis failed")
+            return
+        print(f"  AI: {result['percentage_ai_generated']}%, Confidence: {result['confidence_percentage']}%")
+        if 'chunks' in result:
+            print(f"  Merged from {result['chunks_analyzed']} of {result['chunks']} chunks")
+        usage = result.get('usage')
+        if usage:
+            print(f"  Tokens: {usage['input_tokens']:,} uncached input, {usage['cache_read_input_tokens']:,} cache read, "
+                  f"{usage['cache_creation_input_tokens']:,} cache write, {usage['output_tokens']:,} output")
+        
+        # Check if should be included in report
+        if self.should_include_in_report(result):
+            flagged_documents.append(result)
+            print(f"  FLAGGED for report")
+            
+            # Identical copies under other names share the analysis
+            for duplicate in duplicates:
+                print(f"  Same document as {duplicate.name}")
+                flagged_documents.append(dict(result, filename=duplicate.name))
+    
+    def write_report(self, flagged_documents: List[Dict], report_path: Path = Path("ai_detection_report.html")):
+        """Write the HTML report of flagged documents, if there are any"""
         if flagged_documents:
             html_report = self.generate_html_report(flagged_documents)
-            report_path = Path("ai_detection_report.html")
             
             with open(report_path, 'w', encoding='utf-8') as f:
                 f.write(html_report)
@@ -196,16 +626,315 @@ Focus on legal writing patterns, repetitive phrasing, unusual word choices, over
             print(f"Found {len(flagged_documents)} documents with potential AI content")
         else:
             print("\nNo documents met the criteria for flagging")
+    
+    def report_document(self, position: int, total: int, document: Dict, duplicates: Dict[Path, List[Path]],
+                        flagged_documents: List[Dict]):
+        """Print one prepared document's notes and analysis, and record it for the report"""
+        pdf_file = document['path']
+        print(f"Processing {position}/{total}: {pdf_file.name}")
+        for note in document['notes']:
+            print(note)
+        
+        if not document['text'].strip():
+            print(f"  No text extracted from {pdf_file.name}")
+            return
+        
+        if not document.get('escalate', True):
+            print(f"  Pre-screen score {document['prescreen']:+.2f} is below {self.prescreen_threshold:+.2f}; "
+                  f"not sent to Claude")
+            return
+        if document.get('audit'):
+            print(f"  Pre-screen score {document['prescreen']:+.2f} is below {self.prescreen_threshold:+.2f}; "
+                  f"analyzed as an audit sample")
+        
+        self.record_result(document['result'], duplicates[pdf_file], flagged_documents)
+    
+    def unique_pdf_files(self) -> Optional[Dict[Path, List[Path]]]:
+        """Map one file per distinct document in the downloads directory to its identical copies"""
+        if not self.downloads_dir.exists():
+            print(f"Downloads directory {self.downloads_dir} not found")
+            return None
+        
+        # Get all PDF files, grouped so identical documents are analyzed once
+        pdf_files = list(self.downloads_dir.glob("*.pdf"))
+        groups = self.blob_store.group_by_content(pdf_files).values()
+        duplicates = {pdf_file: rest for pdf_file, *rest in groups}
+        
+        print(f"Found {len(pdf_files)} PDF files ({len(duplicates)} unique) to analyze")
+        return duplicates
+    
+    def run_analysis(self):
+        """Main function to run AI detection on all PDR files
+        
+        Extraction, preparation and analysis run as pipeline stages joined by
+        bounded queues (see pipeline.py), so the next documents are extracted
+        while Claude is analyzing the current one. With a pre-screen threshold
+        every document is prepared first, since the stylometric scores are
+        relative to the whole corpus, and only the escalated ones are analyzed.
+        """
+        duplicates = self.unique_pdf_files()
+        if duplicates is None:
+            return
+        
+        # Text comes from parallel worker processes, or from the text cache
+        extractions = extract_texts(list(duplicates), self.extract_workers, self.extract_timeout, cache=self.text_cache)
+        
+        flagged_documents = []
+        processed = 0
+        
+        def report(document):
+            nonlocal processed
+            processed += 1
+            self.report_document(processed, len(duplicates), document, duplicates, flagged_documents)
+        
+        self.cost_budget = self.new_cost_budget()
+        source, stages = extractions, [self.prepare_document]
+        prescreened = None
+        if self.prescreen_threshold is not None:
+            prescreened = self.prescreen(list(run_pipeline(extractions, stages, self.queue_depth)))
+            source, stages = prescreened, []
+        
+        if self.analysis_concurrency > 1:
+            print(f"Analyzing up to {self.analysis_concurrency} documents at once, within {self.requests_per_minute:g} "
+                  f"requests and {self.input_tokens_per_minute:,.0f} input tokens per minute")
+            documents = run_pipeline(source, stages, self.queue_depth)
+            asyncio.run(self.analyze_documents_async(documents, report))
+        else:
+            for document in run_pipeline(source, stages + [self.analyze_prepared], self.queue_depth):
+                report(document)
+                if self.cost_budget.stopped:
+                    break
+        
+        print(self.text_cache.summary())
+        print(self.result_cache.summary())
+        print(self.usage_summary())
+        print(self.parse_summary())
+        if prescreened is not None:
+            print(self.prescreen_summary(prescreened))
+        if self.cost_budget.limited:
+            print(self.cost_budget.summary())
+        
+        # Generate HTML report
+        self.write_report(flagged_documents)
+    
+    def plan_analysis(self) -> Optional[Dict]:
+        """Dry run: project the tokens, dollars and time a run_analysis would take, without calling the API
+        
+        Documents are extracted (or loaded from the text cache), prepared and
+        pre-screened as in a real run, then split into the requests that would
+        be sent; requests already in the result cache cost nothing. The
+        projection is printed and returned, with what the configured budget
+        would do to the run.
+        """
+        duplicates = self.unique_pdf_files()
+        if duplicates is None:
+            return None
+        
+        started = time.monotonic()
+        extractions = extract_texts(list(duplicates), self.extract_workers, self.extract_timeout, cache=self.text_cache)
+        documents = list(run_pipeline(extractions, [self.prepare_document], self.queue_depth))
+        if self.prescreen_threshold is not None:
+            self.prescreen(documents)
+        preparation = time.monotonic() - started
+        
+        requests, cached = [], 0
+        for document in documents:
+            if not self.should_analyze(document):
+                continue
+            chunks = chunk_text(document['text'], self.chunk_tokens)
+            for i, chunk in enumerate(chunks):
+                label = chunk_label(document['path'].name, i, len(chunks))
+                if self.result_cache.get(chunk):
+                    cached += 1
+                else:
+                    requests.append(self.estimate_request_tokens(self.build_request(chunk, label)))
+        
+        plan = project(MODEL, requests, self.analysis_concurrency, self.requests_per_minute,
+                       self.input_tokens_per_minute, MAX_TOKENS, HEADROOM)
+        plan['documents'] = sum(self.should_analyze(document) for document in documents)
+        plan['cached'] = cached
+        print(f"Plan: {plan['documents']} documents to analyze, {plan['calls']} requests "
+              f"({cached} more already in the result cache)")
+        print(f"  Input: {plan['input_tokens']:,} tokens (largest request {plan['largest_request']:,}); "
+              f"output ~{plan['expected_output_tokens']:,} tokens")
+        print(f"  Cost: ~${plan['expected_dollars']:.2f} interactive (at most ${plan['worst_case_dollars']:.2f}), "
+              f"~${plan['expected_batch_dollars']:.2f} with --batch")
+        print(f"  Time: ~{plan['minutes']:.0f} min at {self.analysis_concurrency} concurrent requests, "
+              f"after {preparation:.0f} s of extraction and preparation")
+        
+        # Run the request estimates through the budget to show what enforcement would do
+        budget = self.new_cost_budget()
+        if budget.limited:
+            admitted = 0
+            for tokens in requests:
+                if budget.admit(tokens):
+                    admitted += 1
+                if budget.stopped:
+                    break
+            plan['admitted'] = admitted
+            outcome = f"{budget.stats['truncated']} truncated, {budget.stats['skipped']} skipped"
+            if budget.stopped:
+                outcome += f", run stopped after {admitted}"
+            print(f"  Budget ({self.budget_action}): {admitted} of {plan['calls']} requests sent; {outcome}")
+        return plan
+    
+    def submit_batches(self, requests: List[Dict], max_requests: int = BATCH_MAX_REQUESTS) -> List[str]:
+        """Submit batch requests as one or more message batches and return their ids"""
+        batch_ids = []
+        chunk, size = [], 0
+        for request in requests + [None]:
+            request_size = len(json.dumps(request)) if request else 0
+            if chunk and (request is None or len(chunk) >= max_requests or size + request_size > BATCH_MAX_BYTES):
+                batch = self.client.messages.batches.create(requests=chunk)
+                print(f"Submitted batch {batch.id} with {len(chunk)} requests ({size / 1024 / 1024:.1f} MB)")
+                batch_ids.append(batch.id)
+                chunk, size = [], 0
+            if request:
+                chunk.append(request)
+                size += request_size
+        return batch_ids
+    
+    def wait_for_batches(self, batch_ids: List[str], poll_seconds: float = BATCH_POLL_SECONDS):
+        """Poll the batches until every one has ended"""
+        pending = list(batch_ids)
+        while pending:
+            for batch_id in list(pending):
+                batch = self.client.messages.batches.retrieve(batch_id)
+                counts = batch.request_counts
+                print(f"Batch {batch_id}: {batch.processing_status}, {counts.processing} processing, "
+                      f"{counts.succeeded} succeeded, {counts.errored} errored, {counts.expired} expired")
+                if batch.processing_status == "ended":
+                    pending.remove(batch_id)
+            if pending:
+                time.sleep(poll_seconds)
+    
+    def batch_results(self, batch_ids: List[str], filenames: Dict[str, str],
+                      requests: Dict[str, Dict]) -> Dict[str, Tuple[Optional[Dict], Optional[Dict]]]:
+        """Return {custom_id: (result dict or None if the request failed, token usage)} for ended batches
+        
+        requests maps custom_ids to the requests sent; an invalid answer gets
+        its repair retry as an ordinary request, charged to the cost budget at
+        full price. The usage returned is the batch request's own.
+        """
+        results = {}
+        for batch_id in batch_ids:
+            for entry in self.client.messages.batches.results(batch_id):
+                filename = filenames.get(entry.custom_id, entry.custom_id)
+                if entry.result.type == "succeeded":
+                    message = entry.result.message
+                    try:
+                        results[entry.custom_id] = self.complete_response(requests[entry.custom_id], message, filename)
+                    except Exception as e:
+                        print(f"Error analyzing {filename}: {e}")
+                        results[entry.custom_id] = None, usage_counts(message.usage)
+                else:
+                    error = getattr(entry.result, 'error', None)
+                    detail = f": {error.error.message}" if error else ""
+                    print(f"Batch request for {filename} {entry.result.type}{detail}")
+                    results[entry.custom_id] = None, None
+        return results
+    
+    def run_batch_analysis(self, batch_ids: Optional[List[str]] = None, poll_seconds: float = BATCH_POLL_SECONDS,
+                           batch_size: int = BATCH_MAX_REQUESTS, report_path: Path = Path("ai_detection_report.html")):
+        """Run AI detection on all PDR files through the Message Batches API
+        
+        For overnight corpus runs: every document is prepared as in
+        run_analysis, documents not in the result cache are submitted as
+        message batches (billed at the batch discount), the batches are
+        polled until they end, and the results are mapped back to files and
+        reported the same way. Long documents are submitted as chunks and
+        merged as in analyze_document. The prepared documents are returned
+        with their results. Each request's custom_id is the document's
+        SHA-256 (with a chunk number for chunks), so passing the printed
+        batch_ids to a later run collects an interrupted run's results
+        without submitting again.
+        """
+        duplicates = self.unique_pdf_files()
+        if duplicates is None:
+            return
+        
+        # Text comes from parallel worker processes, or from the text cache
+        extractions = extract_texts(list(duplicates), self.extract_workers, self.extract_timeout, cache=self.text_cache)
+        documents = list(run_pipeline(extractions, [self.prepare_document], self.queue_depth))
+        if self.prescreen_threshold is not None:
+            self.prescreen(documents)
+        
+        self.cost_budget = self.new_cost_budget(batch=True)
+        requests, filenames, reservations, params, sent = [], {}, {}, {}, {}
+        for document in documents:
+            if not self.should_analyze(document):
+                continue
+            digest = self.blob_store.digest_for(document['path'])
+            chunks = document['chunks'] = chunk_text(document['text'], self.chunk_tokens)
+            document['chunk_ids'], document['chunk_results'] = [], []
+            for i, chunk in enumerate(chunks):
+                label = chunk_label(document['path'].name, i, len(chunks))
+                # custom_ids are limited to 64 characters: the SHA-256, or most of it and the chunk number
+                custom_id = digest if len(chunks) == 1 else f"{digest[:59]}-{i:04d}"
+                cached = self.cached_result(chunk, label)
+                document['chunk_ids'].append(custom_id)
+                document['chunk_results'].append(cached)
+                filenames[custom_id] = label
+                if not cached and batch_ids is None:
+                    request, reservations[custom_id], sent[custom_id] = self.admit_request(chunk, label)
+                    if request:
+                        requests.append({'custom_id': custom_id, 'params': request})
+                        params[custom_id] = request
+                elif not cached:
+                    params[custom_id] = self.build_request(chunk, label)
+        
+        if batch_ids is None:
+            batch_ids = self.submit_batches(requests, batch_size) if requests else []
+        if batch_ids:
+            print(f"Waiting for batches: {' '.join(batch_ids)}")
+            self.wait_for_batches(batch_ids, poll_seconds)
+        results = self.batch_results(batch_ids, filenames, params)
+        for custom_id, reserved in reservations.items():
+            self.cost_budget.settle(reserved, results.get(custom_id, (None, None))[1])
+        results = {custom_id: result for custom_id, (result, _) in results.items()}
+        
+        flagged_documents = []
+        for i, document in enumerate(documents, 1):
+            if 'chunks' in document:
+                chunk_results = [cached or self.store_result(chunk, results.get(custom_id), sent.get(custom_id))
+                                 for chunk, custom_id, cached
+                                 in zip(document['chunks'], document['chunk_ids'], document['chunk_results'])]
+                document['result'] = (chunk_results[0] if len(chunk_results) == 1
+                                      else merge_results(chunk_results, document['chunks'], document['path'].name))
+            self.report_document(i, len(documents), document, duplicates, flagged_documents)
+        
+        print(self.text_cache.summary())
+        print(self.result_cache.summary())
+        print(self.usage_summary())
+        print(self.parse_summary())
+        if self.prescreen_threshold is not None:
+            print(self.prescreen_summary(documents))
+        if self.cost_budget.limited:
+            print(self.cost_budget.summary())
+        
+        # Generate HTML report
+        self.write_report(flagged_documents, report_path)
+        return documents
 
 def main():
     detector = PDRAIDetector()
     
+    # --plan projects tokens, cost and time without calling the API
+    if "--plan" in sys.argv[1:]:
+        detector.plan_analysis()
+        return
+    
     # Check if API key is set
     if not os.getenv("ANTHROPIC_API_KEY") or os.getenv("ANTHROPIC_API_KEY") == "your_api_key_here":
         print("Please set your ANTHROPIC_API_KEY in the .env file")
         return
     
-    detector.run_analysis()
+    # --batch submits the whole corpus as message batches; --batch <batch id>... collects earlier batches
+    if "--batch" in sys.argv[1:]:
+        batch_ids = sys.argv[sys.argv.index("--batch") + 1:]
+        detector.run_batch_analysis(batch_ids or None)
+    else:
+        detector.run_analysis()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,94 @@
+import json
+import math
+
+# The model is made to answer by calling this tool, so the analysis arrives as JSON matching input_schema
+ANALYSIS_TOOL_NAME = "record_analysis"
+
+ANALYSIS_TOOL = {
+    'name': ANALYSIS_TOOL_NAME,
+    'description': "Record the AI-generation analysis of the document.",
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'percentage_ai_generated': {
+                'type': 'number', 'minimum': 0, 'maximum': 100,
+                'description': "Estimated percentage of the document written by an LLM",
+            },
+            'confidence_percentage': {
+                'type': 'number', 'minimum': 0, 'maximum': 100,
+                'description': "Confidence in that estimate, as a percentage",
+            },
+            'tells': {
+                'type': 'array', 'items': {'type': 'string'},
+                'description': "Specific tells or indicators of AI generation, one per item",
+            },
+        },
+        'required': ['percentage_ai_generated', 'confidence_percentage', 'tells'],
+    },
+}
+
+PERCENTAGE_FIELDS = ('percentage_ai_generated', 'confidence_percentage')
+
+
+def extract_analysis(content):
+    """Return what a response recorded: the tool call's input, else the first JSON object in its text, or None"""
+    for block in content:
+        if block.type == 'tool_use' and block.name == ANALYSIS_TOOL_NAME:
+            return block.input
+    text = "".join(block.text for block in content if block.type == 'text')
+    decoder = json.JSONDecoder()
+    start = text.find('{')
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = text.find('{', start + 1)
+    return None
+
+
+def _percentage(value):
+    """A percentage as a number, accepting numeric strings such as "85%"; anything else is returned as is"""
+    if isinstance(value, str):
+        try:
+            return float(value.strip().rstrip('%'))
+        except ValueError:
+            return value
+    return value
+
+
+def validate_analysis(analysis):
+    """Check an analysis against ANALYSIS_TOOL's schema; return (analysis with only its fields, problems)
+
+    Percentages must be numbers from 0 to 100 and tells a list of strings
+    (blank tells are dropped). The analysis is None when there are problems,
+    which are phrased so they can be sent back to the model.
+    """
+    if not isinstance(analysis, dict):
+        return None, [f"no analysis was recorded with the {ANALYSIS_TOOL_NAME} tool"]
+    problems, clean = [], {}
+    for field in PERCENTAGE_FIELDS:
+        value = _percentage(analysis.get(field))
+        if value is None:
+            problems.append(f"{field} is missing")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+            problems.append(f"{field} must be a number, got {value!r}")
+        elif not 0 <= value <= 100:
+            problems.append(f"{field} must be between 0 and 100, got {value:g}")
+        else:
+            clean[field] = int(value) if float(value).is_integer() else value
+    tells = analysis.get('tells')
+    if not isinstance(tells, list):
+        problems.append(f"tells must be a list of strings, got {tells!r}")
+    elif not all(isinstance(tell, str) for tell in tells):
+        problems.append("every item of tells must be a string")
+    else:
+        clean['tells'] = [tell.strip() for tell in tells if tell.strip()]
+    return (None, problems) if problems else (clean, [])
+
+
+def repair_prompt(problems):
+    return (f"That analysis could not be used: {'; '.join(problems)}. Call {ANALYSIS_TOOL_NAME} again with a "
+            f"corrected analysis of the same document.")
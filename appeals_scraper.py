@@ -1,39 +1,78 @@
 #!/./.venv/bin/python
 
 import requests
-from bs4 import BeautifulSoup
+import asyncio
+import itertools
 import os
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
-import random
-
-# Create a session with browser-like headers
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.9',
-    'Accept-Encoding': 'gzip, deflate, br',
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1',
-    'Sec-Fetch-Dest': 'document',
-    'Sec-Fetch-Mode': 'navigate',
-    'Sec-Fetch-Site': 'none',
-    'Cache-Control': 'max-age=0'
-})
-
-def download_file(url, filename, folder):
-    """Download a file from URL and save it locally"""
+
+from blob_store import BlobStore
+from docket_boundary import find_last_case
+from docket_parser import parse_docket
+from http_cache import DocketCache
+from pdf_download import stream_download
+from scrape_engine import MAX_IN_FLIGHT, REQUESTS_PER_SECOND, HostRateLimiter, call_with_retries, configure_session, retry_delay, scrape_cases_async
+from scrape_state import DOWNLOADED, FAILED, NO_BRIEFS, NO_DOCUMENT, ScrapeStateStore
+
+# Texas courts search site; point this at replay_server.py to scrape offline
+BASE_URL = os.getenv("TXCOURTS_BASE_URL", "https://search.txcourts.gov")
+
+# Default filing year for case numbers and brief folders
+YEAR = 2024
+
+# All fourteen Texas intermediate courts of appeals
+ALL_COURTS = range(1, 15)
+
+# Cap on total requests/second across all courts scraped at once by scrape_courts
+GLOBAL_REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_GLOBAL_REQUESTS_PER_SECOND", "8.0"))
+
+# One unit of work for scrape_courts: a court, a filing year, and a case number range
+CourtJob = namedtuple('CourtJob', ['court_num', 'year', 'start_case', 'end_case'], defaults=[YEAR, 1, None])
+
+def make_session():
+    """Create a session with browser-like headers"""
+    new_session = requests.Session()
+    new_session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Cache-Control': 'max-age=0'
+    })
+    return new_session
+
+session = make_session()
+
+# Cache docket pages; a case whose mandate has issued is treated as closed
+docket_cache = DocketCache(is_closed=lambda body: b'mandate issued' in body.lower())
+
+# Store each downloaded PDF once by content hash; the filenames are links to the blobs
+blob_store = BlobStore()
+
+def case_id(court_num, case_number, year=YEAR):
+    """Format a Court of Appeals criminal case number, e.g. 01-24-00516-CR"""
+    return f"{court_num:02d}-{year % 100:02d}-{case_number:05d}-CR"
+
+def download_file(url, filename, folder, http_session=None):
+    """Stream a file from URL to disk, resuming interrupted transfers"""
     try:
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        
         # Create folder if it doesn't exist
         os.makedirs(folder, exist_ok=True)
         
         filepath = os.path.join(folder, filename)
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        if os.path.exists(filepath):
+            print(f"Already downloaded: {filename}")
+            return True
+        
+        stream_download(http_session or session, url, filepath, blob_store=blob_store)
         
         print(f"Downloaded: {filename}")
         return True
@@ -41,156 +80,273 @@ def download_file(url, filename, folder):
         print(f"Error downloading {filename}: {e}")
         return False
 
-def find_appellant_brief(soup):
-    """Find Appellant brief in Appellate Briefs table"""
-    # Find the Appellate Briefs section - look for div containing "Appellate Briefs" text
-    briefs_div = soup.find('div', class_=['panel-heading', 'panel-heading-content'], string=lambda text: text and 'Appellate Briefs' in text.strip())
-    if not briefs_div:
-        return None
-    
-    # Find the table with briefs - look for RadGrid table
-    panel = briefs_div.parent
-    table = panel.find('table', class_='rgMasterTable')
-    if not table:
-        return None
-    
-    # Look through table rows
-    rows = table.find('tbody').find_all('tr') if table.find('tbody') else []
-    
-    for row in rows:
-        cells = row.find_all('td')
-        if len(cells) >= 4:
-            # Check columns: Date, Event Type, Description, Document
-            event_type = cells[1].get_text().strip()
-            description = cells[2].get_text().strip()
-            
-            # Look for event type containing "Brief filed" by "Appellant" or "Appellee" (but not State)
-            if "Brief filed" in event_type and (description == "Appellant" or description == "Appellee") and description != "State":
-                # Check the document cell (4th column)
-                doc_cell = cells[3]
-                
-                # Look for nested document table
-                doc_table = doc_cell.find('table', class_='docGrid')
-                if doc_table:
-                    doc_rows = doc_table.find_all('tr')
-                    for doc_row in doc_rows:
-                        doc_cells = doc_row.find_all('td')
-                        if len(doc_cells) >= 2:
-                            # Check if this row contains Brief (not Notice)
-                            doc_type = doc_cells[1].get_text().strip()
-                            if 'Brief' in doc_type and 'Notice' not in doc_type:
-                                # Get the link from the first cell
-                                link = doc_cells[0].find('a')
-                                if link and link.get('href'):
-                                    return (link['href'], description)
+def find_appellant_brief(docket):
+    """Find Appellant brief in the parsed Appellate Briefs table"""
+    for brief in docket['briefs']:
+        event_type = brief['event_type']
+        description = brief['description']
+        
+        # Look for event type containing "Brief filed" by "Appellant" or "Appellee" (but not State)
+        if "Brief filed" in event_type and (description == "Appellant" or description == "Appellee"):
+            for document in brief['documents']:
+                # Check if this row contains Brief (not Notice)
+                doc_type = document['doc_type']
+                if 'Brief' in doc_type and 'Notice' not in doc_type:
+                    return (document['href'], description)
     
     return None
 
-def scrape_case_with_backoff(court_num, case_number, max_retries=3):
-    """Scrape a single case with exponential backoff on errors"""
+def case_exists(court_num, case_number, year=YEAR, http_session=None):
+    """Check whether a Court of Appeals docket exists for the case number"""
+    base_url = BASE_URL
+    case_url = f"{base_url}/Case.aspx?cn={case_id(court_num, case_number, year)}"
+    
+    # Goes through the docket cache, so probed pages are not fetched again by the sweep;
+    # throttling and transient errors are retried so one 503 does not abort the probe
+    content = call_with_retries(lambda: docket_cache.fetch(http_session or session, case_url, timeout=30))
+    return parse_docket(content)['case_events_section']
+
+def find_docket_end(court_num, start_case=1, year=YEAR, http_session=None):
+    """Find the highest existing case for a court and year, or None if it cannot be determined"""
+    try:
+        last_case = find_last_case(lambda n: case_exists(court_num, n, year, http_session), start=start_case)
+    except requests.exceptions.RequestException as e:
+        print(f"Could not probe the end of the docket for Court {court_num:02d} ({e})")
+        return None
+    if last_case < start_case:
+        print(f"No case found at {case_id(court_num, start_case, year)}; sweeping until 50 consecutive empty cases")
+        return None
+    print(f"Last case on the docket: {case_id(court_num, last_case, year)}")
+    return last_case
+
+def scrape_case_with_backoff(court_num, case_number, max_retries=3, state=None, year=YEAR, http_session=None):
+    """Scrape a single case, retrying throttling and transient errors, recording the outcome in state
+
+    Waits between attempts honour Retry-After and otherwise back off
+    exponentially with jitter (see scrape_engine.retry_delay); client errors
+    such as 404 are not retried.
+    """
+    cid = case_id(court_num, case_number, year)
+    court = f"CA{court_num:02d}"
     for attempt in range(max_retries):
         try:
-            return scrape_case(court_num, case_number)
+            status = scrape_case(court_num, case_number, year, http_session)
+            if status == FAILED:
+                if state:
+                    state.record(cid, court, FAILED, "download failed")
+                return False
+            if state:
+                state.record(cid, court, status)
+            return status
         except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                backoff_time = (2 ** attempt) + random.uniform(0, 1)
-                print(f"Request failed for case {court_num:02d}-24-{case_number:05d}-CR (attempt {attempt + 1}), backing off for {backoff_time:.1f} seconds: {e}")
+            backoff_time = retry_delay(e, attempt)
+            if backoff_time is not None and attempt < max_retries - 1:
+                print(f"Request failed for case {cid} (attempt {attempt + 1}), backing off for {backoff_time:.1f} seconds: {e}")
                 time.sleep(backoff_time)
             else:
-                print(f"Max retries exceeded for case {court_num:02d}-24-{case_number:05d}-CR: {e}")
+                print(f"Max retries exceeded for case {cid}: {e}")
+                if state:
+                    state.record(cid, court, FAILED, f"max retries exceeded: {e}")
                 return False
         except Exception as e:
-            print(f"Unexpected error for case {court_num:02d}-24-{case_number:05d}-CR: {e}")
+            print(f"Unexpected error for case {cid}: {e}")
+            if state:
+                state.record(cid, court, FAILED, f"unexpected error: {e}")
             return False
     
     return False
 
-def scrape_case(court_num, case_number):
-    """Scrape a single case page for appellant brief"""
-    base_url = "https://search.txcourts.gov"
-    case_url = f"{base_url}/Case.aspx?cn={court_num:02d}-24-{case_number:05d}-CR"
+def scrape_case(court_num, case_number, year=YEAR, http_session=None):
+    """Scrape a single case page for appellant brief
+
+    Returns NO_BRIEFS if the docket has no Appellate Briefs section,
+    NO_DOCUMENT if it has no appellant/appellee brief, DOWNLOADED once the
+    brief is saved, and FAILED if the download did not complete.
+    """
+    http_session = http_session or session
+    cid = case_id(court_num, case_number, year)
+    base_url = BASE_URL
+    case_url = f"{base_url}/Case.aspx?cn={cid}"
     
-    response = session.get(case_url, timeout=30)
-    response.raise_for_status()
+    content = docket_cache.fetch(http_session, case_url, timeout=30)
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Parse the page once; the lookups below read the structured record
+    docket = parse_docket(content)
     
     # Check if Appellate Briefs section exists
-    briefs_div = soup.find('div', class_=['panel-heading', 'panel-heading-content'], string=lambda text: text and 'Appellate Briefs' in text.strip())
-    if not briefs_div:
-        print(f"No Appellate Briefs section for case {court_num:02d}-24-{case_number:05d}-CR")
-        return "no_briefs"
+    if not docket['briefs_section']:
+        print(f"No Appellate Briefs section for case {cid}")
+        return NO_BRIEFS
     
     # Look for Appellant or Appellee brief
-    brief_info = find_appellant_brief(soup)
+    brief_info = find_appellant_brief(docket)
     if brief_info:
         brief_link, description = brief_info
         pdf_url = urljoin(base_url, brief_link)
-        filename = f"{court_num:02d}-24-{case_number:05d}-CR {description} Brief.pdf"
-        folder = f"CA{court_num:02d}_2024_Briefs"
-        download_file(pdf_url, filename, folder)
-        print(f"Found {description} brief for case {court_num:02d}-24-{case_number:05d}-CR")
-        return True
+        filename = f"{cid} {description} Brief.pdf"
+        folder = f"CA{court_num:02d}_{year}_Briefs"
+        print(f"Found {description} brief for case {cid}")
+        return DOWNLOADED if download_file(pdf_url, filename, folder, http_session) else FAILED
     else:
-        print(f"No appellant/appellee brief found for case {court_num:02d}-24-{case_number:05d}-CR")
-        return True
+        print(f"No appellant/appellee brief found for case {cid}")
+        return NO_DOCUMENT
 
-def scrape_court(court_num, start_case=1, end_case=None):
-    """Scrape all cases for a specific court"""
-    print(f"Starting scraper for Court of Appeals {court_num:02d}...")
+def scrape_court(court_num, start_case=1, end_case=None, max_in_flight=MAX_IN_FLIGHT, requests_per_second=REQUESTS_PER_SECOND, state=None,
+                 year=YEAR, http_session=None, global_limiter=None):
+    """Scrape all cases for a specific court and return a progress summary
+
+    Cases whose outcome is already recorded in the state store are not fetched
+    again; their stored outcome still counts towards the consecutive no_briefs
+    stop rule. Failed cases and stale no_briefs/no_document cases are fetched.
+    If end_case is not given, the end of the docket is found with a galloping
+    search over case numbers; the 50-consecutive no_briefs rule remains as a
+    fallback. The summary is a dict of counts per outcome plus the last case reached.
+    """
+    if state is None:
+        # Open a store for this sweep only, and close it however the sweep ends
+        state = ScrapeStateStore()
+        try:
+            return scrape_court(court_num, start_case, end_case, max_in_flight, requests_per_second, state, year,
+                                http_session, global_limiter)
+        finally:
+            state.close()
+    
+    http_session = http_session or session
+    label = f"Court {court_num:02d} ({year})"
+    print(f"Starting scraper for Court of Appeals {court_num:02d}, {year} cases...")
+    
+    # The adaptive rate controller paces every request, so there are no fixed sleeps between cases
+    print(f"Pacing requests adaptively up to {max_in_flight} in flight and {requests_per_second} requests/second for {label}")
+    controller = configure_session(http_session, max_in_flight, requests_per_second, global_limiter)
+    
+    if end_case is None:
+        end_case = find_docket_end(court_num, start_case, year, http_session)
+    
     if end_case:
-        print(f"Processing cases {court_num:02d}-24-{start_case:05d}-CR through {court_num:02d}-24-{end_case:05d}-CR")
+        print(f"Processing cases {case_id(court_num, start_case, year)} through {case_id(court_num, end_case, year)}")
     else:
-        print(f"Processing cases starting from {court_num:02d}-24-{start_case:05d}-CR (no end limit)")
+        print(f"Processing cases starting from {case_id(court_num, start_case, year)} (no end limit)")
     
     failed_cases = []
     consecutive_no_briefs = 0
-    case_num = start_case
+    progress = {'court': court_num, 'year': year, 'processed': 0, 'last_case': None,
+                DOWNLOADED: 0, NO_BRIEFS: 0, NO_DOCUMENT: 0, FAILED: 0}
     
-    while True:
-        if end_case and case_num > end_case:
-            break
-        result = scrape_case_with_backoff(court_num, case_num)
+    def cached_status(case_num):
+        return state.cached_status(case_id(court_num, case_num, year))
+    
+    def scrape_fn(case_num):
+        return cached_status(case_num) or scrape_case_with_backoff(court_num, case_num, state=state, year=year, http_session=http_session)
+    
+    def record_result(case_num, result):
+        """Update failure accounting; return True once the sweep should stop"""
+        nonlocal consecutive_no_briefs
+        progress['processed'] += 1
+        progress['last_case'] = case_num
+        progress[result or FAILED] += 1
+        stop = False
         if result == False:
             failed_cases.append(case_num)
-        elif result == "no_briefs":
+        elif result == NO_BRIEFS:
             consecutive_no_briefs += 1
             if consecutive_no_briefs >= 50:
-                print(f"Stopping: 50 consecutive cases without Appellate Briefs section (last case: {court_num:02d}-24-{case_num:05d}-CR)")
-                break
+                print(f"Stopping: 50 consecutive cases without Appellate Briefs section (last case: {case_id(court_num, case_num, year)})")
+                stop = True
         else:
             consecutive_no_briefs = 0
         
-        # Add a small delay to be respectful to the server
-        base_delay = 1.0
-        jitter = random.uniform(0, 0.5)
-        time.sleep(base_delay + jitter)
-        
         # Progress indicator
         if case_num % 100 == 0:
             if end_case:
-                print(f"Progress: {case_num}/{end_case} cases processed for Court {court_num:02d}")
+                print(f"Progress: {case_num}/{end_case} cases processed for {label} ({controller.describe()})")
             else:
-                print(f"Progress: {case_num} cases processed for Court {court_num:02d}")
+                print(f"Progress: {case_num} cases processed for {label} ({controller.describe()})")
         
-        case_num += 1
+        return stop
     
-    print(f"Scraping completed for Court {court_num:02d}!")
+    if max_in_flight > 1:
+        case_numbers = range(start_case, end_case + 1) if end_case else itertools.count(start_case)
+        asyncio.run(scrape_cases_async(scrape_fn, case_numbers, max_in_flight, record_result))
+    else:
+        case_num = start_case
+        
+        while True:
+            if end_case and case_num > end_case:
+                break
+            if record_result(case_num, scrape_fn(case_num)):
+                break
+            
+            case_num += 1
     
+    # Re-queue failed cases once before reporting them
     if failed_cases:
-        print(f"\nFailed to process {len(failed_cases)} cases:")
+        retry_cases = failed_cases[:]
+        failed_cases.clear()
+        print(f"\nRetrying {len(retry_cases)} failed cases for {label}...")
+        for case_num in retry_cases:
+            result = scrape_case_with_backoff(court_num, case_num, state=state, year=year, http_session=http_session)
+            if result:
+                progress[FAILED] -= 1
+                progress[result] += 1
+            else:
+                failed_cases.append(case_num)
+    
+    print(f"Scraping completed for {label}!")
+    print(docket_cache.summary())
+    
+    if failed_cases:
+        print(f"\nFailed to process {len(failed_cases)} cases (they will be retried on the next run):")
         for case_num in failed_cases:
-            print(f"  {court_num:02d}-24-{case_num:05d}-CR")
+            row = state.get(case_id(court_num, case_num, year))
+            print(f"  {case_id(court_num, case_num, year)}: {row[1] if row else 'unknown error'}")
+    
+    return progress
+
+def scrape_courts(jobs, max_in_flight=MAX_IN_FLIGHT, requests_per_second=REQUESTS_PER_SECOND,
+                  global_requests_per_second=GLOBAL_REQUESTS_PER_SECOND, max_parallel_courts=None, state=None):
+    """Run several CourtJobs concurrently, one thread per court
+
+    Each job gets its own session with its own adaptive rate controller (up to
+    requests_per_second) and its own progress summary; all jobs also share one
+    fixed cap of global_requests_per_second so adding courts cannot overload the site.
+    Returns the list of per-job progress summaries in job order.
+    """
+    jobs = [CourtJob(*job) for job in jobs]
+    owns_state = state is None
+    if owns_state:
+        state = ScrapeStateStore()
+    global_limiter = HostRateLimiter(global_requests_per_second)
+    
+    def run_job(job):
+        return scrape_court(job.court_num, job.start_case, job.end_case, max_in_flight, requests_per_second, state,
+                            year=job.year, http_session=make_session(), global_limiter=global_limiter)
+    
+    print(f"Scheduling {len(jobs)} court jobs, at most {global_requests_per_second} requests/second overall")
+    with ThreadPoolExecutor(max_workers=max_parallel_courts or len(jobs)) as executor:
+        summaries = list(executor.map(run_job, jobs))
+    
+    print(f"\n{'='*60}")
+    print("COURT SUMMARY")
+    print(f"{'='*60}")
+    for summary in summaries:
+        print(f"  CA{summary['court']:02d} {summary['year']}: {summary['processed']} cases, "
+              f"{summary[DOWNLOADED]} downloaded, {summary[NO_DOCUMENT]} without brief, "
+              f"{summary[NO_BRIEFS]} without briefs section, {summary[FAILED]} failed (last case {summary['last_case']})")
+    
+    if owns_state:
+        state.close()
+    return summaries
 
 def main():
     """Main function to scrape both courts"""
     print("Starting Courts of Appeals document scraper...")
     
-    # Scrape First Court of Appeals starting from case 516
-    scrape_court(1, 516)
-    
-    # Scrape Fourteenth Court of Appeals starting from case 12
-    scrape_court(14, 12)
+    # Finished cases are skipped using the state store, so each court starts from case 1.
+    # Pass CourtJob(court, year) for every court in ALL_COURTS to sweep the whole state.
+    scrape_courts([
+        CourtJob(1, YEAR),   # First Court of Appeals
+        CourtJob(14, YEAR),  # Fourteenth Court of Appeals
+    ])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,264 @@
+#!/./.venv/bin/python
+
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# custom_id rule enforced by the Message Batches API
+_CUSTOM_ID = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
+_BATCH_PATH = re.compile(r'^/v1/messages/batches/(msgbatch_\w+)(/results)?$')
+
+# Tells the synthetic analyses pick from
+SAMPLE_TELLS = [
+    "Uniformly formal register across sections",
+    "Repeated transitional phrases",
+    "Generic summaries of holdings without pin cites",
+    "Balanced three-part sentence structures",
+    "Restates the issue before each paragraph",
+]
+
+
+def _timestamp(moment):
+    return moment.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def synthetic_analysis(params):
+    """A deterministic analysis for one request, derived from a hash of its messages"""
+    digest = int(hashlib.sha256(json.dumps(params.get('messages'), sort_keys=True).encode('utf-8')).hexdigest(), 16)
+    return {
+        'percentage_ai_generated': digest % 40,
+        'confidence_percentage': 30 + digest // 40 % 70,
+        'tells': [SAMPLE_TELLS[(digest >> shift) % len(SAMPLE_TELLS)] for shift in (8, 16)],
+    }
+
+
+class BatchServer:
+    """Local stand-in for the Anthropic Message Batches endpoint
+
+    Point a client at it with ``anthropic.Anthropic(base_url=server.url)``.
+    POST /v1/messages/batches accepts a batch (validating custom_ids), GET
+    /v1/messages/batches/<id> reports it in progress until `processing_seconds`
+    after creation, and the results URL then streams one JSONL line per
+    request: a message holding a synthetic analysis, or, for `error_rate` of
+    requests, an errored result. POST /v1/messages answers one request at
+    once. The analysis is a call to the request's tool if it has one and JSON
+    text otherwise; for `invalid_rate` of requests it fails validation
+    (confidence above 100), except for a repair retry (a request ending in a
+    tool_result). Usage reports a system prompt marked for caching as
+    written the first time it is seen and read after that, if it is at least
+    `min_cacheable_tokens` long (the API's minimum for Claude 3.5 Sonnet);
+    shorter prefixes are not cached.
+    """
+
+    def __init__(self, processing_seconds=1.0, error_rate=0.0, invalid_rate=0.0, min_cacheable_tokens=1024, seed=0):
+        self.processing_seconds = processing_seconds
+        self.error_rate = error_rate
+        self.invalid_rate = invalid_rate
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self.batches = {}
+        self._prefixes = set()
+        self.stats = {'batches': 0, 'requests': 0, 'polls': 0, 'errored': 0, 'invalid': 0, 'messages': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def create(self, requests):
+        with self._lock:
+            batch_id = f"msgbatch_{len(self.batches) + 1:06d}"
+            results = []
+            for request in requests:
+                if self._random.random() < self.error_rate:
+                    self.stats['errored'] += 1
+                    result = {'type': 'errored', 'error': {'type': 'error', 'error': {
+                        'type': 'api_error', 'message': 'Internal server error'}}}
+                else:
+                    result = {'type': 'succeeded', 'message': self._message(request)}
+                results.append({'custom_id': request['custom_id'], 'result': result})
+            # The API does not promise results in request order
+            self._random.shuffle(results)
+            self.batches[batch_id] = {'created': datetime.now(timezone.utc), 'results': results}
+            self.stats['batches'] += 1
+            self.stats['requests'] += len(requests)
+        return self.describe(batch_id)
+
+    def _usage(self, params):
+        """Token usage for a request; a system prompt marked for caching is written once and read afterwards"""
+        system = params.get('system') or []
+        prefix_tokens = len(json.dumps(system)) // 4
+        cached = prefix_tokens >= self.min_cacheable_tokens and any(
+            isinstance(block, dict) and block.get('cache_control') for block in system)
+        prefix_tokens = prefix_tokens if cached else 0
+        prefix = json.dumps(system, sort_keys=True)
+        written = cached and prefix not in self._prefixes
+        if cached:
+            self._prefixes.add(prefix)
+        uncached = len(json.dumps(params.get('messages'))) // 4 + (0 if cached else len(json.dumps(system)) // 4)
+        return {
+            'input_tokens': uncached,
+            'cache_creation_input_tokens': prefix_tokens if written else 0,
+            'cache_read_input_tokens': 0 if written else prefix_tokens,
+            'output_tokens': 60,
+        }
+
+    def _message(self, request):
+        """The assistant message answering a request; call with the lock held"""
+        params = request['params']
+        analysis = synthetic_analysis(params)
+        last = (params.get('messages') or [{}])[-1].get('content')
+        repair = isinstance(last, list) and any(block.get('type') == 'tool_result' for block in last)
+        if not repair and self._random.random() < self.invalid_rate:
+            self.stats['invalid'] += 1
+            analysis['confidence_percentage'] += 100
+        if params.get('tools'):
+            content = [{'type': 'tool_use', 'id': 'toolu_' + request['custom_id'][:24],
+                        'name': params['tools'][0]['name'], 'input': analysis}]
+            stop_reason = 'tool_use'
+        else:
+            content = [{'type': 'text', 'text': json.dumps(analysis, indent=2)}]
+            stop_reason = 'end_turn'
+        return {
+            'id': 'msg_' + request['custom_id'][:24],
+            'type': 'message',
+            'role': 'assistant',
+            'model': params.get('model', ''),
+            'content': content,
+            'stop_reason': stop_reason,
+            'stop_sequence': None,
+            'usage': self._usage(params),
+        }
+
+    def answer(self, params):
+        """Answer a single Messages API request at once"""
+        with self._lock:
+            self.stats['messages'] += 1
+            custom_id = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+            return self._message({'custom_id': custom_id, 'params': params})
+
+    def describe(self, batch_id):
+        """The MessageBatch object for a batch, as the API would return it now"""
+        batch = self.batches[batch_id]
+        created = batch['created']
+        ended = datetime.now(timezone.utc) >= created + timedelta(seconds=self.processing_seconds)
+        counts = {'processing': 0, 'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+        if ended:
+            for line in batch['results']:
+                counts[line['result']['type']] += 1
+        else:
+            counts['processing'] = len(batch['results'])
+        return {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': counts,
+            'created_at': _timestamp(created),
+            'expires_at': _timestamp(created + timedelta(hours=24)),
+            'ended_at': _timestamp(created + timedelta(seconds=self.processing_seconds)) if ended else None,
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=b'', content_type='application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status, payload):
+                self._send(status, json.dumps(payload).encode('utf-8'))
+
+            def _send_error(self, status, error_type, message):
+                self._send_json(status, {'type': 'error', 'error': {'type': error_type, 'message': message}})
+
+            def do_POST(self):
+                path = self.path.split('?')[0]
+                if path not in ('/v1/messages', '/v1/messages/batches'):
+                    self._send_error(404, 'not_found_error', 'Not found')
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if path == '/v1/messages':
+                    self._send_json(200, server.answer(body))
+                    return
+                requests = body.get('requests') or []
+                custom_ids = [request.get('custom_id', '') for request in requests]
+                if not requests:
+                    self._send_error(400, 'invalid_request_error', 'requests: at least one request is required')
+                elif not all(_CUSTOM_ID.match(custom_id) for custom_id in custom_ids):
+                    self._send_error(400, 'invalid_request_error', 'custom_id must match ^[a-zA-Z0-9_-]{1,64}$')
+                elif len(set(custom_ids)) != len(custom_ids):
+                    self._send_error(400, 'invalid_request_error', 'custom_id values must be unique within a batch')
+                else:
+                    self._send_json(200, server.create(requests))
+
+            def do_GET(self):
+                match = _BATCH_PATH.match(self.path.split('?')[0])
+                if not match or match.group(1) not in server.batches:
+                    self._send_error(404, 'not_found_error', 'Not found')
+                    return
+                batch_id, results = match.groups()
+                batch = server.describe(batch_id)
+                if not results:
+                    with server._lock:
+                        server.stats['polls'] += 1
+                    self._send_json(200, batch)
+                elif batch['processing_status'] != 'ended':
+                    self._send_error(404, 'not_found_error', 'Batch has not finished processing')
+                else:
+                    lines = [json.dumps(line) for line in server.batches[batch_id]['results']]
+                    self._send(200, ("\n".join(lines) + "\n").encode('utf-8'), 'application/binary')
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Serve the stand-in batch endpoint until interrupted; the optional argument is the processing time in seconds"""
+    processing_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    server = BatchServer(processing_seconds=processing_seconds).start()
+    print(f"Stand-in Message Batches endpoint at {server.url} ({processing_seconds:g} s per batch)")
+    print(f"Run a batch analysis against it with ANTHROPIC_BASE_URL={server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
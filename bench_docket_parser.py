@@ -0,0 +1,128 @@
+#!/./.venv/bin/python
+
+import glob
+import gzip
+import os
+import sys
+import time
+import zlib
+
+from bs4 import BeautifulSoup
+
+import CCA_scraper
+import appeals_scraper
+from docket_parser import parse_docket
+from http_cache import CACHE_DIR
+# The original BeautifulSoup lookups, one full-tree scan per call
+from test_scraper import get_pdr_disposition, find_petition_document, find_appellant_brief
+
+
+def sample_docket_page(case_id="PD-0451-24", events=40, briefs=4, coa=False):
+    """Build a synthetic Case.aspx page with the same panel/table layout as the live site
+
+    coa=True uses the Court of Appeals wording for brief events ("Brief filed").
+    """
+    def media_id(name):
+        return zlib.crc32(f"{case_id}/{name}".encode('utf-8')) % 10**8
+
+    def doc_grid(*docs):
+        rows = "".join(
+            f'<tr><td><a href="SearchMedia.aspx?MediaVersionID={media_id(name)}&coa=coscca&DT={name}">'
+            f'<img src="/images/pdf.png"/> [PDF/245 KB]</a></td><td>{doc_type}</td></tr>'
+            for name, doc_type in docs
+        )
+        return f'<table class="docGrid"><tbody>{rows}</tbody></table>'
+
+    event_rows = []
+    for i in range(events):
+        if i == 0:
+            event_rows.append(f'<tr><td>02/01/2024</td><td>PDR FILED</td><td></td><td>{doc_grid(("PDR", "PETITION"))}</td></tr>')
+        elif i == events - 1:
+            event_rows.append(f'<tr><td>09/11/2024</td><td>PDR DISP</td><td>Refused</td><td>{doc_grid(("NOTICE", "Notice"))}</td></tr>')
+        else:
+            event_rows.append(f'<tr><td>03/{i % 28 + 1:02d}/2024</td><td>MOTION FILED</td><td>Extension of time</td><td>{doc_grid(("MOTION", "Motion"))}</td></tr>')
+
+    brief_rows = []
+    for i in range(briefs):
+        party = "Appellant" if i % 2 == 0 else "State"
+        brief_rows.append(
+            f'<tr><td>0{i + 4}/01/2024</td><td>{"Brief filed" if coa else "BRIEF FILED"}</td><td>{party}</td>'
+            f'<td>{doc_grid(("NOTICE", "Notice"), ("BRIEF", "Brief"))}</td></tr>'
+        )
+
+    def panel(title, rows):
+        return (
+            f'<div class="panel panel-default"><div class="panel-heading">{title}</div>'
+            f'<div class="panel-content"><table class="rgMasterTable"><thead><tr><th>Date</th><th>Event Type</th>'
+            f'<th>Description</th><th>Document</th></tr></thead><tbody>{"".join(rows)}</tbody></table></div></div>'
+        )
+
+    navigation = "".join(f'<li><a href="/Court{i}.aspx">Court {i}</a></li>' for i in range(60))
+    parties = "".join(f'<tr><td>Party {i}</td><td>Attorney {i}</td></tr>' for i in range(10))
+    return (
+        f'<html><head><title>{case_id}</title></head><body><ul class="nav">{navigation}</ul>'
+        f'<div class="panel panel-default"><div class="panel-heading">Parties</div><table>{parties}</table></div>'
+        f'{panel("Case Events", event_rows)}{panel("Appellate Briefs", brief_rows)}</body></html>'
+    ).encode('utf-8')
+
+
+def load_pages(path=None):
+    """Load saved docket pages from a directory of .html files or the docket cache"""
+    pages = []
+    if path:
+        for filename in sorted(glob.glob(os.path.join(path, '*.html'))):
+            with open(filename, 'rb') as f:
+                pages.append(f.read())
+    else:
+        for filename in sorted(glob.glob(os.path.join(CACHE_DIR, '*', '*.html.gz'))):
+            with gzip.open(filename, 'rb') as f:
+                pages.append(f.read())
+    return pages
+
+
+def old_lookup(page):
+    soup = BeautifulSoup(page, 'html.parser')
+    return (get_pdr_disposition(soup), find_petition_document(soup), find_appellant_brief(soup))
+
+
+def new_lookup(page):
+    docket = parse_docket(page)
+    return (CCA_scraper.get_pdr_disposition(docket),
+            CCA_scraper.find_petition_document(docket),
+            CCA_scraper.find_appellant_brief(docket))
+
+
+def time_per_page(fn, pages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            fn(page)
+    return (time.perf_counter() - start) * 1000 / (rounds * len(pages))
+
+
+def main():
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    if pages:
+        print(f"Benchmarking {len(pages)} saved docket pages")
+    else:
+        print("No saved docket pages found; using synthetic pages")
+        pages = [sample_docket_page(f"PD-{n:04d}-24", events=20 + n % 40) for n in range(1, 51)]
+
+    # Both parsers must agree before their timings mean anything
+    mismatches = [i for i, page in enumerate(pages) if old_lookup(page) != new_lookup(page)]
+    if mismatches:
+        print(f"WARNING: results differ on {len(mismatches)} pages (first: #{mismatches[0]})")
+
+    rounds = 5
+    before = time_per_page(old_lookup, pages, rounds)
+    after = time_per_page(new_lookup, pages, rounds)
+    coa_after = time_per_page(lambda page: appeals_scraper.find_appellant_brief(parse_docket(page)), pages, rounds)
+
+    print(f"BeautifulSoup html.parser, 3 scans: {before:.2f} ms/page")
+    print(f"parse_docket (lxml, single pass):   {after:.2f} ms/page")
+    print(f"parse_docket + CoA brief lookup:    {coa_after:.2f} ms/page")
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
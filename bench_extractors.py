@@ -0,0 +1,87 @@
+#!/./.venv/bin/python
+
+import glob
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from pdf_extract import BACKENDS, MIN_CHARS_PER_PAGE
+
+# Bundled corpus the backends are compared on
+CORPUS_DIRS = ['CA01_2024_Briefs', 'CA14_2024_Briefs']
+
+# Documents per run; pass a number as the first argument to change it, 0 for all
+DEFAULT_LIMIT = 40
+
+_WORD = re.compile(r"[A-Za-z][a-z]+")
+
+
+def corpus(limit):
+    paths = sorted(p for folder in CORPUS_DIRS for p in glob.glob(os.path.join(folder, '*.pdf')))
+    return paths[:limit] if limit else paths
+
+
+def run_backend(backend, path):
+    """Return (pages, seconds, text) for one document, or raise"""
+    start = time.perf_counter()
+    pages = [text for _, text in backend.iter_pages(path)]
+    return len(pages), time.perf_counter() - start, "\n".join(pages)
+
+
+def word_ratio(text):
+    """Share of whitespace-separated tokens that look like ordinary words; garbled extraction scores low"""
+    tokens = text.split()
+    return sum(1 for token in tokens if _WORD.fullmatch(token.strip('.,;:()"\''))) / len(tokens) if tokens else 0.0
+
+
+def agreement(text, reference):
+    """Overlap of the word multisets of two extractions (1.0 = same words)"""
+    a, b = Counter(_WORD.findall(text)), Counter(_WORD.findall(reference))
+    total = sum((a | b).values())
+    return sum((a & b).values()) / total if total else 1.0
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LIMIT
+    paths = corpus(limit)
+    reference = BACKENDS[-1]
+    print(f"Comparing {', '.join(f'{b.name} {b.version}' for b in BACKENDS)} on {len(paths)} briefs")
+    print(f"Agreement is measured against {reference.name}, the fallback backend")
+    print()
+
+    reference_texts = {}
+    results = {}
+    for backend in reversed(BACKENDS):
+        stats = results[backend.name] = {'pages': 0, 'seconds': 0.0, 'failures': 0, 'thin': 0,
+                                         'chars': 0, 'word_ratio': 0.0, 'agreement': 0.0, 'documents': 0}
+        for path in paths:
+            try:
+                pages, seconds, text = run_backend(backend, path)
+            except Exception as e:
+                stats['failures'] += 1
+                print(f"  {backend.name} failed on {os.path.basename(path)}: {e}")
+                continue
+            if backend is reference:
+                reference_texts[path] = text
+            stats['documents'] += 1
+            stats['pages'] += pages
+            stats['seconds'] += seconds
+            stats['chars'] += len(text)
+            stats['thin'] += len(text) < MIN_CHARS_PER_PAGE * pages
+            stats['word_ratio'] += word_ratio(text)
+            stats['agreement'] += agreement(text, reference_texts[path]) if path in reference_texts else 0.0
+
+    print(f"{'backend':<10} {'pages/sec':>9} {'chars/page':>10} {'words':>6} {'agree':>6} {'thin':>5} {'failed':>6}")
+    for backend in BACKENDS:
+        stats = results[backend.name]
+        documents = stats['documents'] or 1
+        pages = stats['pages'] or 1
+        print(f"{backend.name:<10} {stats['pages'] / (stats['seconds'] or 1):>9.1f} {stats['chars'] / pages:>10.0f} "
+              f"{stats['word_ratio'] / documents:>6.1%} {stats['agreement'] / documents:>6.1%} "
+              f"{stats['thin']:>5} {stats['failures']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/./.venv/bin/python
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+import CCA_scraper
+import appeals_scraper
+import scrape_engine
+from bench_docket_parser import time_per_page
+from blob_store import BlobStore
+from docket_parser import parse_docket
+from http_cache import DocketCache
+from pdf_download import stream_download
+from replay_server import ReplayServer, load_recordings
+
+# Offline benchmark settings: synthetic docket size, injected latency and errors
+CASES = int(os.getenv("REPLAY_CASES", "60"))
+LATENCY = float(os.getenv("REPLAY_LATENCY", "0.05"))
+ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", "0.02"))
+CONCURRENCY_LEVELS = (1, 4, 8)
+REQUESTS_PER_SECOND = 200.0
+DOWNLOADS = 10
+
+
+@contextlib.contextmanager
+def scratch_directory():
+    """Run in a temporary directory so downloads, caches and state stay out of the repo"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def run_quietly(fn, *args, **kwargs):
+    """Call fn with its progress output suppressed and return (result, seconds)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def fresh_storage(module):
+    """Give a scraper module an empty docket cache and blob store in the current directory"""
+    module.docket_cache = DocketCache(is_closed=module.docket_cache.is_closed)
+    module.blob_store = BlobStore()
+
+
+def bench_cca(server, max_in_flight):
+    """Full CCA_scraper.main() sweep, including docket-boundary probing and downloads"""
+    CCA_scraper.BASE_URL = server.url
+    with scratch_directory():
+        fresh_storage(CCA_scraper)
+        _, seconds = run_quietly(CCA_scraper.main, max_in_flight, REQUESTS_PER_SECOND)
+        CCA_scraper.blob_store.close()
+    return seconds
+
+
+def bench_appeals(server, max_in_flight):
+    """scrape_courts() over two courts at once"""
+    appeals_scraper.BASE_URL = server.url
+    with scratch_directory():
+        fresh_storage(appeals_scraper)
+        jobs = [appeals_scraper.CourtJob(1), appeals_scraper.CourtJob(14)]
+        _, seconds = run_quietly(appeals_scraper.scrape_courts, jobs, max_in_flight, REQUESTS_PER_SECOND,
+                                 global_requests_per_second=REQUESTS_PER_SECOND)
+        appeals_scraper.blob_store.close()
+    return seconds
+
+
+def bench_downloads(server):
+    """Stream DOWNLOADS distinct PDFs and return (megabytes, seconds)"""
+    session = requests.Session()
+    total = 0
+    start = time.perf_counter()
+    with scratch_directory():
+        for n in range(DOWNLOADS):
+            total += stream_download(session, f"{server.url}/SearchMedia.aspx?MediaVersionID={n}", f"{n}.pdf")
+    return total / 1e6, time.perf_counter() - start
+
+
+def sweep(name, bench, server, max_in_flight):
+    before = dict(server.stats)
+    seconds = bench(server, max_in_flight)
+    pages = server.stats['pages'] - before['pages']
+    pdfs = server.stats['pdfs'] - before['pdfs']
+    errors = server.stats['errors'] - before['errors']
+    print(f"{name:<16} {max_in_flight:>9} {seconds:>8.1f} {pages:>6} {pages / seconds:>9.1f} {pdfs:>5} {errors:>7}")
+
+
+def main():
+    pages = load_recordings(sys.argv[1]) if len(sys.argv) > 1 else {}
+    # Start from a brisk pace so the runs measure the scrapers rather than the controller's warm-up
+    scrape_engine.INITIAL_REQUESTS_PER_SECOND = REQUESTS_PER_SECOND / 4
+
+    with ReplayServer(pages=pages, synthetic_cases=CASES, latency=LATENCY, error_rate=ERROR_RATE) as server:
+        print(f"Replay server at {server.url}: {len(pages)} recorded pages, {CASES} synthetic cases per court, "
+              f"{LATENCY * 1000:.0f} ms latency, {ERROR_RATE:.0%} injected 503s")
+        print()
+        print(f"{'scraper':<16} {'in flight':>9} {'seconds':>8} {'pages':>6} {'pages/sec':>9} {'pdfs':>5} {'errors':>7}")
+        for max_in_flight in CONCURRENCY_LEVELS:
+            sweep("CCA_scraper", bench_cca, server, max_in_flight)
+        for max_in_flight in CONCURRENCY_LEVELS:
+            sweep("appeals_scraper", bench_appeals, server, max_in_flight)
+
+        sample = list(pages.values())[:50] or [server.page_for(f"PD-{n:04d}-24") for n in range(1, 51)]
+        print()
+        print(f"Parse: {time_per_page(parse_docket, sample, 5):.2f} ms/page over {len(sample)} pages")
+
+        server.error_rate = 0.0
+        megabytes, seconds = bench_downloads(server)
+        print(f"Download: {megabytes / seconds:.1f} MB/s ({megabytes:.1f} MB in {seconds:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/./.venv/bin/python
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+
+BLOB_DIR = os.getenv("PDF_BLOB_DIR", ".blobs")
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Return the hex SHA-256 of a file, reading it in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Content-addressed store for downloaded PDFs
+
+    Each distinct file is kept once under ``<root>/<sha[:2]>/<sha>.pdf``. The
+    human-readable names in ``downloads/`` and ``CA*_Briefs/`` are hard links
+    to the blob (or copies on filesystems without hard links), and a SQLite
+    manifest maps every name to its SHA-256 so later stages can process each
+    unique document once.
+    """
+
+    def __init__(self, root=BLOB_DIR):
+        self.root = root
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, 'manifest.sqlite3'), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256)")
+            self._conn.commit()
+        return self._conn
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest + '.pdf')
+
+    def add(self, source_path, filepath, digest=None):
+        """Move source_path into the store, point filepath at the blob, and return its SHA-256
+
+        If a blob with the same content already exists, source_path is deleted
+        and filepath becomes another name for the existing blob.
+        """
+        digest = digest or file_sha256(source_path)
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if os.path.exists(blob):
+            os.remove(source_path)
+        else:
+            os.replace(source_path, blob)
+
+        # Link under a temporary name first so filepath is replaced atomically
+        temp_path = filepath + '.link'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(blob, temp_path)
+        except OSError:
+            shutil.copyfile(blob, temp_path)
+        os.replace(temp_path, filepath)
+
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO files (path, sha256, size, updated_at) VALUES (?, ?, ?, ?)",
+                (os.path.abspath(filepath), digest, os.path.getsize(blob), time.time()),
+            )
+            db.commit()
+        return digest
+
+    def import_file(self, path):
+        """Move an existing download into the store, leaving a link under its name"""
+        return self.add(path, path)
+
+    def digest_for(self, path):
+        """Return the SHA-256 of path, from the manifest when its size still matches"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT sha256, size FROM files WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone()
+        if row and row[1] == os.path.getsize(path):
+            return row[0]
+        return file_sha256(path)
+
+    def group_by_content(self, paths):
+        """Return {sha256: [paths]} with paths in their original order, one key per unique document"""
+        groups = {}
+        for path in paths:
+            groups.setdefault(self.digest_for(path), []).append(path)
+        return groups
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main():
+    """Move existing PDFs in the given folders into the blob store"""
+    folders = sys.argv[1:] or ['downloads']
+    store = BlobStore()
+    total = unique = 0
+    seen = set()
+    for folder in folders:
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if not name.lower().endswith('.pdf') or not os.path.isfile(path):
+                continue
+            digest = store.import_file(path)
+            total += 1
+            if digest not in seen:
+                seen.add(digest)
+                unique += 1
+    store.close()
+    print(f"Imported {total} PDFs into {BLOB_DIR}: {unique} unique, {total - unique} duplicates linked")
+
+
+if __name__ == "__main__":
+    main()
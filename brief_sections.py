@@ -0,0 +1,139 @@
+import os
+import re
+from collections import namedtuple
+
+# Sections sent to the model by default; "all" sends the whole document
+BRIEF_SECTIONS = os.getenv("BRIEF_SECTIONS", "facts,argument,prayer")
+
+# Text before the first recognised heading
+COVER = 'cover'
+
+# Headings of Texas appellate briefs and PDRs, as (section name, pattern for the whole heading line)
+SECTION_HEADINGS = [
+    ('parties', r"(identity|list|names?) of (all )?(the )?parties( and counsel)?|parties and counsel"),
+    ('authorities', r"(index|table|list) of (authorities|citations|cases)"),
+    ('contents', r"(table of )?contents"),
+    ('oral_argument', r"((statement|request) (regarding|concerning|on|for) )?oral argument( (requested|waived|not requested))?"),
+    ('case', r"statement of (the )?case|preliminary statement"),
+    ('jurisdiction', r"statement (of|regarding) jurisdiction"),
+    ('procedural_history', r"statement of (the )?procedural history"),
+    ('issues', r"(issues?|points?|questions?) (presented|of error)( for review)?|grounds? for review"),
+    ('facts', r"statement of (the )?facts"),
+    ('summary', r"summary of (the )?arguments?"),
+    ('argument', r"arguments?( and authorit\w*)?|reasons? for granting review"),
+    ('prayer', r"(conclusion and )?prayer( for relief)?"),
+    ('certificates', r"certificate of (service|compliance)"),
+    ('appendix', r"appendix|appendices|index (of|to) (the )?appendix"),
+]
+SECTION_NAMES = [COVER] + [name for name, _ in SECTION_HEADINGS]
+
+# Sections left out when select_sections falls back to sending everything else
+BOILERPLATE_SECTIONS = {'parties', 'authorities', 'contents', 'oral_argument', 'certificates', 'appendix'}
+
+# Share of the non-boilerplate text the chosen sections must keep; a smaller selection usually
+# means the argument heading was missed and the argument was labelled cover or another section
+MIN_SELECTED_SHARE = 0.4
+
+# Extraction often splits words ("STATE MENT OF FACTS"), so headings are matched
+# with all whitespace removed from both the pattern and the line
+_HEADINGS = [(name, re.compile(pattern.replace(" ", "") + ":?", re.IGNORECASE)) for name, pattern in SECTION_HEADINGS]
+
+# Page numbers, roman numerals and outline letters that extraction glues onto the front of a heading
+_HEADING_PREFIX = re.compile(r"^(\d+\.?|[ivxlc]+\.|[a-z]\.)\s*", re.IGNORECASE)
+
+# Table-of-contents entries: dot leaders or a trailing page number
+_TOC_ENTRY = re.compile(r"\.{3,}|…|\s\d+\s*$|\s[ivxlc]+\s*$", re.IGNORECASE)
+
+# Words a title-case heading leaves in lower case
+_SMALL_WORDS = {'of', 'and', 'the', 'for', 'to', 'on', 'in', 'regarding', 'concerning'}
+
+# Some briefs go straight from the summary to "POINT OF ERROR ONE" without an "ARGUMENT" heading
+_ISSUE_HEADING = re.compile(r"(appellant[’']?s)?(first|second|third)?(issues?|points?(oferror)?|grounds?(forreview)?).*",
+                            re.IGNORECASE)
+
+Section = namedtuple('Section', ['name', 'heading', 'text'])
+
+
+def _compact_heading(line):
+    """Return a heading-styled line without numbering or whitespace, or None for any other line"""
+    line = _HEADING_PREFIX.sub("", " ".join(line.split()))
+    if not line or len(line) > 80 or _TOC_ENTRY.search(line):
+        return None
+    # Headings are set in capitals or title case, which keeps ordinary sentences out
+    words = [word for word in line.split() if word[0].isalpha()]
+    if not words or not all(word[0].isupper() or word.lower() in _SMALL_WORDS for word in words):
+        return None
+    return line.replace(" ", "")
+
+
+def heading_section(line):
+    """Return the section a line heads, or None if it is not a section heading"""
+    compact = _compact_heading(line)
+    if compact:
+        for name, pattern in _HEADINGS:
+            if pattern.fullmatch(compact):
+                return name
+    return None
+
+
+def segment_brief(text):
+    """Split a brief into Sections in document order, starting with the cover
+
+    A section runs from its heading to the next recognised heading, so the
+    sub-headings of an argument stay inside it; an issue heading straight
+    after the summary of the argument starts the argument. A section can appear more than
+    once (for example a prayer after each issue).
+    """
+    sections = []
+    name, heading, lines = COVER, "", []
+    for line in text.splitlines():
+        section = heading_section(line)
+        if not section and name == 'summary' and _ISSUE_HEADING.fullmatch(_compact_heading(line) or ""):
+            section = 'argument'
+        if section:
+            if lines or heading:
+                sections.append(Section(name, heading, "\n".join(lines)))
+            name, heading, lines = section, line.strip(), []
+        else:
+            lines.append(line)
+    sections.append(Section(name, heading, "\n".join(lines)))
+    return sections
+
+
+def parse_section_names(sections):
+    """Turn "facts,argument" (or a list, or "all") into a set of section names, or None for everything"""
+    if isinstance(sections, str):
+        sections = [name.strip() for name in sections.split(",") if name.strip()]
+    if not sections or "all" in sections:
+        return None
+    unknown = set(sections) - set(SECTION_NAMES)
+    if unknown:
+        raise ValueError(f"unknown brief sections {sorted(unknown)} (known: {', '.join(SECTION_NAMES)})")
+    return set(sections)
+
+
+def _join(sections):
+    return "\n".join(f"{section.heading}\n{section.text}" if section.heading else section.text for section in sections)
+
+
+def select_sections(text, sections=BRIEF_SECTIONS):
+    """Return (text of the sections to send, names of the sections sent)
+
+    The chosen sections are sent alone only if they keep MIN_SELECTED_SHARE
+    of the text outside the recognised boilerplate. Otherwise, for example
+    when most headings were missed, the whole text is sent minus that
+    boilerplate, or all of it if the boilerplate would take most of it, so
+    nothing substantive goes unanalyzed.
+    """
+    wanted = parse_section_names(sections)
+    if wanted is None:
+        return text, []
+    segments = segment_brief(text)
+    chosen = [section for section in segments if section.name in wanted]
+    substantive = [section for section in segments if section.name not in BOILERPLATE_SECTIONS - wanted]
+    selected, rest = _join(chosen), _join(substantive)
+    if selected.strip() and len(selected) >= MIN_SELECTED_SHARE * len(rest):
+        return selected, list(dict.fromkeys(section.name for section in chosen))
+    if len(substantive) == len(segments) or len(rest) < MIN_SELECTED_SHARE * len(text):
+        return text, []
+    return rest, list(dict.fromkeys(section.name for section in substantive))
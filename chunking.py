@@ -0,0 +1,105 @@
+import math
+import os
+
+from brief_sections import segment_brief
+from text_normalize import CHARS_PER_TOKEN, estimate_tokens
+
+# Documents estimated above this many tokens are analyzed in chunks of at most this size (0 sends them whole)
+CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "0"))
+
+# Chunks of one document analyzed at once by the synchronous client
+CHUNK_WORKERS = int(os.getenv("ANALYSIS_CHUNK_WORKERS", "4"))
+
+
+def _split(text, max_chars, separators=("\n\n", "\n")):
+    """Split text into pieces of at most max_chars, at the coarsest separator that works"""
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    pieces = []
+    for part in text.split(separators[0]):
+        pieces.extend(_split(part, max_chars, separators[1:]))
+    return pieces
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS):
+    """Split a prepared document into chunks of at most max_tokens (estimated), or return [text]
+
+    Chunks break at section headings where possible, then at paragraphs and
+    lines. The chunks are sized evenly, so a document just over the limit
+    becomes two halves rather than a full chunk and a scrap, and short
+    leftovers are folded into a neighbouring chunk.
+    """
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return [text]
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    target = len(text) / math.ceil(len(text) / max_chars)
+
+    pieces = []
+    for section in segment_brief(text):
+        body = f"{section.heading}\n{section.text}" if section.heading else section.text
+        pieces.extend(piece for piece in _split(body, max_chars) if piece.strip())
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        if current and (size + len(piece) > max_chars or size >= target):
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+
+    # Fold scraps (a short closing prayer, say) into a neighbour when the two still fit
+    i = 0
+    while len(chunks) > 1 and i < len(chunks):
+        neighbours = [j for j in (i - 1, i + 1) if 0 <= j < len(chunks)]
+        j = min(neighbours, key=lambda j: len(chunks[j]))
+        if len(chunks[i]) < target / 4 and len(chunks[i]) + len(chunks[j]) + 1 <= max_chars:
+            first, second = sorted((i, j))
+            chunks[first:second + 1] = [chunks[first] + "\n" + chunks[second]]
+            i = first
+        else:
+            i += 1
+    return chunks
+
+
+def chunk_label(filename, index, count):
+    return f"{filename} (part {index + 1} of {count})" if count > 1 else filename
+
+
+def merge_results(results, chunks, filename):
+    """Combine per-chunk results into one document result, or None if every chunk failed
+
+    The AI percentage is the mean of the chunk percentages weighted by chunk
+    length. Confidence is the length-weighted mean confidence, scaled down by
+    the share of the text whose chunks failed. Tells are kept in order with
+    duplicates (ignoring case and spacing) dropped.
+    """
+    analyzed = [(result, len(chunk)) for result, chunk in zip(results, chunks) if result]
+    if not analyzed:
+        return None
+    weight = sum(length for _, length in analyzed)
+    coverage = weight / sum(len(chunk) for chunk in chunks)
+
+    tells, seen = [], set()
+    for result, _ in analyzed:
+        for tell in result.get('tells', []):
+            key = " ".join(str(tell).split()).casefold()
+            if key not in seen:
+                seen.add(key)
+                tells.append(tell)
+
+    merged = {
+        'percentage_ai_generated': round(sum(r['percentage_ai_generated'] * n for r, n in analyzed) / weight),
+        'confidence_percentage': round(sum(r['confidence_percentage'] * n for r, n in analyzed) / weight * coverage),
+        'tells': tells,
+        'filename': filename,
+        'chunks': len(chunks),
+        'chunks_analyzed': len(analyzed),
+    }
+    usages = [result['usage'] for result, _ in analyzed if result.get('usage')]
+    if usages:
+        merged['usage'] = {name: sum(usage[name] for usage in usages) for name in usages[0]}
+    return merged
@@ -0,0 +1,157 @@
+import os
+import threading
+
+# USD per million tokens, from Anthropic's price list; the Message Batches API bills half of these
+MODEL_PRICES = {
+    "claude-3-5-sonnet-20241022": {'input': 3.00, 'output': 15.00, 'cache_write': 3.75, 'cache_read': 0.30},
+}
+BATCH_DISCOUNT = 0.5
+
+# Hard limits for one run, in dollars and in input tokens; unset means no limit
+ANALYSIS_BUDGET_DOLLARS = os.getenv("ANALYSIS_BUDGET_DOLLARS")
+ANALYSIS_BUDGET_DOLLARS = float(ANALYSIS_BUDGET_DOLLARS) if ANALYSIS_BUDGET_DOLLARS else None
+ANALYSIS_BUDGET_INPUT_TOKENS = os.getenv("ANALYSIS_BUDGET_INPUT_TOKENS")
+ANALYSIS_BUDGET_INPUT_TOKENS = int(ANALYSIS_BUDGET_INPUT_TOKENS) if ANALYSIS_BUDGET_INPUT_TOKENS else None
+
+# What happens to a request that does not fit in what is left: truncate, skip or stop
+BUDGET_ACTIONS = ('truncate', 'skip', 'stop')
+ANALYSIS_BUDGET_ACTION = os.getenv("ANALYSIS_BUDGET_ACTION", "stop")
+
+# A request is not truncated below this many input tokens; it is skipped instead
+MIN_TRUNCATED_TOKENS = 2000
+
+# Typical answer length and seconds per request, for projections only (the budget assumes max_tokens)
+EXPECTED_OUTPUT_TOKENS = 250
+SECONDS_PER_CALL = float(os.getenv("ANALYSIS_SECONDS_PER_CALL", "20"))
+
+
+def usage_counts(usage):
+    """Token counts of a response's usage object as a dict (absent cache counts are 0)"""
+    return {name: getattr(usage, name, None) or 0 for name in
+            ('input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens', 'output_tokens')}
+
+
+def cost(model, input_tokens=0, output_tokens=0, cache_read_input_tokens=0, cache_creation_input_tokens=0,
+         batch=False):
+    """Dollar cost of the given token counts"""
+    prices = MODEL_PRICES[model]
+    dollars = (input_tokens * prices['input'] + output_tokens * prices['output'] +
+               cache_read_input_tokens * prices['cache_read'] + cache_creation_input_tokens * prices['cache_write'])
+    return dollars / 1e6 * (BATCH_DISCOUNT if batch else 1.0)
+
+
+class CostBudget:
+    """Hard dollar and input-token limits for one run, enforced before each request
+
+    admit() reserves the worst case for a request (its estimated input plus
+    max_tokens of output) and settle() replaces the reservation with what the
+    response's usage says was spent, so the limits hold even with requests in
+    flight. When a request does not fit, the action decides: 'truncate'
+    shrinks it to what is left (down to MIN_TRUNCATED_TOKENS), 'skip' drops
+    it and carries on with the rest, and 'stop' ends the run's API calls.
+    Requests are priced as batch requests if batch is set; one sent outside
+    the batch (a repair retry) passes batch=False to admit() and settle().
+    """
+
+    def __init__(self, model, max_tokens, max_dollars=ANALYSIS_BUDGET_DOLLARS,
+                 max_input_tokens=ANALYSIS_BUDGET_INPUT_TOKENS, action=ANALYSIS_BUDGET_ACTION, batch=False):
+        if action not in BUDGET_ACTIONS:
+            raise ValueError(f"unknown budget action {action!r} (known: {', '.join(BUDGET_ACTIONS)})")
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_dollars = max_dollars
+        self.max_input_tokens = max_input_tokens
+        self.action = action
+        self.batch = batch
+        self.spent = {'dollars': 0.0, 'input_tokens': 0}
+        self.reserved = {'dollars': 0.0, 'input_tokens': 0}
+        self.stats = {'truncated': 0, 'skipped': 0}
+        self.stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def limited(self):
+        return self.max_dollars is not None or self.max_input_tokens is not None
+
+    def _fits(self, input_tokens, batch):
+        """Largest number of input tokens, up to input_tokens, that one more request can still use"""
+        fits = input_tokens
+        if self.max_input_tokens is not None:
+            fits = min(fits, self.max_input_tokens - self.spent['input_tokens'] - self.reserved['input_tokens'])
+        if self.max_dollars is not None:
+            left = self.max_dollars - self.spent['dollars'] - self.reserved['dollars']
+            left -= cost(self.model, output_tokens=self.max_tokens, batch=batch)
+            fits = min(fits, int(left / cost(self.model, input_tokens=1, batch=batch)))
+        return max(fits, 0)
+
+    def admit(self, input_tokens, truncate=True, batch=None):
+        """Reserve a request of input_tokens; return the input tokens it may use (0 to drop it)
+
+        A request that cannot be cut short (a repair retry) passes
+        truncate=False and is dropped rather than truncated. batch overrides
+        the budget's pricing for this request.
+        """
+        batch = self.batch if batch is None else batch
+        with self._lock:
+            if self.stopped:
+                return 0
+            allowed = self._fits(input_tokens, batch)
+            if allowed < input_tokens:
+                if self.action == 'truncate' and truncate and allowed >= MIN_TRUNCATED_TOKENS:
+                    self.stats['truncated'] += 1
+                elif self.action == 'stop':
+                    self.stopped = True
+                    return 0
+                else:
+                    self.stats['skipped'] += 1
+                    return 0
+            self.reserved['input_tokens'] += allowed
+            self.reserved['dollars'] += cost(self.model, allowed, self.max_tokens, batch=batch)
+            return allowed
+
+    def settle(self, input_tokens, usage=None, batch=None):
+        """Release a reservation made by admit(input_tokens) and charge the usage actually reported, if any"""
+        batch = self.batch if batch is None else batch
+        with self._lock:
+            self.reserved['input_tokens'] -= input_tokens
+            self.reserved['dollars'] -= cost(self.model, input_tokens, self.max_tokens, batch=batch)
+            if usage:
+                self.spent['input_tokens'] += (usage['input_tokens'] + usage['cache_read_input_tokens'] +
+                                               usage['cache_creation_input_tokens'])
+                self.spent['dollars'] += cost(self.model, batch=batch, **usage)
+
+    def summary(self):
+        limits = []
+        if self.max_dollars is not None:
+            limits.append(f"${self.spent['dollars']:.2f} of ${self.max_dollars:.2f}")
+        if self.max_input_tokens is not None:
+            limits.append(f"{self.spent['input_tokens']:,} of {self.max_input_tokens:,} input tokens")
+        outcome = f"{self.stats['truncated']} requests truncated, {self.stats['skipped']} skipped"
+        if self.stopped:
+            outcome += ", run stopped"
+        return f"Budget: {', '.join(limits) or 'no limit'} spent; {outcome}"
+
+
+def project(model, requests, concurrency, requests_per_minute, input_tokens_per_minute, max_tokens, headroom=0.9):
+    """Project tokens, dollars and analysis time for a list of request input-token estimates
+
+    Dollars are given for the expected answer length and for the worst case
+    (every answer max_tokens long), interactively and through the batch
+    API. Time is the longest of the latency-bound time at this concurrency
+    and the times the request and input-token rate limits allow.
+    """
+    calls = len(requests)
+    input_tokens = sum(requests)
+    minutes = max(calls * SECONDS_PER_CALL / max(concurrency, 1) / 60,
+                  calls / (requests_per_minute * headroom),
+                  input_tokens / (input_tokens_per_minute * headroom))
+    return {
+        'calls': calls,
+        'input_tokens': input_tokens,
+        'largest_request': max(requests, default=0),
+        'expected_output_tokens': calls * EXPECTED_OUTPUT_TOKENS,
+        'expected_dollars': cost(model, input_tokens, calls * EXPECTED_OUTPUT_TOKENS),
+        'worst_case_dollars': cost(model, input_tokens, calls * max_tokens),
+        'expected_batch_dollars': cost(model, input_tokens, calls * EXPECTED_OUTPUT_TOKENS, batch=True),
+        'minutes': minutes,
+    }
@@ -0,0 +1,53 @@
+import time
+
+# Case numbers are not perfectly dense (a number can be skipped or sealed), so
+# a probe point counts as "present" if any case in a small window starting there exists.
+PROBE_WINDOW = 3
+
+
+def find_last_case(exists, start=1, max_case=99999, window=PROBE_WINDOW, delay=0.0):
+    """Find the highest existing case number at or above start
+
+    exists(case_number) returns True if the docket has that case. The search
+    gallops upwards (start+1, start+2, start+4, ...) until a probe point comes
+    back empty, then binary-searches between the last hit and that miss, so a
+    docket of N cases needs O(log N) probes instead of a linear sweep past its
+    end. Each probe point checks up to `window` consecutive numbers to step over
+    small gaps. delay seconds are slept before each request.
+
+    Returns the last existing case number, or start - 1 if nothing exists at start.
+    """
+    results = {}
+
+    def case_present(case_number):
+        if case_number not in results:
+            if delay:
+                time.sleep(delay)
+            results[case_number] = bool(exists(case_number))
+        return results[case_number]
+
+    def probe(case_number):
+        return any(case_present(n) for n in range(case_number, min(case_number + window, max_case + 1)))
+
+    if not probe(start):
+        return start - 1
+
+    # Gallop: double the step until a probe point is past the end of the docket
+    low, step = start, 1
+    high = min(start + step, max_case)
+    while high > low and probe(high):
+        low = high
+        step *= 2
+        high = min(start + step, max_case)
+    if high == low:
+        high = max_case + 1
+
+    # Binary search for the last present probe point in (low, high)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if probe(middle):
+            low = middle
+        else:
+            high = middle
+
+    return max(n for n in range(low, min(low + window, max_case + 1)) if case_present(n))
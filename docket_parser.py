@@ -0,0 +1,102 @@
+import lxml.html
+
+# XPath test for an element whose class attribute contains the given class name
+_HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+_PANEL_HEADINGS = f"//div[{_HAS_CLASS.format('panel-heading')} or {_HAS_CLASS.format('panel-heading-content')}]"
+_MASTER_TABLE = f".//table[{_HAS_CLASS.format('rgMasterTable')}]"
+_DOC_GRID = f".//table[{_HAS_CLASS.format('docGrid')}]"
+
+
+def _cell_text(cell):
+    return cell.text_content().strip()
+
+
+def _documents(cell):
+    """Return [{'href', 'doc_type'}] for each linked document in a cell's docGrid table"""
+    documents = []
+    doc_table = cell.xpath(_DOC_GRID)
+    if not doc_table:
+        return documents
+    for doc_row in doc_table[0].iter('tr'):
+        doc_cells = doc_row.findall('td')
+        if len(doc_cells) < 2:
+            continue
+        links = doc_cells[0].xpath('.//a[@href]')
+        if links:
+            documents.append({'href': links[0].get('href'), 'doc_type': _cell_text(doc_cells[1])})
+    return documents
+
+
+def _table_entries(panel):
+    """Walk a panel's rgMasterTable once and return one entry per row"""
+    tables = panel.xpath(_MASTER_TABLE)
+    if not tables:
+        return []
+    tbody = tables[0].find('tbody')
+    if tbody is None:
+        return []
+
+    entries = []
+    for row in tbody.findall('tr'):
+        cells = row.findall('td')
+        if len(cells) < 3:
+            continue
+        entries.append({
+            'date': _cell_text(cells[0]),
+            'event_type': _cell_text(cells[1]),
+            'description': _cell_text(cells[2]),
+            'documents': _documents(cells[3]) if len(cells) >= 4 else [],
+        })
+    return entries
+
+
+def _disposition(events):
+    """Return 'granted' or 'refused' from the first decided PDR DISP event"""
+    for event in events:
+        if 'PDR DISP' in event['event_type']:
+            if 'Granted' in event['description']:
+                return 'granted'
+            elif 'Refused' in event['description']:
+                return 'refused'
+    return None
+
+
+def parse_docket(content):
+    """Parse a Case.aspx page once and return a structured case record
+
+    The page is parsed with lxml and only the "Case Events" and "Appellate
+    Briefs" panels are walked. The record is a dict with:
+
+    - ``case_events_section`` / ``briefs_section``: whether each panel exists
+    - ``events`` / ``briefs``: one dict per table row with ``date``,
+      ``event_type``, ``description`` and ``documents`` (a list of
+      ``{'href', 'doc_type'}`` from the row's document grid)
+    - ``disposition``: ``'granted'``, ``'refused'`` or ``None``
+    """
+    record = {
+        'case_events_section': False,
+        'briefs_section': False,
+        'events': [],
+        'briefs': [],
+        'disposition': None,
+    }
+    if not content:
+        return record
+
+    tree = lxml.html.fromstring(content)
+    for heading in tree.xpath(_PANEL_HEADINGS):
+        # Only headings whose whole content is a single text node, as with BeautifulSoup's string= match
+        if len(heading) or not heading.text:
+            continue
+        title = heading.text.strip()
+        panel = heading.getparent()
+        if 'Case Events' in title and not record['case_events_section']:
+            record['case_events_section'] = True
+            record['events'] = _table_entries(panel)
+        elif 'Appellate Briefs' in title and not record['briefs_section']:
+            record['briefs_section'] = True
+            record['briefs'] = _table_entries(panel)
+
+    record['disposition'] = _disposition(record['events'])
+    return record
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = os.getenv("DOCKET_CACHE_DIR", ".docket_cache")
+
+# How long a cached docket page is served without asking the server again.
+# Open cases change often; closed cases (e.g. a PDR with a disposition) rarely do.
+OPEN_TTL_HOURS = float(os.getenv("DOCKET_CACHE_OPEN_TTL_HOURS", "24"))
+CLOSED_TTL_HOURS = float(os.getenv("DOCKET_CACHE_CLOSED_TTL_HOURS", str(30 * 24)))
+
+
+class DocketCache:
+    """Compressed on-disk cache for docket pages with conditional-GET revalidation
+
+    Each URL is stored as a gzip-compressed body plus a small JSON metadata file
+    holding the ETag / Last-Modified validators and the fetch time. A page
+    younger than its TTL is served straight from disk; an older one is
+    revalidated with If-None-Match / If-Modified-Since, so an unchanged docket
+    costs a 304 instead of a full download. is_closed(body) decides which TTL
+    applies to a page.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, open_ttl_hours=OPEN_TTL_HOURS, closed_ttl_hours=CLOSED_TTL_HOURS, is_closed=None):
+        self.cache_dir = cache_dir
+        self.open_ttl = open_ttl_hours * 3600
+        self.closed_ttl = closed_ttl_hours * 3600
+        self.is_closed = is_closed or (lambda body: False)
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.json', base + '.html.gz'
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, meta, body=None):
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        if body is not None:
+            with gzip.open(body_path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def fetch(self, session, url, timeout=30):
+        """Return the body of url, from disk when fresh, revalidating or refetching otherwise"""
+        meta, body = self._load(url)
+        if meta is not None:
+            ttl = self.closed_ttl if meta.get('closed') else self.open_ttl
+            if time.time() - meta['fetched_at'] < ttl:
+                self._count('hits')
+                return body
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta is not None:
+            meta['fetched_at'] = time.time()
+            self._store(url, meta)
+            self._count('revalidated')
+            return body
+
+        response.raise_for_status()
+        body = response.content
+        self._store(url, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'closed': bool(self.is_closed(body)),
+        }, body)
+        self._count('misses')
+        return body
+
+    def summary(self):
+        """One-line description of hit/revalidation/miss counts"""
+        return (f"Docket cache: {self.stats['hits']} hits, "
+                f"{self.stats['revalidated']} revalidated (304), {self.stats['misses']} fetched")
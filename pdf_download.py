@@ -0,0 +1,109 @@
+import os
+import re
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+MAX_RESUME_ATTEMPTS = 3
+
+# Network errors after which a partial download is kept and resumed with a Range request
+RESUMABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
+
+class DownloadError(Exception):
+    """Raised when a downloaded file fails its size or integrity check"""
+
+
+def _expected_size(response, offset):
+    """Total file size advertised by the server, or None if unknown"""
+    content_range = response.headers.get('Content-Range')
+    if content_range:
+        match = re.search(r'/(\d+)$', content_range)
+        if match:
+            return int(match.group(1))
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def check_pdf(filepath):
+    """Verify the file looks like a complete PDF (header and end-of-file marker)"""
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        header = f.read(5)
+        f.seek(max(0, size - 2048))
+        tail = f.read()
+    if header != b'%PDF-':
+        raise DownloadError(f"{os.path.basename(filepath)} is not a PDF (starts with {header!r})")
+    if b'%%EOF' not in tail:
+        raise DownloadError(f"{os.path.basename(filepath)} is truncated (no %%EOF marker)")
+
+
+def stream_download(session, url, filepath, chunk_size=CHUNK_SIZE, max_resume_attempts=MAX_RESUME_ATTEMPTS, timeout=30, blob_store=None):
+    """Stream url to filepath in chunks and return the number of bytes written
+
+    Data is written to ``filepath + '.part'`` and only renamed into place once the
+    size matches what the server advertised and the file passes check_pdf, so a
+    crash never leaves a truncated PDF under the final name. If the connection
+    drops, the transfer resumes from the partial file with an HTTP Range request;
+    a partial file left by an earlier run is resumed the same way. With a
+    blob_store, the verified file is stored by content hash and filepath
+    becomes a link to it.
+    """
+    part_path = filepath + '.part'
+    # Ask for the raw bytes so Content-Length and Range offsets refer to the file itself
+    headers = {'Accept-Encoding': 'identity'}
+
+    for attempt in range(max_resume_attempts + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers)
+        if offset:
+            request_headers['Range'] = f'bytes={offset}-'
+
+        try:
+            with session.get(url, headers=request_headers, stream=True, timeout=timeout) as response:
+                if offset and response.status_code == 416:
+                    # The partial file is not a prefix of the current file; start over
+                    os.remove(part_path)
+                    continue
+                response.raise_for_status()
+
+                if offset and response.status_code != 206:
+                    # Server ignored the Range header and is sending the whole file
+                    offset = 0
+                mode = 'ab' if offset else 'wb'
+                expected = _expected_size(response, offset)
+
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+        except RESUMABLE_ERRORS:
+            if attempt == max_resume_attempts:
+                raise
+            continue
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size != expected:
+            if size < expected and attempt < max_resume_attempts:
+                continue
+            os.remove(part_path)
+            raise DownloadError(f"size mismatch for {os.path.basename(filepath)}: got {size} bytes, expected {expected}")
+
+        try:
+            check_pdf(part_path)
+        except DownloadError:
+            os.remove(part_path)
+            raise
+
+        if blob_store is not None:
+            blob_store.add(part_path, filepath)
+        else:
+            os.replace(part_path, filepath)
+        return size
+
+    raise DownloadError(f"could not complete download of {os.path.basename(filepath)} after {max_resume_attempts + 1} attempts")
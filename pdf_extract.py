@@ -0,0 +1,300 @@
+import os
+import signal
+import time
+from collections import deque, namedtuple
+from multiprocessing import Pool
+
+import PyPDF2
+
+# Optional faster extractors; PyPDF2 is always available as the fallback
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+try:
+    import pdfminer
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+except ImportError:
+    pdfminer = None
+
+# Worker processes for text extraction; 0 means one per CPU
+EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+
+# Seconds one PDF may take before it is abandoned
+EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "120"))
+
+# Extra seconds a worker gets to honour its own timeout before the pool is restarted
+KILL_GRACE = 10.0
+
+# "auto" picks a backend per document; a backend name forces that one
+EXTRACT_BACKEND = os.getenv("PDF_EXTRACT_BACKEND", "auto")
+
+# Text thinner than this (scanned pages, broken font maps) counts as a failed extraction
+MIN_CHARS_PER_PAGE = 100
+
+# text is "" when error is set; seconds is the time spent in the worker
+Extraction = namedtuple('Extraction', ['path', 'text', 'error', 'seconds'])
+
+# iter_pages(pdf_path) yields (page number, text) for one document
+Backend = namedtuple('Backend', ['name', 'version', 'iter_pages'])
+
+
+class ExtractionTimeout(BaseException):
+    """Raised inside a worker when a PDF exceeds its time budget
+
+    Derived from BaseException because PyPDF2 catches and logs Exception in
+    places, which would swallow the timeout.
+    """
+
+
+def _pypdf2_pages(pdf_path):
+    # PyPDF2 keeps every object it has parsed (fonts, decoded content streams)
+    # for the life of the reader; clearing it per page keeps memory to one page
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for number, page in enumerate(pdf_reader.pages, 1):
+            text = page.extract_text()
+            pdf_reader.resolved_objects.clear()
+            yield number, text
+
+
+def _pypdf_pages(pdf_path):
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = pypdf.PdfReader(file)
+        for number, page in enumerate(pdf_reader.pages, 1):
+            text = page.extract_text()
+            pdf_reader.resolved_objects.clear()
+            yield number, text
+
+
+def _pymupdf_pages(pdf_path):
+    with fitz.open(pdf_path) as document:
+        for number, page in enumerate(document, 1):
+            yield number, page.get_text()
+
+
+def _pdfminer_pages(pdf_path):
+    for number, layout in enumerate(extract_pages(pdf_path), 1):
+        yield number, "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+
+
+def available_backends():
+    """Installed extraction backends, fastest first, ending with the PyPDF2 fallback"""
+    backends = []
+    if fitz is not None:
+        backends.append(Backend('pymupdf', fitz.version[0], _pymupdf_pages))
+    if pypdf is not None:
+        backends.append(Backend('pypdf', pypdf.__version__, _pypdf_pages))
+    if pdfminer is not None:
+        backends.append(Backend('pdfminer', pdfminer.__version__, _pdfminer_pages))
+    backends.append(Backend('pypdf2', PyPDF2.__version__, _pypdf2_pages))
+    return backends
+
+
+BACKENDS = available_backends()
+
+# Stored with cached text; the installed backends decide which text auto-selection
+# produces, so installing or upgrading one invalidates the cache. Bump the suffix
+# whenever extract_text changes its output.
+EXTRACTOR_VERSION = "+".join(f"{backend.name}-{backend.version}" for backend in BACKENDS) + "-2"
+
+
+class BackendSelector:
+    """Rank backends for the next document by how they have done so far
+
+    A backend that raised or returned too little text on a document counts a
+    failure. Backends are ordered by failure rate (in steps of 10%), then by
+    measured pages/second; ones not yet measured go first, so every backend
+    is tried before the ranking settles. Each worker process keeps its own
+    selector.
+    """
+
+    def __init__(self, backends=BACKENDS):
+        self.backends = list(backends)
+        self.stats = {backend.name: {'documents': 0, 'failures': 0, 'pages': 0, 'seconds': 0.0}
+                      for backend in self.backends}
+
+    def record(self, backend, pages, seconds, ok):
+        stats = self.stats[backend.name]
+        stats['documents'] += 1
+        stats['failures'] += not ok
+        stats['pages'] += pages
+        stats['seconds'] += seconds
+
+    def ranked(self):
+        def score(backend):
+            stats = self.stats[backend.name]
+            if not stats['documents']:
+                return (0, float('-inf'))
+            failure_rate = stats['failures'] / stats['documents']
+            pages_per_second = stats['pages'] / stats['seconds'] if stats['seconds'] else float('inf')
+            return (round(failure_rate, 1), -pages_per_second)
+        return sorted(self.backends, key=score)
+
+
+selector = BackendSelector()
+
+
+def _candidates(backend):
+    backend = backend or EXTRACT_BACKEND
+    if backend == 'auto':
+        return selector.ranked()
+    for candidate in BACKENDS:
+        if candidate.name == backend:
+            return [candidate]
+    raise ValueError(f"unknown or uninstalled PDF backend {backend!r} (available: {', '.join(b.name for b in BACKENDS)})")
+
+
+def iter_pages(pdf_path, backend=None):
+    """Yield (page number, text) for each page of a PDF, starting from page 1
+
+    Pages are parsed only as they are consumed, so a caller can stop early
+    (after the argument section, or once it has enough text) without paying
+    for the rest of the document. With backend "auto" the best-ranked backend
+    is used, falling back to the next one if it fails before the first page.
+    """
+    candidates = _candidates(backend)
+    for candidate in candidates:
+        pages = candidate.iter_pages(pdf_path)
+        try:
+            first = next(pages, None)
+        except Exception:
+            if candidate is candidates[-1]:
+                raise
+            continue
+        if first is not None:
+            yield first
+            yield from pages
+        return
+
+
+def extract_text(pdf_path, max_chars=None, backend=None):
+    """Extract the text of a PDF, ending each page with a newline and a form feed
+
+    The form feeds let text_normalize tell pages apart. With max_chars,
+    extraction stops after the page that reaches it. With backend "auto" (the
+    default, see PDF_EXTRACT_BACKEND), backends are tried in ranked order
+    until one produces at least MIN_CHARS_PER_PAGE per page; if none does,
+    the longest text is returned.
+    """
+    best = None
+    error = None
+    for candidate in _candidates(backend):
+        parts = []
+        size = 0
+        start = time.perf_counter()
+        try:
+            for _, text in candidate.iter_pages(pdf_path):
+                parts.append(text + "\n\f")
+                size += len(text) + 2
+                if max_chars and size >= max_chars:
+                    break
+        except Exception as e:
+            selector.record(candidate, len(parts), time.perf_counter() - start, False)
+            error = e
+            continue
+        ok = size >= MIN_CHARS_PER_PAGE * len(parts)
+        selector.record(candidate, len(parts), time.perf_counter() - start, ok)
+        if best is None or size > best[0]:
+            best = (size, parts)
+        if ok:
+            break
+    if best is None:
+        raise error
+    return "".join(best[1])
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_worker(pdf_path, timeout):
+    """Pool task: extract one PDF, turning any failure into an Extraction with error set"""
+    # Python-level extractors are interrupted between bytecodes; C extensions that
+    # ignore the timer are caught by the KILL_GRACE deadline in extract_texts
+    use_alarm = bool(timeout) and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    try:
+        return Extraction(pdf_path, extract_text(pdf_path), None, time.perf_counter() - start)
+    except ExtractionTimeout:
+        return Extraction(pdf_path, "", f"timed out after {timeout:.0f} s", time.perf_counter() - start)
+    except Exception as e:
+        return Extraction(pdf_path, "", f"{type(e).__name__}: {e}", time.perf_counter() - start)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def extract_texts(paths, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, cache=None):
+    """Extract PDFs in a process pool, yielding an Extraction for each as it finishes
+
+    At most `workers` files are in the pool at once, so each one's clock starts
+    when it is handed to a worker. A file that raises or runs past `timeout`
+    seconds comes back with its error set and does not affect the others. A
+    worker that does not answer within KILL_GRACE seconds of its timeout (stuck
+    in C code, or the process died) gets the pool restarted; the other files in
+    flight are resubmitted.
+
+    With a TextCache, files already in the cache are yielded first without
+    touching the pool, and new extractions are stored in it.
+    """
+    pending = deque()
+    digests = {}
+    for path in paths:
+        if cache is not None:
+            digests[path] = cache.digest_for(path)
+            text = cache.get(digests[path])
+            if text is not None:
+                yield Extraction(path, text, None, 0.0)
+                continue
+        pending.append(path)
+    if not pending:
+        return
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+    deadline = timeout + KILL_GRACE if timeout else None
+    running = {}
+    pool = Pool(workers)
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                path = pending.popleft()
+                running[path] = (pool.apply_async(_extract_worker, (path, timeout)), time.monotonic())
+
+            finished = [path for path, (result, _) in running.items() if result.ready()]
+            for path in finished:
+                result, started = running.pop(path)
+                try:
+                    extraction = result.get()
+                except Exception as e:
+                    extraction = Extraction(path, "", f"{type(e).__name__}: {e}", time.monotonic() - started)
+                if cache is not None and not extraction.error:
+                    cache.put(digests[path], extraction.text)
+                yield extraction
+
+            now = time.monotonic()
+            stuck = [path for path, (_, started) in running.items() if deadline and now - started > deadline]
+            if stuck:
+                for path in stuck:
+                    running.pop(path)
+                    yield Extraction(path, "", f"worker did not respond within {deadline:.0f} s", deadline)
+                pool.terminate()
+                pool.join()
+                pool = Pool(workers)
+                pending.extendleft(reversed(list(running)))
+                running.clear()
+            elif not finished:
+                time.sleep(0.01)
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,96 @@
+import os
+import queue
+import threading
+
+# Items allowed to wait between two stages; memory is bounded by this times the number of stages
+PIPELINE_QUEUE_DEPTH = int(os.getenv("PIPELINE_QUEUE_DEPTH", "4"))
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception from a stage thread to the consumer"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(source, stages, depth=PIPELINE_QUEUE_DEPTH):
+    """Feed source through stages, each in its own thread, and yield what the last stage returns
+
+    The source iterable is consumed in its own thread too, and every pair of
+    neighbouring steps is joined by a queue holding at most `depth` items, so
+    a slow stage (the API call) holds back the ones before it (extraction)
+    instead of letting their output pile up in memory. Items keep their order.
+    A stage that returns None drops the item. An exception in the source or
+    a stage stops the pipeline and is re-raised here; if the caller stops
+    iterating early, the threads are stopped as well.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=depth) for _ in range(len(stages) + 1)]
+
+    def produce():
+        items = iter(source)
+        try:
+            for item in items:
+                if not _put(queues[0], item, stop):
+                    return
+        except Exception as e:
+            _put(queues[0], _Failure(e), stop)
+        finally:
+            # Let a generator source clean up (extract_texts shuts down its process pool)
+            if hasattr(items, 'close'):
+                items.close()
+        _put(queues[0], _DONE, stop)
+
+    def work(stage, inbox, outbox):
+        while True:
+            item = _get(inbox, stop)
+            if item is _DONE or isinstance(item, _Failure):
+                _put(outbox, item, stop)
+                return
+            try:
+                result = stage(item)
+            except Exception as e:
+                _put(outbox, _Failure(e), stop)
+                return
+            if result is not None and not _put(outbox, result, stop):
+                return
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    for stage, inbox, outbox in zip(stages, queues, queues[1:]):
+        threads.append(threading.Thread(target=work, args=(stage, inbox, outbox), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+
+# Account limits for the analysis model; the defaults are the entry tier for Claude 3.5 Sonnet
+REQUESTS_PER_MINUTE = float(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50"))
+INPUT_TOKENS_PER_MINUTE = float(os.getenv("ANTHROPIC_INPUT_TOKENS_PER_MINUTE", "40000"))
+
+# Share of each limit actually used, so estimation error does not tip requests over it
+HEADROOM = float(os.getenv("ANTHROPIC_RATE_HEADROOM", "0.9"))
+
+
+class RateBudget:
+    """Requests-per-minute and input-tokens-per-minute budgets shared by concurrent async tasks
+
+    Each limit is a token bucket holding up to one minute's allowance (times
+    headroom) and refilling continuously, which is how the API meters them.
+    acquire(tokens) waits until both buckets can pay for one request of that
+    many input tokens, so the analysis runs just under the account limits. A
+    request larger than a whole minute's token allowance waits for a full
+    bucket instead of forever. pause(seconds) holds every caller back, for
+    example after a 429 with Retry-After.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, input_tokens_per_minute=INPUT_TOKENS_PER_MINUTE,
+                 headroom=HEADROOM):
+        self.request_capacity = requests_per_minute * headroom
+        self.token_capacity = input_tokens_per_minute * headroom
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.stats = {'requests': 0, 'tokens': 0, 'waited': 0.0, 'pauses': 0}
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_capacity / 60)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_capacity / 60)
+
+    def delay_for(self, tokens):
+        """Seconds until a request of `tokens` input tokens fits in both budgets"""
+        now = time.monotonic()
+        self._refill(now)
+        tokens = min(tokens, self.token_capacity)
+        waits = [self._paused_until - now,
+                 (1 - self.requests) * 60 / self.request_capacity,
+                 (tokens - self.tokens) * 60 / self.token_capacity]
+        return max(0.0, *waits)
+
+    async def acquire(self, tokens):
+        """Wait until a request of `tokens` input tokens may be sent, then charge it to the budgets"""
+        async with self._lock:
+            while True:
+                delay = self.delay_for(tokens)
+                if delay <= 0:
+                    break
+                self.stats['waited'] += delay
+                await asyncio.sleep(delay)
+            self.requests -= 1
+            self.tokens -= min(tokens, self.token_capacity)
+            self.stats['requests'] += 1
+            self.stats['tokens'] += tokens
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.stats['pauses'] += 1
+
+    def summary(self):
+        return (f"Rate budget: {self.stats['requests']} requests, ~{self.stats['tokens']:,} input tokens, "
+                f"{self.stats['waited']:.0f} s spent pacing, {self.stats['pauses']} rate-limit pauses")
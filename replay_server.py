@@ -0,0 +1,202 @@
+#!/./.venv/bin/python
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench_docket_parser import sample_docket_page
+
+# Bundled briefs used as PDF bodies when no recorded PDFs are given
+CORPUS_DIRS = ['CA01_2024_Briefs', 'CA14_2024_Briefs', 'downloads']
+
+# Case number formats served by the synthetic docket
+_PD_CASE = re.compile(r'^PD-(\d{4})-\d{2}$')
+_COA_CASE = re.compile(r'^\d{2}-\d{2}-(\d{5})-CR$')
+
+EMPTY_PAGE = b'<html><body><div class="panel panel-default"><div class="panel-heading">Search</div></div></body></html>'
+
+
+def load_recordings(path):
+    """Load recorded docket pages as {case number: body}
+
+    path is either a directory of ``<case number>.html`` files or a docket
+    cache directory (see http_cache.py), whose metadata records each page's URL.
+    """
+    pages = {}
+    for filename in glob.glob(os.path.join(path, '*.html')):
+        with open(filename, 'rb') as f:
+            pages[os.path.splitext(os.path.basename(filename))[0]] = f.read()
+    for meta_path in glob.glob(os.path.join(path, '*', '*.json')):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            url = json.load(f).get('url', '')
+        case_number = parse_qs(urlparse(url).query).get('cn', [None])[0]
+        if case_number:
+            with gzip.open(meta_path[:-len('.json')] + '.html.gz', 'rb') as f:
+                pages[case_number] = f.read()
+    return pages
+
+
+def load_pdfs(paths=None, limit=20):
+    """Load PDF bodies to serve for document links, from the given paths or the bundled corpus"""
+    if not paths:
+        here = os.path.dirname(os.path.abspath(__file__))
+        paths = sorted(p for folder in CORPUS_DIRS for p in glob.glob(os.path.join(here, folder, '*.pdf')))[:limit]
+    pdfs = []
+    for filename in paths:
+        with open(filename, 'rb') as f:
+            pdfs.append(f.read())
+    return pdfs
+
+
+class ReplayServer:
+    """Local stand-in for search.txcourts.gov that replays recorded pages and PDFs
+
+    Case.aspx requests are answered from `pages` (case number -> HTML); unknown
+    case numbers up to `synthetic_cases` get a synthetic docket page and higher
+    numbers an empty page, so docket-boundary probing sees a real end.
+    SearchMedia.aspx requests get one of `pdfs`, chosen by the query string,
+    with ETag and Range support. Every response is delayed by `latency`
+    seconds (plus up to `jitter`), and `error_rate` of requests get a 503 with
+    Retry-After instead.
+    """
+
+    def __init__(self, pages=None, pdfs=None, synthetic_cases=200, latency=0.05, jitter=0.02, error_rate=0.0,
+                 retry_after=1, seed=0):
+        self.pages = pages or {}
+        self.pdfs = pdfs if pdfs is not None else load_pdfs()
+        self.synthetic_cases = synthetic_cases
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.stats = {'pages': 0, 'pdfs': 0, 'errors': 0, 'not_modified': 0, 'bytes': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def _roll(self):
+        with self._lock:
+            return self._random.random(), self._random.random()
+
+    def page_for(self, case_number):
+        if case_number in self.pages:
+            return self.pages[case_number]
+        for pattern, coa in ((_PD_CASE, False), (_COA_CASE, True)):
+            match = pattern.match(case_number or '')
+            if match:
+                number = int(match.group(1))
+                if 1 <= number <= self.synthetic_cases:
+                    return sample_docket_page(case_number, events=20 + number % 40, coa=coa)
+        return EMPTY_PAGE
+
+    def pdf_for(self, query):
+        index = int(hashlib.sha256(query.encode('utf-8')).hexdigest(), 16) % len(self.pdfs)
+        return self.pdfs[index]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server._count('bytes', len(body))
+
+            def do_GET(self):
+                error_roll, jitter_roll = server._roll()
+                time.sleep(server.latency + server.jitter * jitter_roll)
+                if error_roll < server.error_rate:
+                    server._count('errors')
+                    self._send(503, headers={'Retry-After': str(server.retry_after)})
+                    return
+
+                parsed = urlparse(self.path)
+                if parsed.path.endswith('Case.aspx'):
+                    case_number = parse_qs(parsed.query).get('cn', [''])[0]
+                    server._count('pages')
+                    self._send(200, server.page_for(case_number), {'Content-Type': 'text/html; charset=utf-8'})
+                elif parsed.path.endswith('SearchMedia.aspx') and server.pdfs:
+                    self._send_pdf(server.pdf_for(parsed.query))
+                else:
+                    self._send(404)
+
+            def _send_pdf(self, body):
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    server._count('not_modified')
+                    self._send(304, headers={'ETag': etag})
+                    return
+                server._count('pdfs')
+                headers = {'Content-Type': 'application/pdf', 'ETag': etag, 'Accept-Ranges': 'bytes'}
+                match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+                if match:
+                    start = int(match.group(1))
+                    if start >= len(body):
+                        self._send(416, headers={'Content-Range': f'bytes */{len(body)}'})
+                        return
+                    headers['Content-Range'] = f'bytes {start}-{len(body) - 1}/{len(body)}'
+                    self._send(206, body[start:], headers)
+                else:
+                    self._send(200, body, headers)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Serve recorded pages (from the directory given, if any) until interrupted"""
+    pages = load_recordings(sys.argv[1]) if len(sys.argv) > 1 else {}
+    server = ReplayServer(pages=pages).start()
+    print(f"Replaying {len(pages)} recorded pages and {len(server.pdfs)} PDFs at {server.url}")
+    print(f"Run a scraper against it with TXCOURTS_BASE_URL={server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
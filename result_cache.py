@@ -0,0 +1,165 @@
+#!/./.venv/bin/python
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+RESULT_CACHE_PATH = os.getenv("ANALYSIS_RESULT_CACHE", "result_cache.sqlite3")
+
+# Result fields that describe one call rather than the document, left out of stored results
+PER_CALL_FIELDS = ('filename', 'usage')
+
+# Least recently used results beyond this many are evicted when the cache is opened (0 keeps all)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_RESULT_CACHE_MAX_ENTRIES", "20000"))
+
+# Results not used for this many days are evicted when the cache is opened (0 keeps them)
+RESULT_CACHE_MAX_AGE_DAYS = float(os.getenv("ANALYSIS_RESULT_CACHE_MAX_AGE_DAYS", "0"))
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """SQLite cache of model analyses keyed by the text sent, prompt version, model and max_tokens
+
+    The text is the normalized, section-selected text that goes into the
+    prompt, so a rerun that sends the same text with the same prompt and
+    model gets the earlier analysis back without an API call. Changing
+    anything that shapes the answer (the text, PROMPT_VERSION, the model or
+    max_tokens) is a different key. Results are stored without their
+    filename and token usage, so identical text under another name is a
+    hit too.
+    """
+
+    def __init__(self, prompt_version, model, max_tokens, path=RESULT_CACHE_PATH,
+                 max_entries=RESULT_CACHE_MAX_ENTRIES, max_age_days=RESULT_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.model = model
+        self.max_tokens = max_tokens
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                text_sha256 TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                max_tokens INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL,
+                PRIMARY KEY (text_sha256, prompt_version, model, max_tokens)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)")
+        self._conn.commit()
+        evicted = self.evict(max_entries, max_age_days)
+        if evicted:
+            print(f"Evicted {evicted} cached analyses")
+
+    def _key(self, text):
+        return (text_sha256(text), self.prompt_version, self.model, self.max_tokens)
+
+    def get(self, text):
+        """Return the cached result dict (without filename) for text, or None"""
+        key = self._key(text)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM results WHERE text_sha256 = ? AND prompt_version = ? AND model = ? "
+                "AND max_tokens = ?", key
+            ).fetchone()
+            self.stats['hits' if row else 'misses'] += 1
+            if row:
+                self._conn.execute(
+                    "UPDATE results SET used_at = ? WHERE text_sha256 = ? AND prompt_version = ? AND model = ? "
+                    "AND max_tokens = ?", (time.time(),) + key
+                )
+                self._conn.commit()
+        return json.loads(row[0]) if row else None
+
+    def put(self, text, result):
+        result = {name: value for name, value in result.items() if name not in PER_CALL_FIELDS}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (text_sha256, prompt_version, model, max_tokens, result, created_at, "
+                "used_at) VALUES (?, ?, ?, ?, ?, ?, ?)", self._key(text) + (json.dumps(result), now, now)
+            )
+            self._conn.commit()
+            self.stats['stored'] += 1
+
+    def invalidate(self, text=None, prompt_version=None, model=None):
+        """Delete cached results matching every given criterion (all of them if none is given); return the count"""
+        clauses, params = [], []
+        for column, value in (('text_sha256', text and text_sha256(text)), ('prompt_version', prompt_version),
+                              ('model', model)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM results" + where, params).rowcount
+            self._conn.commit()
+        return deleted
+
+    def evict(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_age_days=RESULT_CACHE_MAX_AGE_DAYS):
+        """Drop results unused for max_age_days, then the least recently used beyond max_entries"""
+        deleted = 0
+        with self._lock:
+            if max_age_days:
+                deleted += self._conn.execute(
+                    "DELETE FROM results WHERE used_at < ?", (time.time() - max_age_days * 86400,)
+                ).rowcount
+            if max_entries:
+                deleted += self._conn.execute(
+                    "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY used_at DESC "
+                    "LIMIT -1 OFFSET ?)", (max_entries,)
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def entries(self):
+        """Return [(prompt version, model, max_tokens, count)] for everything in the cache"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT prompt_version, model, max_tokens, COUNT(*) FROM results "
+                "GROUP BY prompt_version, model, max_tokens ORDER BY MAX(used_at) DESC"
+            ).fetchall()
+
+    def summary(self):
+        return (f"Result cache: {self.stats['hits']} hits (API calls saved), {self.stats['misses']} misses, "
+                f"{self.stats['stored']} stored")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    """List cached analyses, or delete them: `clear`, `invalidate model=<model>`, `invalidate prompt_version=<v>`"""
+    cache = ResultCache(prompt_version=None, model=None, max_tokens=None, max_entries=0, max_age_days=0)
+    command, *criteria = sys.argv[1:] or ['list']
+    if command == 'clear':
+        print(f"Deleted {cache.invalidate()} cached analyses")
+    elif command == 'invalidate' and criteria:
+        filters = dict(criterion.split('=', 1) for criterion in criteria)
+        unknown = set(filters) - {'model', 'prompt_version'}
+        if unknown:
+            sys.exit(f"Unknown criteria {sorted(unknown)}; use model=... and/or prompt_version=...")
+        print(f"Deleted {cache.invalidate(**filters)} cached analyses")
+    elif command == 'list':
+        for prompt_version, model, max_tokens, count in cache.entries():
+            print(f"{count:>6} results for prompt {prompt_version}, {model}, max_tokens {max_tokens}")
+    else:
+        sys.exit(main.__doc__)
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upper bounds for the adaptive rate controller. MAX_IN_FLIGHT above 1 also
+# switches the scrapers to the bounded-parallel asyncio mode.
+MAX_IN_FLIGHT = int(os.getenv("SCRAPER_MAX_IN_FLIGHT", "1"))
+REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_REQUESTS_PER_SECOND", "2.0"))
+
+# Starting and minimum pace; the controller climbs from the initial rate while
+# the site stays healthy. 0.8 requests/second matches the old fixed 1.0-1.5 s sleep.
+INITIAL_REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_INITIAL_REQUESTS_PER_SECOND", "0.8"))
+MIN_REQUESTS_PER_SECOND = 0.1
+
+# Responses slower than this count as a sign of load and stop the rate from growing
+TARGET_LATENCY = float(os.getenv("SCRAPER_TARGET_LATENCY", "2.0"))
+
+# Status codes that mean "slow down"; other 5xx are counted as errors
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Longest wait between retries of one case
+MAX_BACKOFF = 60.0
+
+
+def parse_retry_after(value):
+    """Return the number of seconds a Retry-After header asks for, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_delay(error, attempt):
+    """Return seconds to wait before retrying after error, or None if it should not be retried
+
+    Timeouts, connection errors, 429/503 and other 5xx responses are retried;
+    a Retry-After header is honoured, otherwise the wait is exponential with
+    full jitter. Other 4xx responses will not change on retry.
+    """
+    response = getattr(error, 'response', None)
+    if response is not None:
+        if response.status_code in THROTTLE_STATUS_CODES:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, MAX_BACKOFF)
+        elif response.status_code < 500:
+            return None
+    elif not isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                                requests.exceptions.ChunkedEncodingError)):
+        return None
+    return random.uniform(0, min(MAX_BACKOFF, 2.0 ** (attempt + 1)))
+
+
+def call_with_retries(fn, max_retries=3):
+    """Call fn(), retrying the errors retry_delay allows, and re-raise the last error"""
+    for attempt in range(max_retries):
+        try:
+            return fn()
+        except requests.exceptions.RequestException as e:
+            delay = retry_delay(e, attempt)
+            if delay is None or attempt == max_retries - 1:
+                raise
+            time.sleep(delay)
+
+
+class HostRateLimiter:
+    """Cap the request rate per host across all worker threads"""
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.min_interval = 1.0 / requests_per_second
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url):
+        """Claim the next request slot for the URL's host and return the delay until it"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        return slot - now
+
+    def wait(self, url):
+        """Block until a request to the URL's host is allowed"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AdaptiveRateController:
+    """AIMD pacing of request rate and concurrency, shared by every worker thread
+
+    While responses come back fast and without errors, the request rate grows
+    additively (increase_step requests/second per round of `concurrency`
+    healthy responses) and the concurrency limit grows by one, up to max_rate
+    and max_in_flight. A 429/503, a timeout, a connection error or another 5xx
+    halves both, at most once per second so a burst of failures from requests
+    already in flight counts as one signal. A Retry-After header pauses all
+    requests to that host for the time it asks.
+    """
+
+    def __init__(self, max_rate=REQUESTS_PER_SECOND, max_in_flight=MAX_IN_FLIGHT, initial_rate=None,
+                 min_rate=MIN_REQUESTS_PER_SECOND, target_latency=TARGET_LATENCY, increase_step=0.1, decrease_factor=0.5):
+        if initial_rate is None:
+            initial_rate = INITIAL_REQUESTS_PER_SECOND
+        self.max_rate = max_rate
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = min(initial_rate, max_rate)
+        self.concurrency = 1
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.stats = {'ok': 0, 'slow': 0, 'throttled': 0, 'errors': 0}
+        self._healthy_streak = 0
+        self._last_decrease = 0.0
+        self._next_slot = {}
+        self._blocked_until = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, url):
+        """Block until a concurrency slot and a paced send time are available for url"""
+        host = urlparse(url).netloc
+        with self._condition:
+            while self.in_flight >= self.concurrency:
+                self._condition.wait()
+            self.in_flight += 1
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now), self._blocked_until.get(host, now))
+            self._next_slot[host] = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def release(self, url, status_code=None, latency=0.0, retry_after=None, error=False):
+        """Record how a request went and adjust rate and concurrency"""
+        host = urlparse(url).netloc
+        with self._condition:
+            self.in_flight -= 1
+            throttled = error or (status_code is not None and (status_code in THROTTLE_STATUS_CODES or status_code >= 500))
+            if throttled:
+                self.stats['throttled' if status_code in THROTTLE_STATUS_CODES else 'errors'] += 1
+                self._decrease()
+                if retry_after:
+                    self._blocked_until[host] = max(self._blocked_until.get(host, 0.0), time.monotonic() + retry_after)
+            elif latency > self.target_latency:
+                self.stats['slow'] += 1
+                self._healthy_streak = 0
+            else:
+                self.stats['ok'] += 1
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.concurrency:
+                    self._healthy_streak = 0
+                    self.rate = min(self.max_rate, self.rate + self.increase_step)
+                    self.concurrency = min(self.max_in_flight, self.concurrency + 1)
+            self._condition.notify_all()
+
+    def _decrease(self):
+        now = time.monotonic()
+        self._healthy_streak = 0
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.concurrency = max(1, int(self.concurrency * self.decrease_factor))
+
+    def describe(self):
+        """One-line description of the current pace"""
+        return (f"{self.rate:.2f} requests/second, {self.concurrency} in flight "
+                f"({self.stats['throttled']} throttled, {self.stats['errors']} errors, {self.stats['slow']} slow)")
+
+
+class AdaptiveAdapter(HTTPAdapter):
+    """HTTP adapter that paces every request through an AdaptiveRateController
+
+    global_limiter, if given, is an additional fixed cap shared with other
+    sessions so several per-court controllers still respect one overall limit.
+    Latency is measured to the response headers, so streamed PDF bodies do not
+    hold a concurrency slot while they download.
+    """
+
+    def __init__(self, controller, global_limiter=None, **kwargs):
+        self.controller = controller
+        self.global_limiter = global_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.controller.acquire(request.url)
+        if self.global_limiter:
+            self.global_limiter.wait(request.url)
+        start = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.controller.release(request.url, latency=time.monotonic() - start, error=True)
+            raise
+        except Exception:
+            self.controller.release(request.url, latency=time.monotonic() - start)
+            raise
+        self.controller.release(request.url, response.status_code, time.monotonic() - start,
+                                parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+
+def configure_session(session, max_in_flight=MAX_IN_FLIGHT, requests_per_second=REQUESTS_PER_SECOND, global_limiter=None):
+    """Mount an adaptive rate controller on session and return it
+
+    requests_per_second and max_in_flight are the ceilings the controller may
+    climb to; it starts at INITIAL_REQUESTS_PER_SECOND with one request in flight.
+    """
+    controller = AdaptiveRateController(requests_per_second, max_in_flight)
+    adapter = AdaptiveAdapter(controller, global_limiter, pool_connections=max(1, max_in_flight), pool_maxsize=max(1, max_in_flight))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return controller
+
+
+async def scrape_cases_async(scrape_fn, case_numbers, max_in_flight=MAX_IN_FLIGHT, on_result=None):
+    """Run scrape_fn over case_numbers with at most max_in_flight calls outstanding
+
+    scrape_fn is one of the blocking scrape_case_with_backoff functions and runs
+    in a worker thread. Results are passed to on_result(case_num, result) in
+    case-number order, so order-sensitive accounting (such as counting
+    consecutive "no_briefs" results) behaves exactly as in the sequential loop.
+    If on_result returns True, no further cases are started; cases already in
+    flight are allowed to finish and are still reported.
+    """
+    case_iter = iter(case_numbers)
+    pending = set()
+    finished = {}
+    issued = []
+    next_to_report = 0
+    stopping = False
+
+    def start_next():
+        try:
+            case_num = next(case_iter)
+        except StopIteration:
+            return False
+        task = asyncio.create_task(asyncio.to_thread(scrape_fn, case_num))
+        task.case_index = len(issued)
+        issued.append(case_num)
+        pending.add(task)
+        return True
+
+    while len(pending) < max_in_flight and start_next():
+        pass
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            pending.discard(task)
+            finished[task.case_index] = task.result()
+
+        # Report results in case order so callers see the same sequence as the sequential loop
+        while next_to_report in finished:
+            result = finished.pop(next_to_report)
+            if on_result and on_result(issued[next_to_report], result):
+                stopping = True
+            next_to_report += 1
+
+        while not stopping and len(pending) < max_in_flight and start_next():
+            pass
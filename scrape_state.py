@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+
+STATE_DB_PATH = os.getenv("SCRAPER_STATE_DB", "scrape_state.sqlite3")
+
+# Cases whose last outcome was "nothing to download" are checked again after this many days
+REFRESH_DAYS = float(os.getenv("SCRAPER_REFRESH_DAYS", "7"))
+
+# Case outcomes recorded by the scrapers
+DOWNLOADED = "downloaded"
+NO_BRIEFS = "no_briefs"
+NO_DOCUMENT = "no_document"
+FAILED = "failed"
+# Documents downloaded while the case is still open (a PDR with no disposition yet)
+PENDING = "pending"
+
+# Outcomes that can change as the docket is updated and so are re-checked after REFRESH_DAYS
+REFRESHABLE = (NO_BRIEFS, NO_DOCUMENT)
+
+# Pending cases are checked again after this many hours, like open cases in the docket cache,
+# so a later disposition (and the filename that records it) is picked up
+PENDING_REFRESH_HOURS = float(os.getenv("SCRAPER_PENDING_REFRESH_HOURS", "24"))
+
+
+class ScrapeStateStore:
+    """SQLite record of each case number's last scrape outcome
+
+    The scrapers consult the store before fetching a case so that reruns only
+    touch cases that are new, previously failed, or due for a refresh. The
+    connection is shared by the async worker threads, so access is serialised
+    with a lock.
+    """
+
+    def __init__(self, path=STATE_DB_PATH, refresh_days=REFRESH_DAYS, pending_refresh_hours=PENDING_REFRESH_HOURS):
+        self.path = path
+        self.refresh_seconds = refresh_days * 86400
+        self.pending_refresh_seconds = pending_refresh_hours * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cases (
+                case_id TEXT PRIMARY KEY,
+                court TEXT NOT NULL,
+                status TEXT NOT NULL,
+                reason TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cases_court_status ON cases (court, status)")
+        self._conn.commit()
+
+    def record(self, case_id, court, status, reason=None):
+        """Store the outcome of scraping case_id"""
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO cases (case_id, court, status, reason, attempts, updated_at)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT (case_id) DO UPDATE SET
+                    status = excluded.status,
+                    reason = excluded.reason,
+                    attempts = cases.attempts + 1,
+                    updated_at = excluded.updated_at
+            """, (case_id, court, status, reason, time.time()))
+            self._conn.commit()
+
+    def get(self, case_id):
+        """Return (status, reason, updated_at) for case_id, or None if it was never scraped"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT status, reason, updated_at FROM cases WHERE case_id = ?", (case_id,)
+            ).fetchone()
+
+    def cached_status(self, case_id):
+        """Return the stored status if case_id does not need to be fetched again, else None"""
+        row = self.get(case_id)
+        if row is None:
+            return None
+        status, _, updated_at = row
+        if status == FAILED:
+            return None
+        if status in REFRESHABLE and time.time() - updated_at >= self.refresh_seconds:
+            return None
+        if status == PENDING and time.time() - updated_at >= self.pending_refresh_seconds:
+            return None
+        return status
+
+    def failed_cases(self, court):
+        """Return (case_id, reason) for every case of court whose last attempt failed"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT case_id, reason FROM cases WHERE court = ? AND status = ? ORDER BY case_id",
+                (court, FAILED),
+            ).fetchall()
+
+    def summary(self, court):
+        """Return a {status: count} mapping for court"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM cases WHERE court = ? GROUP BY status", (court,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
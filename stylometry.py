@@ -0,0 +1,113 @@
+import os
+import re
+
+import numpy as np
+
+# Documents scoring below this are not sent to Claude; unset sends everything
+PRESCREEN_THRESHOLD = os.getenv("PRESCREEN_THRESHOLD")
+PRESCREEN_THRESHOLD = float(PRESCREEN_THRESHOLD) if PRESCREEN_THRESHOLD else None
+
+# Share of documents below the threshold that are analyzed anyway, to estimate what the pre-screen misses
+PRESCREEN_AUDIT_RATE = float(os.getenv("PRESCREEN_AUDIT_RATE", "0.05"))
+
+# Words counted for the type-token ratio, so long and short briefs are comparable
+TTR_WINDOW = 1000
+
+# Transitions the detection prompt singles out as typical of generated prose
+TRANSITION_WORDS = ['moreover', 'furthermore', 'additionally', 'notably', 'importantly', 'crucially',
+                    'ultimately', 'consequently', 'overall', 'indeed']
+
+FEATURES = ['sentence_length_cv', 'type_token_ratio', 'trigram_repetition', 'transition_rate']
+
+# Sign of each feature towards generated text: even sentence lengths, a smaller vocabulary,
+# more repeated phrasing and more stock transitions
+DIRECTIONS = np.array([-1.0, -1.0, 1.0, 1.0])
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+# Sentence ends, skipping the abbreviations that fill legal citations (Tex. Crim. App., v., S.W.3d)
+_SENTENCE_END = re.compile(r"(?<!\bv)(?<!\bNo)(?<![A-Z][a-z])(?<![A-Z])[.!?]\s+(?=[A-Z\"“(])")
+
+
+def _sentence_lengths(text):
+    lengths = [len(_WORD.findall(sentence.lower())) for sentence in _SENTENCE_END.split(text)]
+    return [length for length in lengths if length >= 3]
+
+
+def feature_matrix(texts):
+    """Return an array of shape (documents, FEATURES) computed over the whole corpus at once
+
+    Tokenizing is per document; the counting is done on corpus-wide arrays
+    tagged with each token's document, so sentence-length variance, windowed
+    type-token ratio, trigram repetition and transition rates for every
+    document come out of a handful of vectorized operations.
+    """
+    count = len(texts)
+    words = [_WORD.findall(text.lower()) for text in texts]
+    word_counts = np.array([len(tokens) for tokens in words])
+    if not word_counts.sum():
+        return np.zeros((count, len(FEATURES)))
+    doc_of_word = np.repeat(np.arange(count), word_counts)
+    vocabulary = {}
+    word_ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for tokens in words for word in tokens),
+                           dtype=np.int64, count=int(word_counts.sum()))
+
+    # Coefficient of variation of sentence length (words per sentence)
+    sentences = [_sentence_lengths(text) for text in texts]
+    sentence_counts = np.array([len(lengths) for lengths in sentences])
+    doc_of_sentence = np.repeat(np.arange(count), sentence_counts)
+    lengths = np.array([length for lengths in sentences for length in lengths], dtype=float)
+    n = np.maximum(sentence_counts, 1)
+    mean = np.bincount(doc_of_sentence, weights=lengths, minlength=count) / n
+    variance = np.bincount(doc_of_sentence, weights=lengths ** 2, minlength=count) / n - mean ** 2
+    sentence_cv = np.sqrt(np.maximum(variance, 0)) / np.maximum(mean, 1)
+
+    # Type-token ratio over each document's first TTR_WINDOW words
+    starts = np.concatenate([[0], np.cumsum(word_counts)[:-1]])
+    in_window = np.arange(len(word_ids)) - starts[doc_of_word] < TTR_WINDOW
+    types = np.unique(doc_of_word[in_window] * len(vocabulary) + word_ids[in_window]) // len(vocabulary)
+    type_token_ratio = np.bincount(types, minlength=count) / np.maximum(np.minimum(word_counts, TTR_WINDOW), 1)
+
+    # Share of word trigrams that occur more than once in the same document
+    same_doc = doc_of_word[:-2] == doc_of_word[2:]
+    trigram_docs = doc_of_word[:-2][same_doc]
+    trigrams = ((word_ids[:-2] * len(vocabulary) + word_ids[1:-1]) * len(vocabulary) + word_ids[2:])[same_doc]
+    order = np.lexsort((trigrams, trigram_docs))
+    trigram_docs, trigrams = trigram_docs[order], trigrams[order]
+    boundaries = np.flatnonzero(np.diff(trigrams) | np.diff(trigram_docs)) + 1
+    run_starts = np.concatenate([[0], boundaries]) if len(trigrams) else np.zeros(0, dtype=int)
+    occurrences = np.diff(np.append(run_starts, len(trigrams)))
+    repeated = np.bincount(trigram_docs[run_starts], weights=occurrences * (occurrences > 1), minlength=count)
+    trigram_repetition = repeated / np.maximum(np.bincount(trigram_docs, minlength=count), 1)
+
+    # Stock transitions per thousand words
+    transition_ids = [vocabulary[word] for word in TRANSITION_WORDS if word in vocabulary]
+    is_transition = np.isin(word_ids, transition_ids)
+    transition_rate = np.bincount(doc_of_word[is_transition], minlength=count) * 1000 / np.maximum(word_counts, 1)
+
+    return np.column_stack([sentence_cv, type_token_ratio, trigram_repetition, transition_rate])
+
+
+def score_documents(texts):
+    """Return (scores, features): how AI-like each document looks relative to the rest of the corpus
+
+    Each feature is turned into a robust z-score (median and scaled median
+    absolute deviation across the documents scored together), pointed
+    towards generated text by DIRECTIONS and clipped to ±5; the score is
+    their mean. 0 is a typical document of this corpus, and higher scores
+    look more generated.
+    """
+    features = feature_matrix(texts)
+    median = np.median(features, axis=0)
+    spread = 1.4826 * np.median(np.abs(features - median), axis=0)
+    spread = np.where(spread > 0, spread, features.std(axis=0))
+    z = (features - median) / np.where(spread > 0, spread, 1.0)
+    return np.clip(z * DIRECTIONS, -5, 5).mean(axis=1), features
+
+
+def estimated_recall(flagged_escalated, flagged_audited, audited, held_back):
+    """Estimate the share of flaggable documents the pre-screen escalates, from the audit sample, or None"""
+    if not audited:
+        return None
+    missed = flagged_audited / audited * held_back
+    total = flagged_escalated + missed
+    return flagged_escalated / total if total else 1.0
@@ -10,7 +10,10 @@ from typing import Dict, List, Tuple, Optional
 
 import anthropic
 from dotenv import load_dotenv
-import PyPDF2
+
+from brief_sections import BRIEF_SECTIONS, select_sections
+from text_cache import TextCache
+from text_normalize import describe, normalize_text
 
 # Load environment variables
 load_dotenv()
@@ -21,17 +24,14 @@ class PDRAIDetectorTest:
             api_key=os.getenv("ANTHROPIC_API_KEY")
         )
         self.downloads_dir = Path("downloads")
+        self.text_cache = TextCache()
+        self.sections = BRIEF_SECTIONS
         self.results = []
         
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extract text content from PDF file"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            return self.text_cache.extract(pdf_path)
         except Exception as e:
             print(f"Error reading {pdf_path}: {e}")
             return ""
@@ -180,8 +180,17 @@ Focus on legal writing patterns, repetitive phrasing, unusual word choices, over
                 print(f"  No text extracted from {pdf_file.name}")
                 continue
             
+            # Drop running headers, page numbers and line numbers, and collapse whitespace
+            text, cleanup = normalize_text(text)
+            print(f"  Normalized: {describe(cleanup)}")
+            
+            # Send only the substantive sections (facts, argument, prayer by default)
+            selected, found = select_sections(text, self.sections)
+            if found:
+                print(f"  Sending {', '.join(found)}: {len(selected):,} of {len(text):,} characters")
+            
             # Analyze with Claude
-            result = self.analyze_document(text, pdf_file.name)
+            result = self.analyze_document(selected, pdf_file.name)
             if result:
                 all_results.append(result)
                 print(f"  AI: {result['percentage_ai_generated']}%, Confidence: {result['confidence_percentage']}%")
@@ -0,0 +1,37 @@
+import functools
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+
+@pytest.fixture
+def make_detector(tmp_path, monkeypatch):
+    """Build PDRAIDetectors whose blob store, caches and downloads live under tmp_path, not the repo root"""
+    import ai_detector
+    from blob_store import BlobStore
+    from result_cache import ResultCache
+    from text_cache import TextCache
+
+    monkeypatch.setattr(ai_detector, 'BlobStore', functools.partial(BlobStore, str(tmp_path / "blobs")))
+    monkeypatch.setattr(ai_detector, 'TextCache', functools.partial(TextCache, str(tmp_path / "text_cache.sqlite3")))
+    monkeypatch.setattr(ai_detector, 'ResultCache',
+                        functools.partial(ResultCache, path=str(tmp_path / "result_cache.sqlite3")))
+    detectors = []
+
+    def make(**kwargs):
+        detector = ai_detector.PDRAIDetector(**kwargs)
+        detector.downloads_dir = tmp_path / "downloads"
+        detectors.append(detector)
+        return detector
+
+    yield make
+    for detector in detectors:
+        detector.result_cache.close()
+        detector.text_cache.close()
+        detector.blob_store.close()
@@ -0,0 +1,50 @@
+import anthropic
+
+from ai_detector import DETECTION_INSTRUCTIONS, MAX_TOKENS, MODEL
+from analysis_schema import ANALYSIS_TOOL, ANALYSIS_TOOL_NAME
+from batch_server import BatchServer
+
+TEXT = "The appellant argues that the trial court erred in admitting the evidence. " * 50
+
+
+def test_request_puts_the_cached_instructions_first_and_the_document_last(make_detector):
+    request = make_detector().build_request(TEXT, "brief.pdf")
+    assert (request['model'], request['max_tokens']) == (MODEL, MAX_TOKENS)
+    assert request['system'] == [{"type": "text", "text": DETECTION_INSTRUCTIONS,
+                                  "cache_control": {"type": "ephemeral"}}]
+    assert request['tools'] == [ANALYSIS_TOOL]
+    assert request['tool_choice'] == {"type": "tool", "name": ANALYSIS_TOOL_NAME}
+    message, = request['messages']
+    assert message['role'] == "user"
+    assert message['content'].startswith("Document: brief.pdf\n") and message['content'].endswith(TEXT)
+    # Nothing that varies by document is in the shared prefix
+    assert "brief.pdf" not in str(request['system']) and TEXT not in str(request['system'])
+
+
+def test_usage_totals_count_prompt_cache_writes_and_reads(make_detector):
+    with BatchServer(min_cacheable_tokens=100) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        first = detector.analyze_text(TEXT, "first.pdf")
+        second = detector.analyze_text(TEXT + " Another brief.", "second.pdf")
+
+    assert first['usage']['cache_creation_input_tokens'] > 0 and first['usage']['cache_read_input_tokens'] == 0
+    assert second['usage']['cache_read_input_tokens'] == first['usage']['cache_creation_input_tokens']
+    assert second['usage']['cache_creation_input_tokens'] == 0
+    usage = detector.usage
+    assert usage['calls'] == 2
+    for name in ('input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens', 'output_tokens'):
+        assert usage[name] == first['usage'][name] + second['usage'][name]
+    written = first['usage']['cache_creation_input_tokens']
+    prompt = sum(usage[name] for name in ('input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens'))
+    assert detector.usage_summary() == (f"Token usage: 2 calls, {prompt:,} prompt tokens ({written:,} read from the "
+                                        f"prompt cache, {written:,} written to it), 120 output tokens")
+
+
+def test_short_prefix_is_not_cached(make_detector):
+    with BatchServer(min_cacheable_tokens=100000) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        detector.analyze_text(TEXT, "first.pdf")
+        detector.analyze_text(TEXT + " Another brief.", "second.pdf")
+    assert detector.usage['cache_read_input_tokens'] == detector.usage['cache_creation_input_tokens'] == 0
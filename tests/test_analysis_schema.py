@@ -0,0 +1,79 @@
+import math
+
+import pytest
+from anthropic.types import TextBlock, ToolUseBlock
+
+from analysis_schema import ANALYSIS_TOOL_NAME, extract_analysis, validate_analysis
+
+VALID = {'percentage_ai_generated': 40, 'confidence_percentage': 75.5, 'tells': ["Uniform sentence length"]}
+
+
+def analysis(**fields):
+    return dict(VALID, **fields)
+
+
+def test_valid_analysis_keeps_only_its_fields():
+    assert validate_analysis(analysis(reasoning="extra")) == (VALID, [])
+
+
+def test_numeric_strings_are_accepted_as_percentages():
+    clean, problems = validate_analysis(analysis(percentage_ai_generated="85%", confidence_percentage=" 62.5 "))
+    assert problems == []
+    assert (clean['percentage_ai_generated'], clean['confidence_percentage']) == (85, 62.5)
+    assert isinstance(clean['percentage_ai_generated'], int)
+
+
+@pytest.mark.parametrize("value", [True, False, math.nan, "high", [50]])
+def test_non_numbers_are_rejected(value):
+    assert validate_analysis(analysis(confidence_percentage=value)) == (
+        None, [f"confidence_percentage must be a number, got {value!r}"])
+
+
+@pytest.mark.parametrize("value, shown", [(-1, "-1"), (100.5, "100.5"), ("150%", "150"), (math.inf, "inf")])
+def test_out_of_range_percentages_are_rejected(value, shown):
+    assert validate_analysis(analysis(percentage_ai_generated=value)) == (
+        None, [f"percentage_ai_generated must be between 0 and 100, got {shown}"])
+
+
+def test_missing_fields_are_all_reported():
+    assert validate_analysis({}) == (None, ["percentage_ai_generated is missing", "confidence_percentage is missing",
+                                            "tells must be a list of strings, got None"])
+
+
+def test_tells_must_be_a_list_of_strings():
+    assert validate_analysis(analysis(tells="Uniform sentence length")) == (
+        None, ["tells must be a list of strings, got 'Uniform sentence length'"])
+    assert validate_analysis(analysis(tells=["Hedging", 3])) == (None, ["every item of tells must be a string"])
+
+
+def test_blank_tells_are_dropped():
+    clean, problems = validate_analysis(analysis(tells=["  Hedging ", "", "   ", "Lists"]))
+    assert problems == [] and clean['tells'] == ["Hedging", "Lists"]
+
+
+def test_a_missing_analysis_is_reported():
+    assert validate_analysis(None) == (None, [f"no analysis was recorded with the {ANALYSIS_TOOL_NAME} tool"])
+
+
+def test_extract_prefers_the_tool_call():
+    content = [TextBlock(type="text", text='{"percentage_ai_generated": 1}'),
+               ToolUseBlock(type="tool_use", id="toolu_1", name=ANALYSIS_TOOL_NAME, input=VALID)]
+    assert extract_analysis(content) == VALID
+
+
+def test_extract_ignores_other_tools():
+    content = [ToolUseBlock(type="tool_use", id="toolu_1", name="other_tool", input=VALID)]
+    assert extract_analysis(content) is None
+
+
+def test_extract_falls_back_to_json_in_text_past_stray_braces():
+    content = [TextBlock(type="text", text='Scores use {0-100}, see {"note": '),
+               TextBlock(type="text", text='Result: [1, {2}] {"percentage_ai_generated": 40, '
+                                           '"confidence_percentage": 75.5, "tells": ["Uniform sentence length"]} '
+                                           '{"later": true}')]
+    assert extract_analysis(content) == VALID
+
+
+def test_extract_finds_nothing_in_plain_text():
+    assert extract_analysis([TextBlock(type="text", text="I cannot tell {from this} document.")]) is None
+    assert extract_analysis([]) is None
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+import appeals_scraper
+import scrape_engine
+from blob_store import BlobStore
+from http_cache import DocketCache
+from replay_server import ReplayServer, load_pdfs
+from scrape_state import DOWNLOADED, ScrapeStateStore
+
+
+@pytest.fixture
+def offline_appeals(tmp_path, monkeypatch):
+    """appeals_scraper pointed at a replay server with 6 synthetic cases per court, in a scratch directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scrape_engine, "INITIAL_REQUESTS_PER_SECOND", 50.0)
+    monkeypatch.setattr(appeals_scraper, "docket_cache", DocketCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(appeals_scraper, "blob_store", BlobStore(str(tmp_path / "blobs")))
+    with ReplayServer(synthetic_cases=6, pdfs=load_pdfs(limit=2), latency=0, jitter=0) as server:
+        monkeypatch.setattr(appeals_scraper, "BASE_URL", server.url)
+        yield server
+    appeals_scraper.blob_store.close()
+
+
+def test_scrape_courts_runs_each_job_to_its_docket_end(offline_appeals, tmp_path):
+    state = ScrapeStateStore(str(tmp_path / "state.sqlite3"))
+    jobs = [appeals_scraper.CourtJob(1), appeals_scraper.CourtJob(14, 2024, 3)]
+    summaries = appeals_scraper.scrape_courts(jobs, max_in_flight=2, requests_per_second=50,
+                                              global_requests_per_second=100, state=state)
+    assert [(s['court'], s['processed'], s['last_case']) for s in summaries] == [(1, 6, 6), (14, 4, 6)]
+    assert all(s[DOWNLOADED] == s['processed'] for s in summaries)
+    assert len(os.listdir("CA01_2024_Briefs")) == 6 and len(os.listdir("CA14_2024_Briefs")) == 4
+    assert state.summary("CA01") == {DOWNLOADED: 6}
+    assert state.cached_status(appeals_scraper.case_id(14, 2)) is None
+    state.close()
+
+
+def test_rerun_skips_recorded_cases(offline_appeals, tmp_path):
+    state = ScrapeStateStore(str(tmp_path / "state.sqlite3"))
+    appeals_scraper.scrape_courts([appeals_scraper.CourtJob(1, 2024, 1, 6)], max_in_flight=1, state=state)
+    pages = offline_appeals.stats['pages']
+    summaries = appeals_scraper.scrape_courts([appeals_scraper.CourtJob(1, 2024, 1, 6)], max_in_flight=1, state=state)
+    assert summaries[0][DOWNLOADED] == 6
+    assert offline_appeals.stats['pages'] == pages
+    state.close()
@@ -0,0 +1,58 @@
+import glob
+import os
+
+import anthropic
+
+from batch_server import BatchServer
+
+BRIEFS = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[:10]
+
+
+def link_briefs(folder):
+    folder.mkdir()
+    for path in BRIEFS:
+        os.link(path, folder / os.path.basename(path))
+
+
+def test_batch_mode_against_the_stand_in(make_detector, tmp_path):
+    """One request in five errors and one in five is invalid; batches of four force the run to split"""
+    with BatchServer(processing_seconds=0.2, error_rate=0.2, invalid_rate=0.2, seed=1) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        link_briefs(detector.downloads_dir)
+        documents = detector.run_batch_analysis(poll_seconds=0.05, batch_size=4,
+                                                report_path=tmp_path / "report.html")
+
+    analyzed = [document for document in documents if document['text'].strip()]
+    succeeded = [document for document in analyzed if document['result']]
+    assert server.stats['requests'] == len(analyzed) == len(BRIEFS)
+    assert server.stats['batches'] == -(-len(analyzed) // 4)
+    assert server.stats['errored'] > 0 and server.stats['invalid'] > 0
+    # Every successful request maps back to its own file through its custom_id
+    assert len(succeeded) == len(analyzed) - server.stats['errored']
+    assert all(document['result']['filename'] == document['path'].name for document in succeeded)
+    # Every invalid analysis gets one repair retry, which fixes it
+    assert detector.parse_stats['repaired'] == server.stats['messages'] == server.stats['invalid']
+    assert (tmp_path / "report.html").exists()
+
+
+def test_interrupted_run_is_collected_by_batch_id(make_detector, tmp_path):
+    with BatchServer(processing_seconds=0.2, seed=2) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        link_briefs(detector.downloads_dir)
+        original = detector.run_batch_analysis(poll_seconds=0.05, batch_size=4, report_path=tmp_path / "first.html")
+        batch_ids = list(server.batches)
+        submitted = server.stats['requests']
+
+        # A later run, with nothing in the result cache, collects the same batches instead of submitting again
+        detector.result_cache.invalidate()
+        resumed = make_detector()
+        resumed.client = detector.client
+        collected = resumed.run_batch_analysis(batch_ids=batch_ids, poll_seconds=0.05,
+                                               report_path=tmp_path / "second.html")
+
+    assert len(batch_ids) == 3
+    assert server.stats['requests'] == submitted and server.stats['batches'] == len(batch_ids)
+    assert [document['result'] for document in collected] == [document['result'] for document in original]
+    assert all(document['result'] for document in collected)
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from blob_store import BlobStore, file_sha256
+from replay_server import load_pdfs
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    yield store
+    store.close()
+
+
+def write(path, body):
+    with open(path, 'wb') as f:
+        f.write(body)
+    return str(path)
+
+
+def test_identical_downloads_share_one_blob(tmp_path, store):
+    first, second = load_pdfs(limit=2)
+    a = store.add(write(tmp_path / "a.part", first), str(tmp_path / "a.pdf"))
+    b = store.add(write(tmp_path / "b.part", first), str(tmp_path / "b.pdf"))
+    c = store.add(write(tmp_path / "c.part", second), str(tmp_path / "c.pdf"))
+    assert a == b != c
+    assert os.path.samefile(tmp_path / "a.pdf", tmp_path / "b.pdf")
+    assert open(tmp_path / "b.pdf", 'rb').read() == first
+    assert not os.path.exists(tmp_path / "b.part")
+    blobs = [name for _, _, names in os.walk(store.root) for name in names if name.endswith('.pdf')]
+    assert sorted(blobs) == sorted([a + '.pdf', c + '.pdf'])
+
+
+def test_group_by_content_over_bundled_briefs(tmp_path, store):
+    pdfs = load_pdfs(limit=3)
+    paths = [write(tmp_path / f"{n}.pdf", body) for n, body in enumerate(pdfs + pdfs[:1])]
+    groups = store.group_by_content(paths)
+    assert list(groups.values()) == [[paths[0], paths[3]], [paths[1]], [paths[2]]]
+    assert list(groups) == [file_sha256(path) for path in paths[:3]]
+
+
+def test_digest_for_uses_manifest_until_file_changes(tmp_path, store):
+    body = load_pdfs(limit=1)[0]
+    target = str(tmp_path / "brief.pdf")
+    digest = store.import_file(write(target, body))
+    assert store.digest_for(target) == digest
+    # A replaced file of another size is hashed again
+    os.remove(target)
+    write(target, body + b"\n% appended")
+    assert store.digest_for(target) == file_sha256(target) != digest
+
+
+def test_import_existing_folder(tmp_path, store):
+    folder = tmp_path / "downloads"
+    folder.mkdir()
+    source = load_pdfs(limit=1)[0]
+    for name in ("x.pdf", "y.pdf"):
+        write(folder / name, source)
+    digests = {store.import_file(str(folder / name)) for name in ("x.pdf", "y.pdf")}
+    assert len(digests) == 1
+    assert os.path.samefile(folder / "x.pdf", store.blob_path(digests.pop()))
@@ -0,0 +1,94 @@
+import glob
+
+import pytest
+
+from brief_sections import heading_section, segment_brief, select_sections
+from pdf_extract import extract_text
+from text_normalize import normalize_text
+
+BRIEF = """IN THE COURT OF APPEALS
+IDENTITY OF PARTIES AND COUNSEL
+Appellant: John Doe
+TABLE OF CONTENTS
+STATEMENT OF FACTS ........ 2
+STATEMENT OF FACTS
+The appellant was stopped at night.
+ARGUMENT
+The stop was unlawful because the officer lacked suspicion.
+Conclusion
+The evidence should have been suppressed.
+PRAYER
+Appellant asks the Court to reverse.
+CERTIFICATE OF SERVICE
+Served on the State.
+"""
+
+
+def brief_text(case):
+    path, = glob.glob(f"CA*_2024_Briefs/{case}-CR Appellant Brief.pdf")
+    return normalize_text(extract_text(path))[0]
+
+
+@pytest.mark.parametrize("line, section", [
+    ("STATEMENT OF FACTS", 'facts'),
+    ("STATE MENT OF FACTS", 'facts'),
+    ("III. Argument and Authorities", 'argument'),
+    ("CONCLUSION AND PRAYER FOR RELIEF", 'prayer'),
+    ("TABLE OF CONTENTS", 'contents'),
+    ("CONCLUSION", None),
+    ("INDEX", None),
+    ("STATEMENT OF FACTS ........ 2", None),
+    ("The statement of facts is short.", None),
+])
+def test_heading_section(line, section):
+    assert heading_section(line) == section
+
+
+def test_segments_keep_a_bare_conclusion_inside_the_argument():
+    sections = segment_brief(BRIEF)
+    assert [section.name for section in sections] == [
+        'cover', 'parties', 'contents', 'facts', 'argument', 'prayer', 'certificates']
+    assert "should have been suppressed" in sections[4].text
+
+
+def test_recognised_sections_are_selected():
+    selected, found = select_sections(BRIEF)
+    assert found == ['facts', 'argument', 'prayer']
+    assert "stopped at night" in selected and "reverse" in selected
+    assert "John Doe" not in selected and "Served on" not in selected
+
+
+def test_all_sends_the_whole_text():
+    assert select_sections(BRIEF, "all") == (BRIEF, [])
+
+
+def test_text_without_headings_is_sent_whole():
+    text = "A letter to the clerk.\nIt has no headings at all.\n"
+    assert select_sections(text) == (text, [])
+
+
+def test_small_selection_falls_back_to_the_text_minus_boilerplate():
+    text = "COVER PAGE\n" + "Unheaded argument text.\n" * 200 + "PRAYER\nReverse.\nCERTIFICATE OF SERVICE\nServed.\n"
+    selected, found = select_sections(text)
+    assert found == ['cover', 'prayer']
+    assert selected.count("Unheaded argument text.") == 200 and "Served." not in selected
+
+
+def test_boilerplate_swallowing_the_brief_sends_the_whole_text():
+    text = "COVER PAGE\nORAL ARGUMENT REQUESTED\n" + "Unheaded argument text.\n" * 200
+    assert select_sections(text) == (text, [])
+
+
+@pytest.mark.parametrize("case", ["01-24-00090", "01-24-00719", "14-24-00755"])
+def test_briefs_with_missed_headings_keep_their_argument(case):
+    text = brief_text(case)
+    selected, found = select_sections(text)
+    assert 'cover' in found
+    assert len(selected) > 0.8 * len(text)
+
+
+def test_well_headed_brief_is_trimmed():
+    text = brief_text("01-24-00010")
+    selected, found = select_sections(text)
+    assert found == ['facts', 'argument', 'prayer']
+    assert 0.4 * len(text) < len(selected) < len(text)
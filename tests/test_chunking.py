@@ -0,0 +1,74 @@
+import glob
+
+from chunking import chunk_label, chunk_text, merge_results
+from pdf_extract import extract_text
+from text_normalize import CHARS_PER_TOKEN, normalize_text
+
+
+def result(percentage, confidence, tells, usage=None):
+    result = {'percentage_ai_generated': percentage, 'confidence_percentage': confidence, 'tells': tells}
+    if usage:
+        result['usage'] = usage
+    return result
+
+
+def test_percentages_are_weighted_by_chunk_length():
+    chunks = ["a" * 300, "b" * 100]
+    merged = merge_results([result(20, 80, []), result(60, 40, [])], chunks, "brief.pdf")
+    assert merged['percentage_ai_generated'] == 30
+    assert merged['confidence_percentage'] == 70
+    assert (merged['filename'], merged['chunks'], merged['chunks_analyzed']) == ("brief.pdf", 2, 2)
+
+
+def test_failed_chunks_scale_confidence_by_coverage():
+    chunks = ["a" * 300, "b" * 100]
+    merged = merge_results([result(20, 80, []), None], chunks, "brief.pdf")
+    assert merged['percentage_ai_generated'] == 20
+    assert merged['confidence_percentage'] == 60
+    assert merged['chunks_analyzed'] == 1
+
+
+def test_every_chunk_failing_gives_none():
+    assert merge_results([None, None], ["a", "b"], "brief.pdf") is None
+
+
+def test_tells_are_deduplicated_in_order_ignoring_case_and_spacing():
+    results = [result(10, 50, ["Repeated  phrasing", "Formal register"]),
+               result(10, 50, ["repeated phrasing", "Generic summaries"])]
+    merged = merge_results(results, ["a", "b"], "brief.pdf")
+    assert merged['tells'] == ["Repeated  phrasing", "Formal register", "Generic summaries"]
+
+
+def test_usage_is_summed_over_analyzed_chunks():
+    results = [result(10, 50, [], {'input_tokens': 100, 'output_tokens': 10}), None,
+               result(10, 50, [], {'input_tokens': 200, 'output_tokens': 20})]
+    merged = merge_results(results, ["a", "b", "c"], "brief.pdf")
+    assert merged['usage'] == {'input_tokens': 300, 'output_tokens': 30}
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("short", max_tokens=100) == ["short"]
+    assert chunk_text("x" * 10000, max_tokens=0) == ["x" * 10000]
+
+
+def test_chunks_are_even_and_break_at_sections():
+    text = "\n".join(["STATEMENT OF FACTS"] + ["A fact."] * 300 + ["ARGUMENT"] + ["A point."] * 300)
+    chunks = chunk_text(text, max_tokens=len(text) // CHARS_PER_TOKEN - 10)
+    assert len(chunks) == 2
+    assert chunks[1].startswith("ARGUMENT")
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+def test_bundled_brief_chunks_fit_and_keep_all_text():
+    path = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[0]
+    text = normalize_text(extract_text(path))[0]
+    chunks = chunk_text(text, max_tokens=4000)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 4000 * CHARS_PER_TOKEN for chunk in chunks)
+    assert min(map(len, chunks)) > 0.25 * max(map(len, chunks))
+    assert "\n".join(chunks).split() == text.split()
+
+
+def test_chunk_label():
+    assert chunk_label("brief.pdf", 0, 1) == "brief.pdf"
+    assert chunk_label("brief.pdf", 1, 3) == "brief.pdf (part 2 of 3)"
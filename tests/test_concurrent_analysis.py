@@ -0,0 +1,52 @@
+import asyncio
+from pathlib import Path
+
+import anthropic
+import pytest
+
+from batch_server import BatchServer
+
+PARAGRAPH = "The appellant argues that the trial court erred in admitting the evidence at trial."
+
+
+def document(name, chunks):
+    text = "\n\n".join(f"{PARAGRAPH} Paragraph {i} of {name}. " * 20 for i in range(chunks))
+    return {'path': Path(name), 'text': text, 'notes': [], 'result': None}
+
+
+def run(detector, documents):
+    """Analyze documents concurrently against the stand-in; return the peak number of requests in flight"""
+    create = detector.async_client.messages.create
+    in_flight, peak = 0, 0
+
+    async def counting_create(**request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            return await create(**request)
+        finally:
+            in_flight -= 1
+
+    detector.async_client.messages.create = counting_create
+    finished = []
+    asyncio.run(detector.analyze_documents_async(iter(documents), finished.append))
+    assert len(finished) == len(documents) and all(item['result'] for item in finished)
+    return peak
+
+
+@pytest.mark.parametrize("concurrency, chunk_workers, documents, peak", [
+    (2, 2, [document("long.pdf", 20)], 2),
+    (2, 8, [document("first.pdf", 10), document("second.pdf", 10)], 2),
+    (8, 3, [document("long.pdf", 20)], 3),
+    (4, 2, [document("first.pdf", 10), document("second.pdf", 10)], 4),
+])
+def test_chunk_requests_respect_concurrency_and_chunk_workers(make_detector, concurrency, chunk_workers, documents,
+                                                               peak):
+    with BatchServer() as server:
+        detector = make_detector(analysis_concurrency=concurrency, chunk_workers=chunk_workers, chunk_tokens=600,
+                                 requests_per_minute=1e6, input_tokens_per_minute=1e9)
+        detector.async_client = anthropic.AsyncAnthropic(api_key="stand-in", base_url=server.url, max_retries=0)
+        assert run(detector, documents) == peak
+    assert all(item['result']['chunks'] >= 10 for item in documents)
@@ -0,0 +1,69 @@
+import pytest
+
+from cost_planner import MIN_TRUNCATED_TOKENS, CostBudget, cost
+
+MODEL = "claude-3-5-sonnet-20241022"
+USAGE = {'input_tokens': 3000, 'cache_read_input_tokens': 0, 'cache_creation_input_tokens': 0, 'output_tokens': 200}
+
+
+def test_unlimited_budget_admits_everything():
+    budget = CostBudget(MODEL, 1000, max_dollars=None, max_input_tokens=None, action='stop')
+    assert budget.admit(10 ** 9) == 10 ** 9 and not budget.limited
+
+
+def test_reservation_is_replaced_by_reported_usage():
+    budget = CostBudget(MODEL, 1000, max_dollars=None, max_input_tokens=10000, action='stop')
+    assert budget.admit(6000) == 6000
+    assert budget.admit(6000) == 0 and budget.stopped
+    budget.settle(6000, USAGE)
+    assert budget.reserved == {'dollars': pytest.approx(0.0), 'input_tokens': 0}
+    assert budget.spent['input_tokens'] == 3000
+    assert budget.spent['dollars'] == pytest.approx(cost(MODEL, **USAGE))
+
+
+def test_stop_refuses_everything_after_the_first_miss():
+    budget = CostBudget(MODEL, 1000, max_dollars=None, max_input_tokens=5000, action='stop')
+    assert budget.admit(6000) == 0
+    assert budget.admit(100) == 0
+    assert budget.summary() == "Budget: 0 of 5,000 input tokens spent; 0 requests truncated, 0 skipped, run stopped"
+
+
+def test_skip_drops_the_request_and_carries_on():
+    budget = CostBudget(MODEL, 1000, max_dollars=None, max_input_tokens=5000, action='skip')
+    assert budget.admit(6000) == 0
+    assert budget.admit(4000) == 4000
+    assert budget.stats == {'truncated': 0, 'skipped': 1} and not budget.stopped
+
+
+def test_truncate_shrinks_to_what_is_left_down_to_the_minimum():
+    budget = CostBudget(MODEL, 1000, max_dollars=None, max_input_tokens=10000, action='truncate')
+    assert budget.admit(7000) == 7000
+    assert budget.admit(5000) == 3000
+    assert budget.admit(5000) == 0
+    assert budget.stats == {'truncated': 1, 'skipped': 1}
+
+
+def test_requests_that_cannot_be_cut_are_skipped_instead_of_truncated():
+    budget = CostBudget(MODEL, 1000, max_dollars=None, max_input_tokens=MIN_TRUNCATED_TOKENS * 3, action='truncate')
+    assert budget.admit(MIN_TRUNCATED_TOKENS * 4, truncate=False) == 0
+    assert budget.stats == {'truncated': 0, 'skipped': 1}
+
+
+def test_dollar_limit_keeps_room_for_max_tokens_of_output():
+    budget = CostBudget(MODEL, 1000, max_dollars=0.05, max_input_tokens=None, action='truncate')
+    # $0.05 less $0.015 for 1,000 output tokens leaves $0.035, about 11,666 input tokens at $3 per million
+    assert budget.admit(50000) == 11666
+    assert budget.summary() == "Budget: $0.00 of $0.05 spent; 1 requests truncated, 0 skipped"
+
+
+def test_batch_budget_is_priced_at_the_discount():
+    interactive = CostBudget(MODEL, 1000, max_dollars=0.05, max_input_tokens=None, action='truncate')
+    batch = CostBudget(MODEL, 1000, max_dollars=0.05, max_input_tokens=None, action='truncate', batch=True)
+    assert interactive.admit(50000) == 11666
+    # Half price for both: $0.05 less $0.0075 of output leaves about 28,333 input tokens at $1.50 per million
+    assert batch.admit(50000) == 28333
+
+
+def test_unknown_action_is_rejected():
+    with pytest.raises(ValueError, match="unknown budget action 'pause'"):
+        CostBudget(MODEL, 1000, action='pause')
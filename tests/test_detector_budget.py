@@ -0,0 +1,53 @@
+import anthropic
+import pytest
+
+from ai_detector import MAX_TOKENS, MODEL
+from batch_server import BatchServer
+from cost_planner import CostBudget, cost, usage_counts
+
+TEXT = "The appellant argues that the trial court erred in admitting the evidence. " * 600
+
+
+@pytest.fixture
+def detector(make_detector):
+    with BatchServer(processing_seconds=0) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        yield detector
+
+
+def test_full_analysis_is_cached_under_its_text(detector):
+    detector.cost_budget = CostBudget(MODEL, MAX_TOKENS, max_dollars=None, max_input_tokens=None, action='stop')
+    result = detector.analyze_text(TEXT, "brief.pdf")
+    assert result and result['filename'] == "brief.pdf"
+    assert detector.analyze_text(TEXT, "copy.pdf")['filename'] == "copy.pdf"
+    assert detector.result_cache.stats == {'hits': 1, 'misses': 1, 'stored': 1}
+
+
+def test_truncated_analysis_is_not_cached(detector):
+    detector.cost_budget = CostBudget(MODEL, MAX_TOKENS, max_dollars=None, max_input_tokens=5000, action='truncate')
+    assert detector.analyze_text(TEXT, "brief.pdf")
+    assert detector.cost_budget.stats['truncated'] == 1
+    assert detector.result_cache.stats['stored'] == 0
+    assert detector.result_cache.get(TEXT) is None
+
+
+def test_batch_repair_retry_is_charged_at_full_price(make_detector):
+    with BatchServer(processing_seconds=0, invalid_rate=1.0) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        detector.cost_budget = CostBudget(MODEL, MAX_TOKENS, max_dollars=10.0, max_input_tokens=None, action='stop',
+                                          batch=True)
+        request = detector.build_request(TEXT, "brief.pdf")
+        response = detector.client.messages.create(**request)
+        result, usage = detector.complete_response(request, response, "brief.pdf")
+
+    assert server.stats['invalid'] == server.stats['messages'] - 1 == 1
+    assert result and usage == usage_counts(response.usage)
+    repair_usage = {name: result['usage'][name] - usage[name] for name in usage}
+    assert detector.cost_budget.spent['dollars'] == pytest.approx(cost(MODEL, **repair_usage))
+    assert detector.cost_budget.reserved['dollars'] == pytest.approx(0.0)
+    # The batch request itself is settled by the caller, at the discount
+    detector.cost_budget.settle(0, usage)
+    assert detector.cost_budget.spent['dollars'] == pytest.approx(cost(MODEL, **repair_usage)
+                                                                  + cost(MODEL, batch=True, **usage))
@@ -0,0 +1,75 @@
+import math
+
+import pytest
+import requests
+
+import CCA_scraper
+import appeals_scraper
+from docket_boundary import find_last_case
+from http_cache import DocketCache
+from replay_server import ReplayServer
+
+
+class Docket:
+    """exists() over a set of case numbers, counting probes"""
+
+    def __init__(self, cases):
+        self.cases = set(cases)
+        self.probes = []
+
+    def __call__(self, n):
+        self.probes.append(n)
+        return n in self.cases
+
+
+@pytest.mark.parametrize("last", [1, 2, 3, 7, 8, 9, 100, 513, 1081, 4096])
+def test_finds_last_case_in_logarithmic_probes(last):
+    docket = Docket(range(1, last + 1))
+    assert find_last_case(docket) == last
+    assert len(set(docket.probes)) <= 4 * (math.log2(last) + 2)
+
+
+def test_steps_over_gaps_narrower_than_the_window():
+    assert find_last_case(Docket(set(range(1, 51)) - {17, 18, 32, 33})) == 50
+    assert find_last_case(Docket(set(range(1, 51)) - {16, 17, 18}), window=4) == 50
+
+
+def test_empty_docket_and_start_offset():
+    assert find_last_case(Docket([])) == 0
+    assert find_last_case(Docket(range(1, 30)), start=40) == 39
+    assert find_last_case(Docket(range(1, 300)), start=100) == 299
+
+
+def test_max_case_caps_the_search():
+    docket = Docket(range(1, 1000))
+    assert find_last_case(docket, max_case=120) == 120
+    assert max(docket.probes) <= 120
+
+
+def test_probes_docket_pages_on_replay_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(appeals_scraper, "docket_cache", DocketCache(str(tmp_path)))
+    with ReplayServer(synthetic_cases=37, pdfs=[], latency=0, jitter=0) as server:
+        monkeypatch.setattr(appeals_scraper, "BASE_URL", server.url)
+        assert appeals_scraper.find_docket_end(1, http_session=requests.Session()) == 37
+        assert server.stats['pages'] < 37
+
+
+def test_cca_docket_end_on_replay_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(CCA_scraper, "docket_cache", DocketCache(str(tmp_path)))
+    with ReplayServer(synthetic_cases=23, pdfs=[], latency=0, jitter=0) as server:
+        monkeypatch.setattr(CCA_scraper, "BASE_URL", server.url)
+        assert CCA_scraper.find_docket_end() == 23
+
+
+def test_cca_docket_end_falls_back_when_the_first_case_is_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(CCA_scraper, "docket_cache", DocketCache(str(tmp_path)))
+    with ReplayServer(synthetic_cases=0, pdfs=[], latency=0, jitter=0) as server:
+        monkeypatch.setattr(CCA_scraper, "BASE_URL", server.url)
+        assert CCA_scraper.find_docket_end() == CCA_scraper.DEFAULT_LAST_CASE
+
+
+def test_cca_docket_end_stops_at_four_digit_case_numbers(monkeypatch):
+    docket = Docket(range(1, 20000))
+    monkeypatch.setattr(CCA_scraper, "case_exists", docket)
+    assert CCA_scraper.find_docket_end() == 9999
+    assert max(docket.probes) <= 9999
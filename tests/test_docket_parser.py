@@ -0,0 +1,40 @@
+from bs4 import BeautifulSoup
+
+import CCA_scraper
+import test_scraper
+from bench_docket_parser import sample_docket_page
+from docket_parser import parse_docket
+from replay_server import EMPTY_PAGE
+
+
+def test_sample_page_record():
+    record = parse_docket(sample_docket_page("PD-0451-24", events=10, briefs=4))
+    assert record['case_events_section'] and record['briefs_section']
+    assert len(record['events']) == 10 and len(record['briefs']) == 4
+    assert record['events'][0]['event_type'] == "PDR FILED"
+    assert record['events'][0]['documents'][0]['doc_type'] == "PETITION"
+    assert [brief['description'] for brief in record['briefs']] == ["Appellant", "State", "Appellant", "State"]
+    assert record['disposition'] == 'refused'
+
+
+def test_granted_and_open_dispositions():
+    page = sample_docket_page("PD-0452-24")
+    assert parse_docket(page.replace(b"<td>Refused</td>", b"<td>Granted</td>"))['disposition'] == 'granted'
+    assert parse_docket(page.replace(b"PDR DISP", b"MOTION FILED"))['disposition'] is None
+
+
+def test_empty_and_missing_pages():
+    for content in (b"", EMPTY_PAGE):
+        record = parse_docket(content)
+        assert not record['case_events_section'] and not record['briefs_section']
+        assert record['events'] == [] and record['disposition'] is None
+
+
+def test_lookups_match_the_beautifulsoup_originals():
+    """The single-pass parser finds the same petition, brief and disposition as the old per-lookup scans"""
+    for n, page in enumerate([sample_docket_page(f"PD-{n:04d}-24", events=5 + n, briefs=n % 4) for n in range(1, 9)]):
+        soup = BeautifulSoup(page, 'html.parser')
+        docket = parse_docket(page)
+        assert CCA_scraper.get_pdr_disposition(docket) == test_scraper.get_pdr_disposition(soup)
+        assert CCA_scraper.find_petition_document(docket) == test_scraper.find_petition_document(soup)
+        assert CCA_scraper.find_appellant_brief(docket) == test_scraper.find_appellant_brief(soup)
@@ -0,0 +1,45 @@
+import requests
+
+from bench_docket_parser import sample_docket_page
+from http_cache import DocketCache
+from replay_server import ReplayServer, load_pdfs
+
+
+def make_server():
+    open_page = sample_docket_page("PD-0002-24").replace(b"PDR DISP", b"MOTION FILED")
+    return ReplayServer(pages={"PD-0001-24": sample_docket_page("PD-0001-24"), "PD-0002-24": open_page},
+                        pdfs=load_pdfs(limit=1), latency=0, jitter=0)
+
+
+def test_fresh_pages_come_from_disk(tmp_path):
+    cache = DocketCache(str(tmp_path), open_ttl_hours=1, closed_ttl_hours=1)
+    with make_server() as server:
+        url = f"{server.url}/Case.aspx?cn=PD-0001-24&coa=coscca"
+        first = cache.fetch(requests.Session(), url)
+        assert cache.fetch(requests.Session(), url) == first
+        assert server.stats['pages'] == 1
+    assert cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 1}
+    # A new cache object over the same directory still has the page
+    assert DocketCache(str(tmp_path)).fetch(None, url) == first
+
+
+def test_closed_cases_keep_their_longer_ttl(tmp_path):
+    cache = DocketCache(str(tmp_path), open_ttl_hours=0, closed_ttl_hours=24, is_closed=lambda body: b'PDR DISP' in body)
+    with make_server() as server:
+        session = requests.Session()
+        for _ in range(2):
+            cache.fetch(session, f"{server.url}/Case.aspx?cn=PD-0001-24&coa=coscca")
+            cache.fetch(session, f"{server.url}/Case.aspx?cn=PD-0002-24&coa=coscca")
+        # The closed case is fetched once, the open one every time
+        assert server.stats['pages'] == 3
+    assert cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 3}
+
+
+def test_expired_entries_are_revalidated_with_etag(tmp_path):
+    cache = DocketCache(str(tmp_path), open_ttl_hours=0)
+    with make_server() as server:
+        url = f"{server.url}/SearchMedia.aspx?MediaVersionID=1"
+        first = cache.fetch(requests.Session(), url)
+        assert cache.fetch(requests.Session(), url) == first
+        assert server.stats['not_modified'] == 1
+    assert cache.stats == {'hits': 0, 'revalidated': 1, 'misses': 1}
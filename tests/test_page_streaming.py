@@ -0,0 +1,44 @@
+import glob
+
+import PyPDF2
+import pytest
+
+from pdf_extract import extract_text, iter_pages
+
+BRIEF = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[2]
+
+
+def test_iter_pages_yields_numbered_pages_matching_extract_text():
+    pages = list(iter_pages(BRIEF))
+    assert [number for number, _ in pages] == list(range(1, len(pages) + 1))
+    assert extract_text(BRIEF) == "".join(text + "\n\f" for _, text in pages)
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Count the pages whose text PyPDF2 actually extracts"""
+    parsed = []
+    extract = PyPDF2.PageObject.extract_text
+
+    def counting_extract(page, *args, **kwargs):
+        parsed.append(page)
+        return extract(page, *args, **kwargs)
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", counting_extract)
+    return parsed
+
+
+def test_stopping_early_reads_only_the_pages_consumed(parsed):
+    pages = iter_pages(BRIEF, backend='pypdf2')
+    first_two = [next(pages), next(pages)]
+    pages.close()
+    assert [number for number, _ in first_two] == [1, 2]
+    assert len(parsed) == 2
+
+
+def test_max_chars_stops_after_the_page_that_reaches_it(parsed):
+    full = extract_text(BRIEF, backend='pypdf2')
+    pages = len(parsed)
+    short = extract_text(BRIEF, max_chars=2000, backend='pypdf2')
+    assert full.startswith(short)
+    assert 2000 <= len(short) < len(full)
+    assert len(parsed) - pages == short.count("\f") < full.count("\f")
@@ -0,0 +1,67 @@
+import glob
+
+import pytest
+
+import pdf_extract
+from pdf_extract import Backend, BackendSelector, extract_text
+
+BRIEF = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[0]
+
+
+def fake_backend(name, pages):
+    def iter_pages(pdf_path):
+        for number, text in enumerate(pages, 1):
+            if isinstance(text, Exception):
+                raise text
+            yield number, text
+    return Backend(name, '1.0', iter_pages)
+
+
+def test_unmeasured_backends_are_tried_first():
+    fast, slow, new = fake_backend('fast', []), fake_backend('slow', []), fake_backend('new', [])
+    selector = BackendSelector([fast, slow, new])
+    selector.record(fast, pages=10, seconds=1.0, ok=True)
+    selector.record(slow, pages=10, seconds=5.0, ok=True)
+    assert [backend.name for backend in selector.ranked()] == ['new', 'fast', 'slow']
+
+
+def test_failure_rate_outranks_speed():
+    fast, careful = fake_backend('fast', []), fake_backend('careful', [])
+    selector = BackendSelector([fast, careful])
+    selector.record(fast, pages=10, seconds=0.1, ok=False)
+    selector.record(fast, pages=10, seconds=0.1, ok=True)
+    selector.record(careful, pages=10, seconds=10.0, ok=True)
+    assert [backend.name for backend in selector.ranked()] == ['careful', 'fast']
+
+
+def test_auto_falls_back_when_a_backend_returns_too_little_text(monkeypatch):
+    sparse = fake_backend('sparse', ["x", "y"])
+    full = fake_backend('full', ["a" * 200, "b" * 200])
+    monkeypatch.setattr(pdf_extract, 'selector', BackendSelector([sparse, full]))
+    assert extract_text("unused.pdf", backend='auto') == "a" * 200 + "\n\f" + "b" * 200 + "\n\f"
+    stats = pdf_extract.selector.stats
+    assert stats['sparse']['failures'] == 1 and stats['full']['failures'] == 0
+
+
+def test_auto_skips_a_backend_that_raises(monkeypatch):
+    broken = fake_backend('broken', [ValueError("bad xref")])
+    full = fake_backend('full', ["a" * 200])
+    monkeypatch.setattr(pdf_extract, 'selector', BackendSelector([broken, full]))
+    assert extract_text("unused.pdf", backend='auto') == "a" * 200 + "\n\f"
+    assert pdf_extract.selector.stats['broken']['failures'] == 1
+
+
+def test_longest_text_is_returned_when_no_backend_is_good_enough(monkeypatch):
+    short, longer = fake_backend('short', ["x"]), fake_backend('longer', ["xyz"])
+    monkeypatch.setattr(pdf_extract, 'selector', BackendSelector([short, longer]))
+    assert extract_text("unused.pdf", backend='auto') == "xyz\n\f"
+
+
+def test_named_backend_reads_a_bundled_brief():
+    text = extract_text(BRIEF, backend='pypdf2')
+    assert len(text) > 10000 and "\f" in text
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="unknown or uninstalled PDF backend 'nope'"):
+        extract_text(BRIEF, backend='nope')
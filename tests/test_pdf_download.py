@@ -0,0 +1,63 @@
+import os
+
+import pytest
+import requests
+
+from pdf_download import DownloadError, stream_download
+from replay_server import ReplayServer, load_pdfs
+
+PDF = load_pdfs(limit=1)[0]
+
+
+class RecordingSession(requests.Session):
+    """Session that remembers the Range header and status of every response"""
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def get(self, url, **kwargs):
+        response = super().get(url, **kwargs)
+        self.seen.append((kwargs.get('headers', {}).get('Range'), response.status_code))
+        return response
+
+
+@pytest.fixture
+def server():
+    with ReplayServer(pdfs=[PDF], latency=0, jitter=0) as server:
+        yield server
+
+
+def test_download_writes_verified_file(server, tmp_path):
+    target = str(tmp_path / "brief.pdf")
+    assert stream_download(requests.Session(), f"{server.url}/SearchMedia.aspx?MediaID=1", target) == len(PDF)
+    assert open(target, 'rb').read() == PDF
+    assert not os.path.exists(target + '.part')
+
+
+def test_partial_file_is_resumed_with_range_request(server, tmp_path):
+    target = str(tmp_path / "brief.pdf")
+    with open(target + '.part', 'wb') as f:
+        f.write(PDF[:len(PDF) // 2])
+    session = RecordingSession()
+    stream_download(session, f"{server.url}/SearchMedia.aspx?MediaID=1", target)
+    assert session.seen == [(f"bytes={len(PDF) // 2}-", 206)]
+    assert open(target, 'rb').read() == PDF
+
+
+def test_partial_file_longer_than_pdf_restarts_after_416(server, tmp_path):
+    target = str(tmp_path / "brief.pdf")
+    with open(target + '.part', 'wb') as f:
+        f.write(PDF + b"stale bytes from another file")
+    session = RecordingSession()
+    stream_download(session, f"{server.url}/SearchMedia.aspx?MediaID=1", target)
+    assert [status for _, status in session.seen] == [416, 200]
+    assert open(target, 'rb').read() == PDF
+
+
+def test_non_pdf_is_rejected_and_not_kept(tmp_path):
+    target = str(tmp_path / "brief.pdf")
+    with ReplayServer(pdfs=[b"<html>Session expired</html>"], latency=0, jitter=0) as server:
+        with pytest.raises(DownloadError, match="not a PDF"):
+            stream_download(requests.Session(), f"{server.url}/SearchMedia.aspx?MediaID=1", target)
+    assert not os.path.exists(target) and not os.path.exists(target + '.part')
@@ -0,0 +1,24 @@
+import glob
+
+import pytest
+
+from pdf_extract import extract_text, extract_texts
+
+BRIEFS = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[:4]
+
+
+def test_pool_extraction_matches_serial_extraction():
+    extractions = {extraction.path: extraction for extraction in extract_texts(BRIEFS, workers=2, timeout=60)}
+    assert sorted(extractions) == BRIEFS
+    for path in BRIEFS:
+        assert extractions[path].error is None
+        assert extractions[path].text == extract_text(path)
+    assert sum(len(extraction.text) > 10000 for extraction in extractions.values()) >= 2
+
+
+def test_unreadable_file_is_reported_without_stopping_the_others(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4\nthis is not really a pdf")
+    extractions = {str(e.path): e for e in extract_texts([str(broken)] + BRIEFS[:2], workers=2, timeout=60)}
+    assert extractions[str(broken)].error and extractions[str(broken)].text == ""
+    assert all(extractions[path].text and extractions[path].error is None for path in BRIEFS[:2])
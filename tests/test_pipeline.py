@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import run_pipeline
+
+
+def test_items_keep_their_order_through_every_stage():
+    def slow_double(n):
+        time.sleep(0.001 * (n % 3))
+        return n * 2
+    assert list(run_pipeline(range(50), [slow_double, str], depth=2)) == [str(n * 2) for n in range(50)]
+
+
+def test_stage_returning_none_drops_the_item():
+    assert list(run_pipeline(range(10), [lambda n: n if n % 2 else None])) == [1, 3, 5, 7, 9]
+
+
+def test_stages_overlap():
+    def stage(n):
+        time.sleep(0.05)
+        return n
+    start = time.perf_counter()
+    assert list(run_pipeline(range(6), [stage, stage])) == list(range(6))
+    # Serial would take 6 * 2 * 0.05 = 0.6 s; overlapped it takes about 7 * 0.05
+    assert time.perf_counter() - start < 0.5
+
+
+def test_queues_bound_how_far_the_source_runs_ahead():
+    consumed = []
+
+    def source():
+        for n in range(100):
+            consumed.append(n)
+            yield n
+
+    results = run_pipeline(source(), [lambda n: n], depth=2)
+    assert next(results) == 0
+    time.sleep(0.3)
+    # Two queues of two, one item in the stage, one in the source's hand, and the one yielded
+    assert len(consumed) <= 7
+    results.close()
+
+
+@pytest.mark.parametrize("where", ["source", "stage"])
+def test_exceptions_are_raised_to_the_consumer(where):
+    def source():
+        yield 1
+        if where == "source":
+            raise ValueError("bad source")
+        yield 2
+
+    def stage(n):
+        if where == "stage" and n == 2:
+            raise ValueError("bad stage")
+        return n
+
+    results = run_pipeline(source(), [stage])
+    assert next(results) == 1
+    with pytest.raises(ValueError, match=f"bad {where}"):
+        next(results)
+
+
+def test_stopping_early_stops_the_threads_and_closes_the_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            n = 0
+            while True:
+                yield n
+                n += 1
+        finally:
+            closed.set()
+
+    before = threading.active_count()
+    for item in run_pipeline(source(), [lambda n: n, lambda n: n], depth=1):
+        if item == 3:
+            break
+    assert closed.wait(2)
+    assert threading.active_count() == before
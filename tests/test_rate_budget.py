@@ -0,0 +1,91 @@
+import asyncio
+import types
+
+import pytest
+
+import rate_budget
+from rate_budget import RateBudget
+
+
+class FakeClock:
+    """Stands in for time.monotonic and asyncio.sleep, so pacing is checked without waiting"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_budget, 'time', types.SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_budget, 'asyncio', types.SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+def acquire_all(budget, sizes):
+    async def run():
+        for tokens in sizes:
+            await budget.acquire(tokens)
+    asyncio.run(run())
+
+
+def test_a_full_bucket_sends_at_once(clock):
+    budget = RateBudget(requests_per_minute=10, input_tokens_per_minute=10000, headroom=1.0)
+    acquire_all(budget, [1000] * 10)
+    assert clock.now == 1000.0 and budget.stats['waited'] == 0
+
+
+def test_requests_per_minute_paces_after_the_burst(clock):
+    budget = RateBudget(requests_per_minute=10, input_tokens_per_minute=1e9, headroom=1.0)
+    acquire_all(budget, [1] * 13)
+    # Ten from the full bucket, then one every six seconds
+    assert clock.now - 1000.0 == pytest.approx(18.0)
+    assert budget.stats['requests'] == 13
+
+
+def test_input_tokens_per_minute_paces_large_requests(clock):
+    budget = RateBudget(requests_per_minute=1000, input_tokens_per_minute=6000, headroom=1.0)
+    acquire_all(budget, [3000, 3000, 3000])
+    assert clock.now - 1000.0 == pytest.approx(30.0)
+    assert budget.stats['tokens'] == 9000
+
+
+def test_headroom_shrinks_both_limits(clock):
+    budget = RateBudget(requests_per_minute=100, input_tokens_per_minute=10000, headroom=0.5)
+    assert budget.request_capacity == 50 and budget.token_capacity == 5000
+    acquire_all(budget, [5000, 5000])
+    assert clock.now - 1000.0 == pytest.approx(60.0)
+
+
+def test_request_larger_than_a_minute_waits_for_a_full_bucket(clock):
+    budget = RateBudget(requests_per_minute=1000, input_tokens_per_minute=6000, headroom=1.0)
+    acquire_all(budget, [100, 50000])
+    assert clock.now - 1000.0 == pytest.approx(1.0)
+    assert budget.stats['tokens'] == 50100
+
+
+def test_pause_holds_every_caller_back(clock):
+    budget = RateBudget(requests_per_minute=1000, input_tokens_per_minute=1e9, headroom=1.0)
+    budget.pause(30)
+    budget.pause(5)
+    acquire_all(budget, [1, 1])
+    assert clock.now - 1000.0 == pytest.approx(30.0)
+    assert budget.stats['pauses'] == 2
+    assert budget.summary() == ("Rate budget: 2 requests, ~2 input tokens, 30 s spent pacing, "
+                                "2 rate-limit pauses")
+
+
+def test_concurrent_callers_share_the_budget(clock):
+    budget = RateBudget(requests_per_minute=6, input_tokens_per_minute=1e9, headroom=1.0)
+
+    async def run():
+        await asyncio.gather(*(budget.acquire(1) for _ in range(8)))
+    asyncio.run(run())
+    assert budget.stats['requests'] == 8
+    assert clock.now - 1000.0 == pytest.approx(20.0)
@@ -0,0 +1,50 @@
+import gzip
+import json
+import os
+
+import requests
+
+from docket_parser import parse_docket
+from replay_server import EMPTY_PAGE, ReplayServer, load_recordings
+
+
+def test_synthetic_dockets_end_at_synthetic_cases():
+    with ReplayServer(synthetic_cases=5, pdfs=[], latency=0, jitter=0) as server:
+        def page(case_number):
+            return requests.get(f"{server.url}/Case.aspx", params={'cn': case_number}).content
+
+        assert parse_docket(page("PD-0005-24"))['case_events_section']
+        assert parse_docket(page("01-24-00003-CR"))['briefs'][0]['event_type'] == "Brief filed"
+        assert page("PD-0006-24") == EMPTY_PAGE
+        assert page("garbage") == EMPTY_PAGE
+        assert server.stats['pages'] == 4
+
+
+def test_injected_errors_carry_retry_after():
+    with ReplayServer(pdfs=[], latency=0, jitter=0, error_rate=1.0, retry_after=3) as server:
+        response = requests.get(f"{server.url}/Case.aspx?cn=PD-0001-24")
+    assert response.status_code == 503 and response.headers['Retry-After'] == "3"
+    assert server.stats['errors'] == 1
+
+
+def test_pdfs_support_etag_and_range():
+    body = b"%PDF-1.4\n" + bytes(range(256)) * 40 + b"\n%%EOF\n"
+    with ReplayServer(pdfs=[body], latency=0, jitter=0) as server:
+        url = f"{server.url}/SearchMedia.aspx?MediaVersionID=9"
+        full = requests.get(url)
+        assert full.content == body
+        assert requests.get(url, headers={'If-None-Match': full.headers['ETag']}).status_code == 304
+        tail = requests.get(url, headers={'Range': 'bytes=100-'})
+        assert tail.status_code == 206 and tail.content == body[100:]
+        assert requests.get(url, headers={'Range': f'bytes={len(body)}-'}).status_code == 416
+
+
+def test_load_recordings_from_html_files_and_docket_cache(tmp_path):
+    with open(tmp_path / "PD-0001-24.html", 'wb') as f:
+        f.write(b"<html>one</html>")
+    os.makedirs(tmp_path / "ab")
+    with open(tmp_path / "ab" / "abcd.json", 'w') as f:
+        json.dump({'url': "https://search.txcourts.gov/Case.aspx?cn=PD-0002-24&coa=coscca"}, f)
+    with gzip.open(tmp_path / "ab" / "abcd.html.gz", 'wb') as f:
+        f.write(b"<html>two</html>")
+    assert load_recordings(str(tmp_path)) == {"PD-0001-24": b"<html>one</html>", "PD-0002-24": b"<html>two</html>"}
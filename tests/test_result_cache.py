@@ -0,0 +1,70 @@
+import pytest
+
+from result_cache import ResultCache
+
+RESULT = {'percentage_ai_generated': 20, 'confidence_percentage': 70, 'tells': ["Repeated phrasing"],
+          'filename': "01-24-00010-CR Appellant Brief.pdf", 'usage': {'input_tokens': 900, 'output_tokens': 80}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache("v1", "claude-3-5-sonnet", 1000, path=str(tmp_path / "results.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_result_is_returned_without_per_call_fields(cache):
+    assert cache.get("brief text") is None
+    cache.put("brief text", RESULT)
+    assert cache.get("brief text") == {'percentage_ai_generated': 20, 'confidence_percentage': 70,
+                                       'tells': ["Repeated phrasing"]}
+    assert cache.stats == {'hits': 1, 'misses': 1, 'stored': 1}
+
+
+def test_prompt_model_and_max_tokens_are_part_of_the_key(cache, tmp_path):
+    cache.put("brief text", RESULT)
+    path = str(tmp_path / "results.sqlite3")
+    for prompt_version, model, max_tokens in [("v2", "claude-3-5-sonnet", 1000), ("v1", "claude-3-haiku", 1000),
+                                              ("v1", "claude-3-5-sonnet", 2000)]:
+        other = ResultCache(prompt_version, model, max_tokens, path=path)
+        assert other.get("brief text") is None
+        other.close()
+    assert cache.get("brief text ") is None
+
+
+def test_results_survive_reopening(cache, tmp_path):
+    cache.put("brief text", RESULT)
+    cache.close()
+    reopened = ResultCache("v1", "claude-3-5-sonnet", 1000, path=str(tmp_path / "results.sqlite3"))
+    assert reopened.get("brief text")['tells'] == ["Repeated phrasing"]
+    reopened.close()
+
+
+def test_invalidate_by_criteria(cache, tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    cache.put("first", RESULT)
+    cache.put("second", RESULT)
+    other = ResultCache("v2", "claude-3-5-sonnet", 1000, path=path)
+    other.put("first", RESULT)
+    assert cache.invalidate(text="first", prompt_version="v1") == 1
+    assert cache.get("first") is None and other.get("first") is not None
+    assert cache.invalidate(prompt_version="v2") == 1
+    assert cache.invalidate() == 1
+    other.close()
+
+
+def test_least_recently_used_results_are_evicted(cache, tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("result_cache.time.time", lambda: next(clock))
+    for text in ["a", "b", "c", "d"]:
+        cache.put(text, RESULT)
+    cache.get("a")
+    assert cache.evict(max_entries=2, max_age_days=0) == 2
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.get("b") is None and cache.get("c") is None
+
+
+def test_entries_group_by_prompt_and_model(cache, tmp_path):
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    assert cache.entries() == [("v1", "claude-3-5-sonnet", 1000, 2)]
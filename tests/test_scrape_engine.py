@@ -0,0 +1,133 @@
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+import scrape_engine
+from replay_server import ReplayServer
+from scrape_engine import (MAX_BACKOFF, AdaptiveRateController, HostRateLimiter, configure_session, parse_retry_after,
+                           retry_delay, scrape_cases_async)
+
+
+def test_scrape_cases_async_reports_in_case_order():
+    """Results arrive out of order from the workers but are reported in case order"""
+    delays = {case: random.Random(case).uniform(0, 0.05) for case in range(1, 21)}
+    in_flight, peak, lock = 0, 0, threading.Lock()
+
+    def scrape(case):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(delays[case])
+        with lock:
+            in_flight -= 1
+        return f"result {case}"
+
+    reported = []
+    asyncio.run(scrape_cases_async(scrape, range(1, 21), max_in_flight=4,
+                                   on_result=lambda case, result: reported.append((case, result))))
+    assert reported == [(case, f"result {case}") for case in range(1, 21)]
+    assert 1 < peak <= 4
+
+
+def test_scrape_cases_async_stops_starting_cases():
+    """Once on_result returns True no new cases start, but the ones in flight are still reported"""
+    started = []
+
+    def scrape(case):
+        started.append(case)
+        time.sleep(0.01)
+        return case
+
+    reported = []
+
+    def on_result(case, result):
+        reported.append(case)
+        return case == 5
+
+    asyncio.run(scrape_cases_async(scrape, range(1, 101), max_in_flight=3, on_result=on_result))
+    assert reported == sorted(reported) == list(range(1, len(reported) + 1))
+    assert 5 <= len(reported) <= 5 + 3
+    assert len(started) == len(reported)
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter(requests_per_second=10)
+    assert limiter.reserve("https://a.example/1") == 0
+    assert abs(limiter.reserve("https://a.example/2") - 0.1) < 0.01
+    # Another host has its own schedule
+    assert limiter.reserve("https://b.example/1") == 0
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def http_error(status_code, headers=None):
+    return requests.exceptions.HTTPError(response=FakeResponse(status_code, headers))
+
+
+def test_retry_delay_honours_retry_after_and_skips_client_errors():
+    assert retry_delay(http_error(429, {'Retry-After': '7'}), 0) == 7
+    assert retry_delay(http_error(503, {'Retry-After': '600'}), 0) == MAX_BACKOFF
+    assert retry_delay(http_error(404), 0) is None
+    assert retry_delay(ValueError("not a network error"), 0) is None
+    for error in (http_error(500), http_error(503), requests.exceptions.ConnectionError(), requests.exceptions.Timeout()):
+        for attempt in range(4):
+            assert 0 <= retry_delay(error, attempt) <= min(MAX_BACKOFF, 2.0 ** (attempt + 1))
+
+
+def test_parse_retry_after_formats():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 <= parse_retry_after(later) <= 31
+
+
+def test_controller_grows_while_healthy_and_halves_on_throttling():
+    controller = AdaptiveRateController(max_rate=40.0, max_in_flight=8, initial_rate=20.0, increase_step=10.0)
+    url = "https://search.example/Case.aspx"
+    for _ in range(10):
+        controller.acquire(url)
+        controller.release(url, 200, latency=0.01)
+    assert controller.rate == 40.0
+    assert controller.concurrency > 1
+    concurrency = controller.concurrency
+
+    controller.in_flight = 1
+    controller.release(url, 503, latency=0.01, retry_after=5)
+    assert controller.rate == 20.0 and controller.concurrency == max(1, int(concurrency * 0.5))
+    assert controller.stats['throttled'] == 1
+    # A burst of failures within a second counts as one signal
+    controller.in_flight = 1
+    controller.release(url, 500, latency=0.01)
+    assert controller.rate == 20.0 and controller.stats['errors'] == 1
+    # Retry-After blocks the host
+    assert controller._blocked_until[urlparse(url).netloc] > time.monotonic() + 4
+
+
+def test_slow_responses_do_not_raise_the_rate():
+    controller = AdaptiveRateController(max_rate=5.0, max_in_flight=4, initial_rate=1.0, target_latency=0.5)
+    for _ in range(5):
+        controller.in_flight = 1
+        controller.release("https://a.example/", 200, latency=2.0)
+    assert controller.rate == 1.0 and controller.concurrency == 1
+    assert controller.stats['slow'] == 5
+
+
+def test_adaptive_session_against_replay_server(monkeypatch):
+    monkeypatch.setattr(scrape_engine, "INITIAL_REQUESTS_PER_SECOND", 50.0)
+    with ReplayServer(pdfs=[], latency=0, jitter=0, error_rate=0.3, retry_after=0, seed=3) as server:
+        session = requests.Session()
+        controller = configure_session(session, max_in_flight=4, requests_per_second=50)
+        statuses = [session.get(f"{server.url}/Case.aspx?cn=PD-{n:04d}-24").status_code for n in range(1, 16)]
+    assert statuses.count(503) == server.stats['errors'] > 0
+    assert controller.stats['throttled'] == server.stats['errors']
+    assert controller.in_flight == 0
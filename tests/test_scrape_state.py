@@ -0,0 +1,98 @@
+import os
+import time
+
+import pytest
+
+import CCA_scraper
+from bench_docket_parser import sample_docket_page
+from blob_store import BlobStore
+from http_cache import DocketCache
+from replay_server import ReplayServer, load_pdfs
+from scrape_state import DOWNLOADED, FAILED, NO_BRIEFS, PENDING, ScrapeStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScrapeStateStore(str(tmp_path / "state.sqlite3"), refresh_days=7, pending_refresh_hours=24)
+    yield store
+    store.close()
+
+
+def test_finished_cases_are_skipped_and_failed_cases_retried(store):
+    store.record("PD-0001-24", "CCA", DOWNLOADED)
+    store.record("PD-0002-24", "CCA", FAILED, "max retries exceeded")
+    assert store.cached_status("PD-0001-24") == DOWNLOADED
+    assert store.cached_status("PD-0002-24") is None
+    assert store.cached_status("PD-0003-24") is None
+    assert store.failed_cases("CCA") == [("PD-0002-24", "max retries exceeded")]
+
+
+def test_attempts_and_summary(store):
+    store.record("01-24-00001-CR", "COA01", FAILED, "timeout")
+    store.record("01-24-00001-CR", "COA01", DOWNLOADED)
+    store.record("01-24-00002-CR", "COA01", NO_BRIEFS)
+    assert store.get("01-24-00001-CR")[:2] == (DOWNLOADED, None)
+    assert store._conn.execute("SELECT attempts FROM cases WHERE case_id = '01-24-00001-CR'").fetchone() == (2,)
+    assert store.summary("COA01") == {DOWNLOADED: 1, NO_BRIEFS: 1}
+
+
+def test_stale_empty_and_pending_cases_are_refreshed(store):
+    store.record("PD-0004-24", "CCA", NO_BRIEFS)
+    store.record("PD-0005-24", "CCA", PENDING)
+    assert store.cached_status("PD-0004-24") == NO_BRIEFS
+    assert store.cached_status("PD-0005-24") == PENDING
+    store._conn.execute("UPDATE cases SET updated_at = ?", (time.time() - 2 * 86400,))
+    assert store.cached_status("PD-0004-24") == NO_BRIEFS
+    assert store.cached_status("PD-0005-24") is None
+    store._conn.execute("UPDATE cases SET updated_at = ?", (time.time() - 8 * 86400,))
+    assert store.cached_status("PD-0004-24") is None
+
+
+def test_open_pdr_is_fetched_again_for_its_disposition(tmp_path, monkeypatch, store):
+    """A PDR downloaded before its disposition is re-scraped and saved under the disposition filename"""
+    monkeypatch.chdir(tmp_path)
+    closed = sample_docket_page("PD-0005-24", events=5)
+    open_page = closed.replace(b"<td>PDR DISP</td><td>Refused</td>", b"<td>MOTION FILED</td><td>Extension</td>")
+    monkeypatch.setattr(CCA_scraper, "docket_cache", DocketCache(str(tmp_path / "cache"), open_ttl_hours=0,
+                                                                 is_closed=CCA_scraper.docket_cache.is_closed))
+    monkeypatch.setattr(CCA_scraper, "blob_store", BlobStore(str(tmp_path / "blobs")))
+    with ReplayServer(pages={"PD-0005-24": open_page}, pdfs=load_pdfs(limit=1), latency=0, jitter=0) as server:
+        monkeypatch.setattr(CCA_scraper, "BASE_URL", server.url)
+        assert CCA_scraper.scrape_case_with_backoff(5, state=store) == PENDING
+        assert os.path.exists("downloads/PD-0005-24 PDR.pdf")
+        assert store.cached_status("PD-0005-24") == PENDING
+
+        server.pages["PD-0005-24"] = closed
+        store._conn.execute("UPDATE cases SET updated_at = ?", (time.time() - 25 * 3600,))
+        assert store.cached_status("PD-0005-24") is None
+        assert CCA_scraper.scrape_case_with_backoff(5, state=store) == DOWNLOADED
+        assert os.path.exists("downloads/PD-0005-24 PDR (refused).pdf")
+        assert store.cached_status("PD-0005-24") == DOWNLOADED
+    CCA_scraper.blob_store.close()
+
+
+def test_scrape_court_closes_the_store_it_opens(tmp_path, monkeypatch):
+    import appeals_scraper
+
+    monkeypatch.chdir(tmp_path)
+    opened = []
+
+    class TrackedStore(ScrapeStateStore):
+        def __init__(self):
+            super().__init__(str(tmp_path / "state.sqlite3"))
+            self.closed = False
+            opened.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr(appeals_scraper, "ScrapeStateStore", TrackedStore)
+    monkeypatch.setattr(appeals_scraper, "docket_cache", DocketCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(appeals_scraper, "blob_store", BlobStore(str(tmp_path / "blobs")))
+    with ReplayServer(pdfs=load_pdfs(limit=1), latency=0, jitter=0) as server:
+        monkeypatch.setattr(appeals_scraper, "BASE_URL", server.url)
+        progress = appeals_scraper.scrape_court(1, 1, 3, max_in_flight=1, year=24)
+    assert progress['processed'] == 3
+    assert [store.closed for store in opened] == [True]
+    appeals_scraper.blob_store.close()
@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+
+import anthropic
+import pytest
+
+from batch_server import BatchServer
+
+TEXT = "The appellant argues that the trial court erred in admitting the evidence. " * 50
+
+
+def test_parse_summary_reports_the_failure_rate(make_detector):
+    detector = make_detector()
+    assert detector.parse_summary() == ("Structured output: 0 responses, 0 failed validation (0.0%), "
+                                        "0 fixed by a repair retry, 0 lost")
+    detector.count_parse("valid.pdf", [], None)
+    detector.count_parse("repaired.pdf", ["tells is missing"], [])
+    detector.count_parse("still_invalid.pdf", ["tells is missing"], ["tells is missing"])
+    detector.count_parse("no_budget.pdf", ["tells is missing"], None)
+    assert detector.parse_stats == {'responses': 4, 'invalid': 3, 'repaired': 1, 'failed': 2}
+    assert detector.parse_summary() == ("Structured output: 4 responses, 3 failed validation (75.0%), "
+                                        "1 fixed by a repair retry, 2 lost")
+
+
+def analyze(detector, asynchronous):
+    if not asynchronous:
+        return detector.analyze_text(TEXT, "brief.pdf")
+    finished = []
+    document = {'path': Path("brief.pdf"), 'text': TEXT, 'notes': [], 'result': None}
+    asyncio.run(detector.analyze_documents_async(iter([document]), finished.append))
+    return finished[0]['result']
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_invalid_answer_is_fixed_by_a_repair_retry(make_detector, asynchronous):
+    with BatchServer(invalid_rate=1.0) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url)
+        detector.async_client = anthropic.AsyncAnthropic(api_key="stand-in", base_url=server.url)
+        result = analyze(detector, asynchronous)
+    assert server.stats['messages'] == 2
+    assert 0 <= result['confidence_percentage'] <= 100
+    # The result's usage covers the invalid answer and the repair retry
+    assert detector.usage['calls'] == 2
+    assert result['usage']['output_tokens'] == detector.usage['output_tokens']
+    assert detector.parse_stats == {'responses': 1, 'invalid': 1, 'repaired': 1, 'failed': 0}
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_failed_repair_retry_is_counted_as_lost(make_detector, asynchronous):
+    with BatchServer(invalid_rate=1.0) as server:
+        detector = make_detector()
+        detector.client = anthropic.Anthropic(api_key="stand-in", base_url=server.url, max_retries=0)
+        detector.async_client = anthropic.AsyncAnthropic(api_key="stand-in", base_url=server.url, max_retries=0)
+        client = detector.async_client if asynchronous else detector.client
+        create = client.messages.create
+
+        def failing_repair(**request):
+            if len(request['messages']) > 1:
+                raise RuntimeError("connection reset")
+            return create(**request)
+
+        client.messages.create = failing_repair
+        result = analyze(detector, asynchronous)
+    assert result is None
+    assert detector.cost_budget.reserved['input_tokens'] == 0
+    assert detector.parse_stats == {'responses': 1, 'invalid': 1, 'repaired': 0, 'failed': 1}
+    assert detector.parse_summary().startswith("Structured output: 1 responses, 1 failed validation (100.0%)")
@@ -0,0 +1,75 @@
+import glob
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from stylometry import (FEATURES, TRANSITION_WORDS, TTR_WINDOW, _WORD, _sentence_lengths, estimated_recall,
+                        feature_matrix, score_documents)
+from text_cache import TextCache
+
+
+def naive_features(text):
+    """One document's features computed the plain way, to check the vectorized version against"""
+    words = _WORD.findall(text.lower())
+    lengths = _sentence_lengths(text)
+    mean = np.mean(lengths) if lengths else 0.0
+    cv = np.std(lengths) / max(mean, 1) if lengths else 0.0
+    ttr = len(set(words[:TTR_WINDOW])) / max(min(len(words), TTR_WINDOW), 1)
+    trigrams = Counter(zip(words, words[1:], words[2:]))
+    total = sum(trigrams.values())
+    repetition = sum(n for n in trigrams.values() if n > 1) / max(total, 1)
+    transitions = sum(word in TRANSITION_WORDS for word in words) * 1000 / max(len(words), 1)
+    return [cv, ttr, repetition, transitions]
+
+
+def random_text(rng, words, sentences):
+    vocabulary = ["court", "evidence", "trial", "the", "jury", "moreover", "appellant", "state", "error",
+                  "furthermore", "harm", "record", "witness", "testified", "that"]
+    return " ".join(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, words))).capitalize() + "."
+                    for _ in range(sentences))
+
+
+def test_vectorized_features_match_a_per_document_count():
+    rng = random.Random(7)
+    texts = [random_text(rng, 25, rng.randint(5, 120)) for _ in range(12)] + ["", "Too short."]
+    features = feature_matrix(texts)
+    assert features.shape == (len(texts), len(FEATURES))
+    for row, text in zip(features, texts):
+        assert row == pytest.approx(naive_features(text))
+
+
+def test_bundled_briefs_match_a_per_document_count():
+    paths = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[:6]
+    cache = TextCache(path=":memory:")
+    texts = [cache.extract(path) for path in paths]
+    cache.close()
+    for row, text in zip(feature_matrix(texts), texts):
+        assert row == pytest.approx(naive_features(text))
+
+
+def test_sentence_lengths_skip_abbreviations_and_short_fragments():
+    text = "Compare Smith v. State with Jones v. State, No. 12-345, at 3. The court agreed with J. Doe. No."
+    assert _sentence_lengths(text) == [10, 6]
+
+
+def test_empty_corpus_has_zero_features():
+    assert not feature_matrix(["", "   "]).any()
+
+
+def test_repetitive_uniform_text_scores_higher():
+    rng = random.Random(3)
+    varied = [random_text(rng, 40, 60) for _ in range(8)]
+    generated = ("Moreover, the court erred in admitting the evidence at trial. " * 40
+                 + "Furthermore, the court erred in admitting the evidence at trial. " * 40)
+    scores, _ = score_documents(varied + [generated])
+    assert scores.argmax() == len(varied)
+    assert scores[-1] > 1
+
+
+def test_estimated_recall():
+    assert estimated_recall(9, 0, 0, 50) is None
+    # One in ten audited documents was flaggable, so about five of the 50 held back were missed
+    assert estimated_recall(15, 1, 10, 50) == pytest.approx(0.75)
+    assert estimated_recall(0, 0, 10, 50) == 1.0
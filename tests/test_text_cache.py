@@ -0,0 +1,35 @@
+import glob
+
+from pdf_extract import extract_texts
+from text_cache import TextCache
+
+BRIEF = sorted(glob.glob("CA14_2024_Briefs/*.pdf"))[0]
+
+
+def test_second_extraction_is_a_cache_hit(tmp_path):
+    path = str(tmp_path / "texts.sqlite3")
+    cache = TextCache(path)
+    text = cache.extract(BRIEF)
+    cache.close()
+
+    reopened = TextCache(path)
+    assert reopened.extract(BRIEF) == text
+    assert reopened.stats == {'hits': 1, 'misses': 0}
+    # extract_texts yields cached files without starting a pool
+    extraction, = list(extract_texts([BRIEF], cache=reopened))
+    assert extraction.text == text and extraction.seconds == 0.0
+    reopened.close()
+
+
+def test_entries_from_another_extractor_version_are_dropped(tmp_path, capsys):
+    path = str(tmp_path / "texts.sqlite3")
+    old = TextCache(path, extractor_version="old")
+    old.put("abc", "old text")
+    old.close()
+
+    cache = TextCache(path, extractor_version="new")
+    assert "Dropped 1 cached texts" in capsys.readouterr().out
+    assert cache.get("abc") is None
+    cache.put("abc", "new text ✓")
+    assert cache.get("abc") == "new text ✓"
+    cache.close()
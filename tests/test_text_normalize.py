@@ -0,0 +1,75 @@
+import glob
+
+import pytest
+
+from pdf_extract import extract_text
+from text_normalize import describe, normalize_text
+
+
+def page(*lines):
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("line", ["12", "- 3 -", "–4–", "Page 3 of 40", "PAGE 7"])
+def test_page_number_lines_are_dropped_anywhere(line):
+    text, stats = normalize_text(page("First line of text.", line, "Second line of text."))
+    assert text == "First line of text.\nSecond line of text.\n"
+    assert stats['page_numbers'] == 1
+
+
+@pytest.mark.parametrize("numeral", ["i", "iv", "xi", "XIV", "xxxix"])
+def test_roman_page_numbers_are_dropped_at_a_page_edge(numeral):
+    body = [f"Line {n} of the table of authorities." for n in range(10)]
+    text, stats = normalize_text(page(*body, numeral))
+    assert numeral not in text.split("\n") and stats['page_numbers'] == 1
+
+
+@pytest.mark.parametrize("word", ["civil", "mix", "iiii", "vv"])
+def test_words_made_of_numeral_letters_are_kept(word):
+    body = [f"Line {n} of the argument." for n in range(10)]
+    text, _ = normalize_text(page(*body, word))
+    assert word in text.split("\n")
+
+
+def test_roman_numerals_inside_a_page_are_kept():
+    lines = [f"Line {n} of the argument." for n in range(5)] + ["xi"] + [f"Line {n} again." for n in range(5)]
+    text, stats = normalize_text(page(*lines))
+    assert "xi" in text.split("\n") and stats['page_numbers'] == 0
+
+
+def test_running_headers_are_dropped_from_page_edges():
+    bodies = ["The stop.", "The search.", "The arrest.", "The trial.", "The verdict."]
+    pages = [page("STATE v. DOE, No. 01-24-00001-CR", body, f"Page {n} of 5") for n, body in enumerate(bodies, 1)]
+    text, stats = normalize_text("\f".join(pages))
+    assert text == "\n".join(bodies) + "\n"
+    assert stats['repeated_lines'] == 5 and stats['page_numbers'] == 5
+
+
+def test_pleading_line_numbers_are_stripped_only_in_a_run_from_one():
+    numbered = page(*[f"{n} Testimony line {n}." for n in range(1, 13)])
+    text, stats = normalize_text(numbered)
+    assert text.startswith("Testimony line 1.\nTestimony line 2.") and stats['line_numbers'] == 12
+    footnotes = page("Body text.", "3 See Smith v. State.", "4 See Jones v. State.")
+    assert normalize_text(footnotes)[0] == footnotes + "\n"
+
+
+@pytest.mark.parametrize("broken, joined", [
+    ("the argu-\nment fails", "the argument fails"),
+    ("a post-\nconviction writ", "a post-\nconviction writ"),
+    ("the co-\ndefendant testified", "the co-\ndefendant testified"),
+    ("the Fort-\nWorth office", "the Fort-\nWorth office"),
+    ("in 2019-\n20 cases", "in 2019-\n20 cases"),
+])
+def test_hyphen_rejoin(broken, joined):
+    text, stats = normalize_text(broken)
+    assert text == joined + "\n"
+    assert stats['hyphenations'] == (joined != broken)
+
+
+def test_bundled_brief_gets_smaller():
+    path = sorted(glob.glob("CA01_2024_Briefs/*.pdf"))[0]
+    raw = extract_text(path)
+    text, stats = normalize_text(raw)
+    assert "\f" not in text and len(text) < len(raw)
+    assert stats['tokens_saved'] > 0 and stats['page_numbers'] > 0
+    assert describe(stats).startswith(f"~{stats['tokens_saved']:,} tokens saved")
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from blob_store import file_sha256
+from pdf_extract import EXTRACTOR_VERSION, extract_text
+
+TEXT_CACHE_PATH = os.getenv("PDF_TEXT_CACHE", "text_cache.sqlite3")
+
+
+class TextCache:
+    """SQLite cache of extracted PDF text keyed by file SHA-256 and extractor version
+
+    Downloaded PDFs never change, so once a document's text has been extracted
+    it is read back from here (zlib-compressed) on every later run. Entries
+    written by a different EXTRACTOR_VERSION are deleted when the cache is
+    opened, so changing the extractor re-extracts everything once.
+    digest_for(path) returns a file's SHA-256; pass BlobStore.digest_for to
+    reuse the hashes recorded in the blob manifest.
+    """
+
+    def __init__(self, path=TEXT_CACHE_PATH, extractor_version=EXTRACTOR_VERSION, digest_for=file_sha256):
+        self.path = path
+        self.extractor_version = extractor_version
+        self.digest_for = digest_for
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS texts (
+                sha256 TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                text BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (sha256, extractor)
+            )
+        """)
+        stale = self._conn.execute("DELETE FROM texts WHERE extractor != ?", (extractor_version,)).rowcount
+        self._conn.commit()
+        if stale:
+            print(f"Dropped {stale} cached texts from an older extractor")
+
+    def get(self, digest):
+        """Return the cached text for a file digest, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM texts WHERE sha256 = ? AND extractor = ?", (digest, self.extractor_version)
+            ).fetchone()
+            self.stats['hits' if row else 'misses'] += 1
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def put(self, digest, text):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts (sha256, extractor, text, created_at) VALUES (?, ?, ?, ?)",
+                (digest, self.extractor_version, zlib.compress(text.encode('utf-8')), time.time()),
+            )
+            self._conn.commit()
+
+    def extract(self, pdf_path):
+        """Return the text of pdf_path, extracting and caching it on a miss"""
+        digest = self.digest_for(pdf_path)
+        text = self.get(digest)
+        if text is None:
+            text = extract_text(pdf_path)
+            self.put(digest, text)
+        return text
+
+    def summary(self):
+        return f"Text cache: {self.stats['hits']} hits, {self.stats['misses']} extracted"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,126 @@
+import re
+from collections import Counter
+
+# Rough size of a Claude token in English text, for reporting savings without an API call
+CHARS_PER_TOKEN = 4
+
+# Lines near the top or bottom of a page that are checked for running headers and footers
+EDGE_LINES = 4
+
+# A line counts as a running header/footer once it is on this many pages (and this share of them)
+MIN_REPEAT_PAGES = 3
+MIN_REPEAT_SHARE = 0.3
+
+# Pleading line numbers run 1, 2, 3... (up to 28) down a page; this many in a row marks a
+# numbered page. Requiring the run to start at 1 keeps footnote numbers out.
+MIN_NUMBERED_LINES = 10
+MAX_LINE_NUMBER = 28
+
+# Prefixes that form real hyphenated compounds ("post-conviction", "co-defendant"), so a line
+# break after them is not rejoined. Prefixes that also start common words (re, pre, pro, over)
+# are left out, since hyphenation splits those words far more often.
+HYPHEN_PREFIXES = {'anti', 'co', 'cross', 'multi', 'non', 'post', 'quasi', 'self', 'semi', 'well'}
+
+_PAGE_NUMBER = re.compile(r"[-–]?\s*(page\s*)?\d{1,4}(\s*of\s*\d{1,4})?\s*[-–]?", re.IGNORECASE)
+# Front matter is numbered i, ii, iii...; only valid numerals up to lxxxix count, and only at a page edge
+_ROMAN_PAGE_NUMBER = re.compile(r"[-–]?\s*(page\s*)?(?=[ivxl])(xl|l?x{0,3})(ix|iv|v?i{0,3})\s*[-–]?", re.IGNORECASE)
+_LEADING_NUMBER = re.compile(r"^\s*(\d{1,2})\s+(?=\S)")
+_HYPHENATED = re.compile(r"\b([a-z]+)-\n\s*([a-z]+)\b")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _line_key(line):
+    """Compare lines ignoring case, spacing and digits, so "Page 3 of 40" matches "Page 4 of 40" """
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+
+def _edge_keys(lines):
+    content = [line for line in lines if line.strip()]
+    return {_line_key(line) for line in content[:EDGE_LINES] + content[-EDGE_LINES:]}
+
+
+def _strip_line_numbers(lines):
+    """Remove pleading line numbers if the page has a run of consecutively numbered lines"""
+    numbers = [_LEADING_NUMBER.match(line) for line in lines]
+    run = longest = 0
+    previous = None
+    for match in numbers:
+        value = int(match.group(1)) if match else None
+        if value is not None and value <= MAX_LINE_NUMBER and previous is not None and value == previous + 1:
+            run += 1
+        else:
+            run = 1 if value == 1 else 0
+            value = value if run else None
+        longest = max(longest, run)
+        previous = value
+    if longest < MIN_NUMBERED_LINES:
+        return lines, 0
+    numbers = [match if match and int(match.group(1)) <= MAX_LINE_NUMBER else None for match in numbers]
+    return [line[match.end():] if match else line for line, match in zip(lines, numbers)], sum(map(bool, numbers))
+
+
+def _rejoin(match):
+    first, rest = match.groups()
+    return match.group(0) if first in HYPHEN_PREFIXES else first + rest
+
+
+def normalize_text(text):
+    """Clean extracted text and return (text, stats)
+
+    Pages are separated by form feeds (see pdf_extract.extract_text). The
+    cleanup drops page-number lines (roman numerals only near a page edge),
+    running headers and footers (lines near the page edges that recur on
+    many pages, such as the case caption), and pleading line numbers. It
+    rejoins lowercase words hyphenated across line breaks, except after the
+    compound prefixes in HYPHEN_PREFIXES, and collapses runs of spaces and
+    blank lines. The stats count each kind of removal and estimate the
+    tokens saved.
+    """
+    pages = [page.splitlines() for page in text.split("\f")]
+    stats = {'page_numbers': 0, 'repeated_lines': 0, 'line_numbers': 0, 'hyphenations': 0}
+
+    edge_counts = Counter(key for lines in pages for key in _edge_keys(lines))
+    threshold = max(MIN_REPEAT_PAGES, MIN_REPEAT_SHARE * len(pages))
+    repeated = {key for key, count in edge_counts.items() if count >= threshold and key}
+
+    cleaned_pages = []
+    for lines in pages:
+        lines, numbered = _strip_line_numbers(lines)
+        stats['line_numbers'] += numbered
+        edges = _edge_keys(lines)
+        kept = []
+        for line in lines:
+            stripped = line.strip()
+            if stripped and (_PAGE_NUMBER.fullmatch(stripped)
+                             or _ROMAN_PAGE_NUMBER.fullmatch(stripped) and _line_key(line) in edges):
+                stats['page_numbers'] += 1
+            elif stripped and _line_key(line) in repeated and _line_key(line) in edges:
+                stats['repeated_lines'] += 1
+            else:
+                kept.append(line)
+        cleaned_pages.append("\n".join(kept))
+
+    cleaned = "\n".join(cleaned_pages)
+    stats['hyphenations'] = sum(first not in HYPHEN_PREFIXES for first, _ in _HYPHENATED.findall(cleaned))
+    cleaned = _HYPHENATED.sub(_rejoin, cleaned)
+    cleaned = "\n".join(_SPACES.sub(" ", line).strip() for line in cleaned.split("\n"))
+    cleaned = _BLANK_LINES.sub("\n\n", cleaned).strip() + "\n"
+
+    stats['tokens_before'] = estimate_tokens(text)
+    stats['tokens_after'] = estimate_tokens(cleaned)
+    stats['tokens_saved'] = stats['tokens_before'] - stats['tokens_after']
+    return cleaned, stats
+
+
+def describe(stats):
+    """One-line summary of normalize_text stats"""
+    saved = stats['tokens_saved']
+    share = saved / stats['tokens_before'] if stats['tokens_before'] else 0.0
+    return (f"~{saved:,} tokens saved ({share:.0%}): {stats['repeated_lines']} header/footer lines, "
+            f"{stats['page_numbers']} page numbers, {stats['line_numbers']} line numbers, "
+            f"{stats['hyphenations']} hyphenations")